@@ -0,0 +1,81 @@
+"""
+Simulation benchmark of the adaptive concurrency limiter against a local throttling server.
+Compares fixed numbers of workers with the AdaptiveConcurrencyLimiter on the same workload.
+
+    python benchmarks/adaptive_concurrency.py --requests 600 --capacity 8
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cjapy import connector, configs
+from cjapy.ratelimit import AdaptiveConcurrencyLimiter
+from throttling_server import ThrottlingServer
+
+
+def createConnector(**kwargs) -> connector.AdobeRequest:
+    """
+    Returns a connector with a fake token, so no request is sent to IMS.
+    """
+    config_object = configs.generateConfigObject(
+        org_id="benchmark@AdobeOrg", client_id="benchmark", secret="secret", scopes="openid"
+    )
+    config_object["token"] = "benchmark"
+    config_object["date_limit"] = time.time() + 3600
+    conn = connector.AdobeRequest(
+        config_object=config_object,
+        header={"Accept": "application/json", "Content-Type": "application/json"},
+        coalesce=False,
+        **kwargs,
+    )
+    conn.restTime = 0.2
+    return conn
+
+
+def run(server: ThrottlingServer, nbRequests: int, workers: int, limiter=None) -> dict:
+    conn = createConnector(concurrencyLimiter=limiter)
+    requestsBefore, throttledBefore = server.requests, server.throttled
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(
+            executor.map(
+                lambda index: conn.getData(f"{server.url}/data/dataviews", params={"page": index}),
+                range(nbRequests),
+            )
+        )
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": "adaptive" if limiter is not None else "fixed",
+        "workers": workers,
+        "wall_time": round(elapsed, 3),
+        "requests_per_second": round(nbRequests / elapsed, 1),
+        "http_requests": server.requests - requestsBefore,
+        "throttled": server.throttled - throttledBefore,
+        "final_limit": round(limiter.limit, 2) if limiter is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--output", default=None, help="JSON file to write the results")
+    args = parser.parse_args()
+    results = []
+    with ThrottlingServer(capacity=args.capacity, latency=args.latency) as server:
+        for workers in args.workers:
+            results.append(run(server, args.requests, workers))
+        limiter = AdaptiveConcurrencyLimiter(maxLimit=max(args.workers))
+        results.append(run(server, args.requests, max(args.workers), limiter))
+    for result in results:
+        print(json.dumps(result))
+    if args.output is not None:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,876 @@
+"""
+Local stand-in of the CJA API and of the IMS token endpoints, generating synthetic data.
+Used to tune the concurrency, rate limiting and pagination without touching the production quotas.
+
+    python benchmarks/cja_stub_server.py --port 8080 --latency 0.05 --burst 30 5 --error504 0.01
+
+The endpoints used by cjapy are implemented with the CJA pagination:
+"lastPage" for the components, projects and reports, "last" for the data views and audit logs,
+with "totalPages" and "totalElements" in both cases.
+"""
+import re
+import gzip
+import json
+import time
+import random
+import threading
+import argparse
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+ORG_ID = "0000000000000000000000@AdobeOrg"
+
+
+def stubConfigObject(url: str = None, token: bool = False) -> dict:
+    """
+    Returns a configuration object (oauth) requesting its token to the IMS endpoint of a stub server,
+    usable from another process than the server.
+    Arguments:
+        url : REQUIRED : URL of the stub server.
+        token : OPTIONAL : If set to True, a valid token is set in the configuration, so no token request is sent.
+    """
+    from cjapy import configs
+
+    config_object = configs.generateConfigObject(
+        org_id=ORG_ID,
+        client_id="stub",
+        secret="stub",
+        scopes="openid,AdobeID,read_organizations",
+        ims_endpoint=url,
+    )
+    if token:
+        config_object["token"] = "stub-token"
+        config_object["date_limit"] = time.time() + 3600
+    return config_object
+
+
+class SyntheticData:
+    """
+    Deterministic synthetic components, projects, audit logs and reports.
+    The elements are generated from their index when requested, so large scales do not use memory.
+    """
+
+    def __init__(
+        self,
+        seed: int = 42,
+        dataViews: int = 5,
+        dimensions: int = 200,
+        metrics: int = 100,
+        filters: int = 1000,
+        calculatedMetrics: int = 500,
+        projects: int = 200,
+        auditLogs: int = 5000,
+        reportRows: int = 1000,
+        breakdownRows: int = 50,
+    ) -> None:
+        """
+        Arguments:
+            seed : OPTIONAL : seed of the generation, the same seed returns the same data.
+            dataViews : OPTIONAL : number of data views (default 5)
+            dimensions : OPTIONAL : number of dimensions per data view (default 200)
+            metrics : OPTIONAL : number of metrics per data view (default 100)
+            filters : OPTIONAL : number of filters (default 1000)
+            calculatedMetrics : OPTIONAL : number of calculated metrics (default 500)
+            projects : OPTIONAL : number of projects (default 200)
+            auditLogs : OPTIONAL : number of audit logs entries (default 5000)
+            reportRows : OPTIONAL : number of rows of a report without breakdown (default 1000)
+            breakdownRows : OPTIONAL : number of rows of a breakdown report (default 50)
+        """
+        self.seed = seed
+        self.counts = {
+            "dataViews": dataViews,
+            "dimensions": dimensions,
+            "metrics": metrics,
+            "filters": filters,
+            "calculatedMetrics": calculatedMetrics,
+            "projects": projects,
+            "auditLogs": auditLogs,
+        }
+        self.reportRows = reportRows
+        self.breakdownRows = breakdownRows
+
+    def _random(self, *key) -> random.Random:
+        return random.Random(":".join(str(part) for part in (self.seed,) + key))
+
+    @staticmethod
+    def _index(componentId: str) -> int:
+        """
+        Returns the index of a generated component from its ID, None if the ID is not generated.
+        """
+        match = re.search(r"(\d+)$", componentId or "")
+        return int(match.group(1)) if match else None
+
+    def _owner(self, rng: random.Random) -> dict:
+        userId = rng.randint(1, 50)
+        return {
+            "id": 200000000 + userId,
+            "name": f"User {userId}",
+            "login": f"user{userId}@example.com",
+            "imsUserId": f"{userId:024X}@AdobeID",
+        }
+
+    def dataViewId(self, index: int) -> str:
+        return f"dv_{index:024d}"
+
+    def dimensionId(self, index: int) -> str:
+        return f"variables/dimension{index}"
+
+    def metricId(self, index: int) -> str:
+        return f"metrics/metric{index}"
+
+    def filterId(self, index: int) -> str:
+        return f"s{ORG_ID}_{index:024d}"
+
+    def calculatedMetricId(self, index: int) -> str:
+        return f"cm{ORG_ID}_{index:024d}"
+
+    def projectId(self, index: int) -> str:
+        return f"{index:024d}"
+
+    def dataView(self, index: int) -> dict:
+        rng = self._random("dataView", index)
+        return {
+            "id": self.dataViewId(index),
+            "name": f"Data View {index}",
+            "description": f"Synthetic data view {index}",
+            "owner": self._owner(rng),
+            "parentDataGroupId": f"dg_{index:024d}",
+            "timezoneDesignator": "UTC",
+            "modified": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z",
+            "organization": ORG_ID,
+        }
+
+    def dimension(self, dataViewIndex: int, index: int) -> dict:
+        rng = self._random("dimension", dataViewIndex, index)
+        return {
+            "id": self.dimensionId(index),
+            "name": f"Dimension {index}",
+            "title": f"Dimension {index}",
+            "type": rng.choice(["string", "int", "enum"]),
+            "category": "Dimension",
+            "description": "",
+            "sourceFieldId": f"_tenant.field{index}",
+            "sourceFieldName": f"field{index}",
+            "sourceFieldType": "string",
+            "dataSetIds": [f"{dataViewIndex:024x}"],
+            "dataSetType": "event",
+            "segmentable": True,
+            "hasData": rng.random() > 0.1,
+        }
+
+    def metric(self, dataViewIndex: int, index: int) -> dict:
+        rng = self._random("metric", dataViewIndex, index)
+        return {
+            "id": self.metricId(index),
+            "name": f"Metric {index}",
+            "title": f"Metric {index}",
+            "type": rng.choice(["int", "decimal", "currency"]),
+            "category": "Metric",
+            "description": "",
+            "sourceFieldId": f"_tenant.measure{index}",
+            "sourceFieldName": f"measure{index}",
+            "dataSetIds": [f"{dataViewIndex:024x}"],
+            "dataSetType": "event",
+            "precision": 0,
+        }
+
+    def filter(self, index: int, definition: bool = True) -> dict:
+        rng = self._random("filter", index)
+        dimension = self.dimensionId(rng.randrange(self.counts["dimensions"]))
+        element = {
+            "id": self.filterId(index),
+            "name": f"Filter {index}",
+            "description": "",
+            "dataId": self.dataViewId(rng.randrange(self.counts["dataViews"])),
+            "owner": self._owner(rng),
+            "modified": "2024-01-01T00:00:00Z",
+            "tags": [],
+            "definition": {
+                "func": "segment",
+                "version": [1, 0, 0],
+                "container": {
+                    "func": "container",
+                    "context": rng.choice(["hits", "visits", "visitors"]),
+                    "pred": {
+                        "func": "streq",
+                        "str": f"value{rng.randint(0, 100)}",
+                        "val": {"func": "attr", "name": dimension},
+                    },
+                },
+            },
+        }
+        if not definition:
+            del element["definition"]
+        return element
+
+    def calculatedMetric(self, index: int, definition: bool = True) -> dict:
+        rng = self._random("calculatedMetric", index)
+        metrics = [self.metricId(rng.randrange(self.counts["metrics"])) for _ in range(2)]
+        element = {
+            "id": self.calculatedMetricId(index),
+            "name": f"Calculated Metric {index}",
+            "description": "",
+            "dataId": self.dataViewId(rng.randrange(self.counts["dataViews"])),
+            "owner": self._owner(rng),
+            "polarity": "positive",
+            "precision": 2,
+            "type": "decimal",
+            "modified": "2024-01-01T00:00:00Z",
+            "tags": [],
+            "definition": {
+                "func": "calc-metric",
+                "version": [1, 0, 0],
+                "formula": {
+                    "func": "divide",
+                    "col1": {"func": "metric", "name": metrics[0]},
+                    "col2": {"func": "metric", "name": metrics[1]},
+                },
+            },
+        }
+        if not definition:
+            del element["definition"]
+        return element
+
+    def project(self, index: int, definition: bool = True) -> dict:
+        rng = self._random("project", index)
+        project = {
+            "id": self.projectId(index),
+            "name": f"Project {index}",
+            "description": "",
+            "type": "project",
+            "owner": self._owner(rng),
+            "companyTemplate": False,
+            "modified": "2024-01-01T00:00:00Z",
+            "tags": [],
+            "shares": [],
+            "accessLevel": "owner",
+        }
+        if definition:
+            project["definition"] = self.projectDefinition(index)
+        return project
+
+    def projectDefinition(self, index: int) -> dict:
+        rng = self._random("projectDefinition", index)
+        panels = []
+        for panelIndex in range(rng.randint(1, 4)):
+            dataViewIndex = rng.randrange(self.counts["dataViews"])
+            subPanels = []
+            for subPanelIndex in range(rng.randint(1, 5)):
+                nodes = []
+                for _ in range(rng.randint(1, 4)):
+                    if rng.random() < 0.3 and self.counts["calculatedMetrics"] > 0:
+                        component = {
+                            "type": "CalculatedMetric",
+                            "id": self.calculatedMetricId(rng.randrange(self.counts["calculatedMetrics"])),
+                        }
+                    else:
+                        component = {
+                            "type": "Metric",
+                            "id": self.metricId(rng.randrange(self.counts["metrics"])),
+                        }
+                    children = []
+                    if rng.random() < 0.3 and self.counts["filters"] > 0:
+                        children.append(
+                            {
+                                "component": {
+                                    "type": "Segment",
+                                    "id": self.filterId(rng.randrange(self.counts["filters"])),
+                                },
+                                "nodes": [],
+                            }
+                        )
+                    nodes.append({"component": component, "nodes": children})
+                subPanels.append(
+                    {
+                        "id": f"subpanel{subPanelIndex}",
+                        "reportlet": {
+                            "type": "FreeformReportlet",
+                            "freeformTable": {
+                                "dimension": {
+                                    "id": self.dimensionId(rng.randrange(self.counts["dimensions"]))
+                                },
+                                "staticRows": [],
+                            },
+                            "columnTree": {"nodes": nodes},
+                        },
+                    }
+                )
+            panels.append(
+                {
+                    "id": f"panel{panelIndex}",
+                    "name": f"Panel {panelIndex}",
+                    "reportSuite": {
+                        "id": self.dataViewId(dataViewIndex),
+                        "__metaData__": {"name": f"Data View {dataViewIndex}"},
+                    },
+                    "segmentGroups": [],
+                    "subPanels": subPanels,
+                }
+            )
+        return {
+            "version": "38",
+            "isCurated": False,
+            "device": "desktop",
+            "workspaces": [{"id": "workspace0", "panels": panels}],
+        }
+
+    def auditLog(self, index: int) -> dict:
+        rng = self._random("auditLog", index)
+        componentType = rng.choice(["FILTER", "PROJECT", "CALCULATED_METRIC", "DATA_VIEW"])
+        timestamp = 1704067200 + index * 60
+        return {
+            "id": f"{index:024x}",
+            "dateCreated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp)),
+            "action": rng.choice(["CREATE", "EDIT", "DELETE", "API_REQUEST"]),
+            "logType": "API",
+            "description": f"Synthetic audit log {index}",
+            "ip": f"10.0.{rng.randint(0, 255)}.{rng.randint(0, 255)}",
+            "orgId": ORG_ID,
+            "user": {
+                "id": f"{rng.randint(1, 50):024X}@AdobeID",
+                "email": f"user{rng.randint(1, 50)}@example.com",
+                "name": f"User {rng.randint(1, 50)}",
+                "type": "IMS",
+            },
+            "component": {
+                "id": f"{rng.randint(0, 10000):024d}",
+                "idType": componentType,
+                "name": f"{componentType.title()} {index}",
+            },
+        }
+
+    def reportRow(self, dimension: str, index: int, nbMetrics: int, breakdown: str = "") -> dict:
+        rng = self._random("row", dimension, breakdown, index)
+        return {
+            "itemId": str(1000000000 + index),
+            "value": f"{dimension.split('/')[-1]} value {index}",
+            "data": [float(rng.randint(0, 100000)) for _ in range(nbMetrics)],
+        }
+
+
+class CJAStubServer:
+    """
+    Local server implementing the CJA API endpoints used by cjapy and the IMS token endpoints.
+    Latency, 429 bursts, capacity throttling and 504 errors can be injected.
+    """
+
+    def __init__(
+        self,
+        data: SyntheticData = None,
+        latency: float = 0,
+        jitter: float = 0,
+        capacity: int = None,
+        throttleBursts: tuple = None,
+        error504Rate: float = 0,
+        compress: bool = True,
+        seed: int = 42,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Arguments:
+            data : OPTIONAL : SyntheticData instance, the default scale is used otherwise.
+            latency : OPTIONAL : latency in seconds added to every response (default 0)
+            jitter : OPTIONAL : random latency in seconds added on top of the latency (default 0)
+            capacity : OPTIONAL : number of requests in flight accepted before returning 429 (default no limit)
+            throttleBursts : OPTIONAL : tuple (period, duration) in seconds, all requests get a 429 during
+                the first duration seconds of every period.
+            error504Rate : OPTIONAL : proportion of requests answered with a 504 Gateway Time-out (default 0)
+            compress : OPTIONAL : gzip the responses larger than 1 KB when the client accepts it (default True)
+            seed : OPTIONAL : seed of the latency and errors injection.
+            host : OPTIONAL : host to bind (default 127.0.0.1)
+            port : OPTIONAL : port to bind (default 0, a free port)
+        """
+        self.data = data or SyntheticData()
+        self.latency = latency
+        self.jitter = jitter
+        self.capacity = capacity
+        self.throttleBursts = throttleBursts
+        self.error504Rate = error504Rate
+        self.compress = compress
+        self.requests = 0
+        self.throttled = 0
+        self.errors504 = 0
+        self.tokens = 0
+        self.inFlight = 0
+        self.maxInFlight = 0
+        self.endpoints = Counter()
+        self.startTime = time.monotonic()
+        self.__random = random.Random(seed)
+        self.__lock = threading.Lock()
+        self.routes = [
+            ("POST", r"/ims/token/v3", self.oauthToken),
+            ("POST", r"/ims/exchange/jwt", self.jwtToken),
+            ("GET", r"/configuration/users/me", self.currentUser),
+            ("GET", r"/data/dataviews", self.dataViews),
+            ("GET", r"/data/dataviews/(?P<dataViewId>[^/]+)", self.getDataView),
+            ("GET", r"/data/dataviews/(?P<dataViewId>[^/]+)/dimensions", self.dimensions),
+            ("GET", r"/data/dataviews/(?P<dataViewId>[^/]+)/dimensions/(?P<componentId>.+)", self.getDimension),
+            ("GET", r"/data/dataviews/(?P<dataViewId>[^/]+)/metrics", self.metrics),
+            ("GET", r"/data/dataviews/(?P<dataViewId>[^/]+)/metrics/(?P<componentId>.+)", self.getMetric),
+            ("GET", r"/filters", self.filters),
+            ("GET", r"/filters/(?P<componentId>[^/]+)", self.getFilter),
+            ("GET", r"/calculatedmetrics", self.calculatedMetrics),
+            ("GET", r"/calculatedmetrics/(?P<componentId>[^/]+)", self.getCalculatedMetric),
+            ("GET", r"/projects", self.projects),
+            ("GET", r"/projects/(?P<componentId>[^/]+)", self.getProject),
+            ("POST", r"/reports", self.report),
+            ("GET", r"/reports/topItems", self.topItems),
+            ("GET", r"/auditlogs/api/v1/auditlogs", self.auditLogs),
+            ("POST", r"/auditlogs/api/v1/auditlogs/search", self.searchAuditLogs),
+        ]
+        self.routes = [
+            (method, re.compile(pattern + "/?$"), func) for method, pattern, func in self.routes
+        ]
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server.handle(self, "GET")
+
+            def do_POST(self) -> None:
+                server.handle(self, "POST")
+
+            def do_PUT(self) -> None:
+                server.handle(self, "PUT")
+
+            def do_PATCH(self) -> None:
+                server.handle(self, "PATCH")
+
+            def do_DELETE(self) -> None:
+                server.handle(self, "DELETE")
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "CJAStubServer":
+        self.__thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "CJAStubServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def configObject(self, token: bool = False) -> dict:
+        """
+        Returns a configuration object (oauth) requesting its token to the IMS endpoint of the server.
+        Arguments:
+            token : OPTIONAL : If set to True, a valid token is set in the configuration, so no token request is sent.
+        """
+        return stubConfigObject(self.url, token=token)
+
+    @contextmanager
+    def globalEndpoint(self):
+        """
+        Context manager setting the server as the CJA endpoint (config.endpoints["global"]) of the CJA instances created inside.
+        """
+        from cjapy import config
+
+        previous = config.endpoints["global"]
+        config.endpoints["global"] = self.url
+        try:
+            yield self
+        finally:
+            config.endpoints["global"] = previous
+
+    def getStats(self) -> dict:
+        """
+        Returns the number of requests received, throttled and failed, and the requests per endpoint.
+        """
+        with self.__lock:
+            return {
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "errors504": self.errors504,
+                "tokens": self.tokens,
+                "maxInFlight": self.maxInFlight,
+                "endpoints": dict(self.endpoints),
+            }
+
+    def resetStats(self) -> None:
+        with self.__lock:
+            self.requests = self.throttled = self.errors504 = self.tokens = self.maxInFlight = 0
+            self.endpoints = Counter()
+
+    ## request handling
+
+    def handle(self, request: BaseHTTPRequestHandler, method: str) -> None:
+        split = urlsplit(request.path)
+        params = dict(parse_qsl(split.query, keep_blank_values=True))
+        length = int(request.headers.get("Content-Length") or 0)
+        body = request.rfile.read(length) if length else b""
+        if request.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        with self.__lock:
+            self.requests += 1
+            self.inFlight += 1
+            self.maxInFlight = max(self.maxInFlight, self.inFlight)
+            load = self.inFlight
+            delay = self.latency + (self.__random.random() * self.jitter if self.jitter else 0)
+            error504 = self.error504Rate > 0 and self.__random.random() < self.error504Rate
+        try:
+            status, headers, payload = self.route(method, split.path, params, body, load, delay, error504)
+        except Exception as e:
+            status, headers, payload = 500, {}, json.dumps({"errorCode": "500", "message": str(e)}).encode()
+        finally:
+            with self.__lock:
+                self.inFlight -= 1
+        headers.setdefault("Content-Type", "application/json")
+        if (
+            self.compress
+            and len(payload) > 1024
+            and "gzip" in (request.headers.get("Accept-Encoding") or "")
+        ):
+            payload = gzip.compress(payload, compresslevel=1)
+            headers["Content-Encoding"] = "gzip"
+        request.send_response(status)
+        for key, value in headers.items():
+            request.send_header(key, value)
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def route(
+        self, method: str, path: str, params: dict, body: bytes, load: int, delay: float, error504: bool
+    ) -> tuple:
+        """
+        Returns a tuple (status, headers, payload) for the request.
+        """
+        for routeMethod, pattern, func in self.routes:
+            match = pattern.match(path)
+            if match is not None and routeMethod == method:
+                break
+        else:
+            return 404, {}, json.dumps({"errorCode": "404", "message": f"Unknown endpoint {method} {path}"}).encode()
+        isToken = path.startswith("/ims/")
+        with self.__lock:
+            self.endpoints[func.__name__] += 1
+        if isToken == False:
+            if self.isThrottled(load):
+                with self.__lock:
+                    self.throttled += 1
+                body429 = {"error_code": "429050", "message": "Too many requests"}
+                return 429, {"Retry-After": "1"}, json.dumps(body429).encode()
+            if delay > 0:
+                time.sleep(delay)
+            if error504:
+                with self.__lock:
+                    self.errors504 += 1
+                return 504, {"Content-Type": "text/html"}, b"<html><body><h1>504 Gateway Time-out</h1></body></html>"
+        if body:
+            try:
+                body = json.loads(body)
+            except ValueError:
+                body = dict(parse_qsl(body.decode()))
+        result = func(params=params, body=body or {}, **match.groupdict())
+        if type(result) == tuple:
+            status, result = result
+        else:
+            status = 200
+        return status, {}, json.dumps(result).encode()
+
+    def isThrottled(self, load: int) -> bool:
+        if self.capacity is not None and load > self.capacity:
+            return True
+        if self.throttleBursts is not None:
+            period, duration = self.throttleBursts
+            return (time.monotonic() - self.startTime) % period < duration
+        return False
+
+    ## pagination
+
+    @staticmethod
+    def _int(value: object, default: int) -> int:
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return default
+
+    def _page(self, total: int, make: callable, page: int, size: int, style: str = "lastPage") -> dict:
+        """
+        Returns a page of the generated elements with the CJA pagination keys.
+        Arguments:
+            total : REQUIRED : number of elements.
+            make : REQUIRED : function returning the element of an index.
+            page : REQUIRED : page number, starting at 0
+            size : REQUIRED : number of elements per page.
+            style : OPTIONAL : "lastPage" (components, projects) or "last" (data views, audit logs)
+        """
+        size = max(size, 1)
+        start = page * size
+        content = [make(index) for index in range(start, min(start + size, total))]
+        totalPages = max(-(-total // size), 1)
+        result = {
+            "content": content,
+            "totalElements": total,
+            "totalPages": totalPages,
+            "numberOfElements": len(content),
+            "number": page,
+            "size": size,
+        }
+        if style == "last":
+            result["first"] = page == 0
+            result["last"] = page >= totalPages - 1
+        else:
+            result["firstPage"] = page == 0
+            result["lastPage"] = page >= totalPages - 1
+        return result
+
+    def _pageParams(self, params: dict, default: int = 100) -> tuple:
+        return self._int(params.get("page"), 0), self._int(params.get("limit"), default)
+
+    def _notFound(self, kind: str, componentId: str) -> tuple:
+        return 404, {"errorCode": "resource_not_found", "errorDescription": f"{kind} {componentId} not found"}
+
+    ## IMS
+
+    def oauthToken(self, params: dict, body: dict) -> dict:
+        with self.__lock:
+            self.tokens += 1
+            count = self.tokens
+        return {"access_token": f"stub-token-{count}", "token_type": "bearer", "expires_in": 86399}
+
+    def jwtToken(self, params: dict, body: dict) -> dict:
+        with self.__lock:
+            self.tokens += 1
+            count = self.tokens
+        return {"access_token": f"stub-token-{count}", "token_type": "bearer", "expires_in": 86399000}
+
+    ## CJA endpoints
+
+    def currentUser(self, params: dict, body: dict) -> dict:
+        return {"imsUserId": "000000000000000000000001@AdobeID", "email": "user1@example.com", "orgId": ORG_ID}
+
+    def _dataViewIndex(self, dataViewId: str) -> int:
+        index = self.data._index(dataViewId)
+        if index is None or index >= self.data.counts["dataViews"]:
+            return None
+        return index
+
+    def dataViews(self, params: dict, body: dict) -> dict:
+        page, size = self._pageParams(params, 100)
+        return self._page(self.data.counts["dataViews"], self.data.dataView, page, size, style="last")
+
+    def getDataView(self, params: dict, body: dict, dataViewId: str) -> dict:
+        index = self._dataViewIndex(dataViewId)
+        if index is None:
+            return self._notFound("data view", dataViewId)
+        return self.data.dataView(index)
+
+    def dimensions(self, params: dict, body: dict, dataViewId: str) -> dict:
+        index = self._dataViewIndex(dataViewId)
+        if index is None:
+            return self._notFound("data view", dataViewId)
+        page, size = self._pageParams(params, 1000)
+        return self._page(
+            self.data.counts["dimensions"], lambda i: self.data.dimension(index, i), page, size
+        )
+
+    def getDimension(self, params: dict, body: dict, dataViewId: str, componentId: str) -> dict:
+        index = self._dataViewIndex(dataViewId)
+        componentIndex = self.data._index(componentId)
+        if index is None or componentIndex is None or componentIndex >= self.data.counts["dimensions"]:
+            return self._notFound("dimension", componentId)
+        return self.data.dimension(index, componentIndex)
+
+    def metrics(self, params: dict, body: dict, dataViewId: str) -> dict:
+        index = self._dataViewIndex(dataViewId)
+        if index is None:
+            return self._notFound("data view", dataViewId)
+        page, size = self._pageParams(params, 1000)
+        return self._page(self.data.counts["metrics"], lambda i: self.data.metric(index, i), page, size)
+
+    def getMetric(self, params: dict, body: dict, dataViewId: str, componentId: str) -> dict:
+        index = self._dataViewIndex(dataViewId)
+        componentIndex = self.data._index(componentId)
+        if index is None or componentIndex is None or componentIndex >= self.data.counts["metrics"]:
+            return self._notFound("metric", componentId)
+        return self.data.metric(index, componentIndex)
+
+    def filters(self, params: dict, body: dict) -> dict:
+        definition = "definition" in params.get("expansion", "")
+        page, size = self._pageParams(params, 100)
+        return self._page(
+            self.data.counts["filters"], lambda index: self.data.filter(index, definition=definition), page, size
+        )
+
+    def getFilter(self, params: dict, body: dict, componentId: str) -> dict:
+        index = self.data._index(componentId)
+        if index is None or index >= self.data.counts["filters"]:
+            return self._notFound("filter", componentId)
+        return self.data.filter(index, definition="definition" in params.get("expansion", ""))
+
+    def calculatedMetrics(self, params: dict, body: dict) -> dict:
+        definition = "definition" in params.get("expansion", "")
+        page, size = self._pageParams(params, 100)
+        return self._page(
+            self.data.counts["calculatedMetrics"],
+            lambda index: self.data.calculatedMetric(index, definition=definition),
+            page,
+            size,
+        )
+
+    def getCalculatedMetric(self, params: dict, body: dict, componentId: str) -> dict:
+        index = self.data._index(componentId)
+        if index is None or index >= self.data.counts["calculatedMetrics"]:
+            return self._notFound("calculated metric", componentId)
+        return self.data.calculatedMetric(index, definition="definition" in params.get("expansion", ""))
+
+    def projects(self, params: dict, body: dict) -> object:
+        definition = "definition" in params.get("expansion", "")
+        make = lambda index: self.data.project(index, definition=definition)
+        if params.get("pagination") != "true":
+            return [make(index) for index in range(self.data.counts["projects"])]
+        page, size = self._pageParams(params, 100)
+        return self._page(self.data.counts["projects"], make, page, size)
+
+    def getProject(self, params: dict, body: dict, componentId: str) -> dict:
+        index = self.data._index(componentId)
+        if index is None or index >= self.data.counts["projects"]:
+            return self._notFound("project", componentId)
+        return self.data.project(index, definition=True)
+
+    def report(self, params: dict, body: dict) -> dict:
+        settings = body.get("settings", {})
+        page = self._int(settings.get("page"), 0)
+        size = self._int(settings.get("limit"), 50)
+        metrics = body.get("metricContainer", {}).get("metrics", [])
+        columnIds = [metric.get("columnId", str(index)) for index, metric in enumerate(metrics)]
+        totals = [float(1000000 * (index + 1)) for index in range(len(columnIds))]
+        dimension = body.get("dimension")
+        if dimension is None:
+            ## static rows report
+            return {
+                "totalPages": 1,
+                "firstPage": True,
+                "lastPage": True,
+                "numberOfElements": 0,
+                "number": 0,
+                "totalElements": 0,
+                "columns": {"columnIds": columnIds},
+                "summaryData": {"filteredTotals": totals, "totals": totals},
+            }
+        breakdowns = [
+            f"{metricFilter.get('dimension')}:{metricFilter.get('itemId')}"
+            for metricFilter in body.get("metricContainer", {}).get("metricFilters", [])
+            if metricFilter.get("type") == "breakdown"
+        ]
+        breakdown = ",".join(sorted(set(breakdowns)))
+        total = self.data.breakdownRows if breakdown else self.data.reportRows
+        result = self._page(
+            total,
+            lambda index: self.data.reportRow(dimension, index, len(columnIds), breakdown),
+            page,
+            size,
+        )
+        result["rows"] = result.pop("content")
+        result["columns"] = {
+            "dimension": {"id": dimension, "type": "string"},
+            "columnIds": columnIds,
+        }
+        result["summaryData"] = {"filteredTotals": totals, "totals": totals}
+        return result
+
+    def topItems(self, params: dict, body: dict) -> dict:
+        page, size = self._pageParams(params, 100)
+        dimension = params.get("dimension", "variables/dimension0")
+        result = self._page(
+            self.data.reportRows,
+            lambda index: {
+                key: value
+                for key, value in self.data.reportRow(dimension, index, 0).items()
+                if key != "data"
+            },
+            page,
+            size,
+        )
+        result["rows"] = result.pop("content")
+        return result
+
+    def auditLogs(self, params: dict, body: dict) -> dict:
+        page = self._int(params.get("pageNumber"), 0)
+        size = self._int(params.get("pageSize"), 100)
+        return self._page(self.data.counts["auditLogs"], self.data.auditLog, page, size, style="last")
+
+    def searchAuditLogs(self, params: dict, body: dict) -> dict:
+        page = self._int(body.get("pageNumber"), 0)
+        size = self._int(body.get("pageSize"), 100)
+        return self._page(self.data.counts["auditLogs"], self.data.auditLog, page, size, style="last")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local stand-in of the CJA API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0, help="random seconds added on top of the latency")
+    parser.add_argument("--capacity", type=int, default=None, help="requests in flight before returning 429")
+    parser.add_argument("--burst", type=float, nargs=2, metavar=("PERIOD", "DURATION"), default=None, help="429 for DURATION seconds every PERIOD seconds")
+    parser.add_argument("--error504", type=float, default=0, help="proportion of 504 responses")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--dataviews", type=int, default=5)
+    parser.add_argument("--dimensions", type=int, default=200)
+    parser.add_argument("--metrics", type=int, default=100)
+    parser.add_argument("--filters", type=int, default=1000)
+    parser.add_argument("--calculated-metrics", type=int, default=500)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--audit-logs", type=int, default=5000)
+    parser.add_argument("--report-rows", type=int, default=1000)
+    parser.add_argument("--breakdown-rows", type=int, default=50)
+    args = parser.parse_args()
+    data = SyntheticData(
+        seed=args.seed,
+        dataViews=args.dataviews,
+        dimensions=args.dimensions,
+        metrics=args.metrics,
+        filters=args.filters,
+        calculatedMetrics=args.calculated_metrics,
+        projects=args.projects,
+        auditLogs=args.audit_logs,
+        reportRows=args.report_rows,
+        breakdownRows=args.breakdown_rows,
+    )
+    server = CJAStubServer(
+        data=data,
+        latency=args.latency,
+        jitter=args.jitter,
+        capacity=args.capacity,
+        throttleBursts=tuple(args.burst) if args.burst else None,
+        error504Rate=args.error504,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"CJA stub server listening on {server.url}")
+    print(f'set cjapy.config.endpoints["global"] = "{server.url}" and imsEndpoint="{server.url}"')
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.getStats(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+Benchmark suite of the client-side hot paths of cjapy on synthetic large fixtures.
+No request is sent: the list methods are answered in-process by the routes of the stub server.
+
+    python benchmarks/hotpaths.py --scale 0.1
+    python benchmarks/hotpaths.py --save baselines/0.2.5.json
+    python benchmarks/hotpaths.py --compare baselines/0.2.5.json --threshold 0.15
+
+At scale 1 the fixtures are: reports of 1M rows, 100k filters, 20k projects with deep column trees.
+The results are written as JSON baselines, the comparison exits with status 1 when a benchmark is slower than the threshold.
+A benchmark raising an error is reported and skipped, the script then exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+import cjapy
+from cjapy import configs
+from cjapy.projects import Project
+from cjapy.requestCreator import RequestCreator
+from cjapy.transport import ReplayResponse
+from cjapy.workspace import Workspace
+from cja_stub_server import CJAStubServer, SyntheticData
+from json_codec import generateReportPage
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str) -> callable:
+    """
+    Register a benchmark. The decorated function receives the scale and returns a tuple (function to time, size).
+    """
+
+    def decorator(func: callable) -> callable:
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+class StubTransport:
+    """
+    Transport answering the requests with the routes of the stub server, without network.
+    The responses are kept in memory so only the client side is measured after the first call.
+    """
+
+    def __init__(self, server: CJAStubServer) -> None:
+        self.server = server
+        self.__responses = {}
+
+    def request(self, method: str, url: str, headers: dict = None, params: dict = None, data=None, stream: bool = False, **kwargs):
+        key = (method, url, json.dumps(params, sort_keys=True, default=str), data)
+        if key not in self.__responses:
+            body = data if type(data) == bytes else (data or "").encode()
+            params = {str(k): str(v) for k, v in (params or {}).items()}
+            self.__responses[key] = self.server.route(method, urlsplit(url).path, params, body, 0, 0, False)
+        status, responseHeaders, payload = self.__responses[key]
+        return ReplayResponse(status_code=status, content=payload, headers=responseHeaders, url=url, method=method)
+
+    def close(self) -> None:
+        self.server.httpd.server_close()
+
+
+def createCJA(transport: object = None) -> cjapy.CJA:
+    """
+    Returns a CJA instance with a fake token, so no request is sent to IMS.
+    """
+    config_object = configs.generateConfigObject(
+        org_id="benchmark@AdobeOrg", client_id="benchmark", secret="secret", scopes="openid"
+    )
+    config_object["token"] = "benchmark"
+    config_object["date_limit"] = time.time() + 3600
+    return cjapy.CJA(config_object=config_object, transport=transport)
+
+
+def reportRequest(metrics: int = 5, dimension: str = "variables/page") -> dict:
+    template = RequestCreator()
+    template.setDataViewId("dv_benchmark")
+    template.setDimension(dimension)
+    template.addGlobalFilter("2024-01-01T00:00:00.000/2024-02-01T00:00:00.000")
+    for index in range(metrics):
+        template.addMetric(f"metrics/metric{index}")
+    return template.to_dict()
+
+
+def deepProject(index: int, depth: int = 5, breadth: int = 3, seed: int = 42) -> dict:
+    """
+    Returns a project definition with freeform tables whose column trees are depth levels deep.
+    """
+    rng = random.Random(f"{seed}:{index}")
+
+    def node(level: int) -> dict:
+        kind = rng.choice(["Metric", "CalculatedMetric", "Segment", "DimensionItem"])
+        if kind == "Metric":
+            component = {"type": kind, "id": f"metrics/metric{rng.randrange(500)}"}
+        elif kind == "CalculatedMetric":
+            component = {"type": kind, "id": f"cm_{rng.randrange(5000)}"}
+        elif kind == "Segment":
+            component = {"type": kind, "id": f"s_{rng.randrange(100000)}"}
+        else:
+            component = {"type": kind, "id": f"variables/dimension{rng.randrange(500)}::{rng.randrange(10**6)}"}
+        children = [] if level >= depth else [node(level + 1) for _ in range(rng.randint(1, breadth))]
+        return {"component": component, "nodes": children}
+
+    panels = []
+    for panelIndex in range(rng.randint(1, 3)):
+        subPanels = [
+            {
+                "reportlet": {
+                    "type": "FreeformReportlet",
+                    "freeformTable": {
+                        "dimension": {"id": f"variables/dimension{rng.randrange(500)}"},
+                        "staticRows": [],
+                    },
+                    "columnTree": {"nodes": [node(1) for _ in range(2)]},
+                }
+            }
+            for _ in range(rng.randint(1, 3))
+        ]
+        panels.append(
+            {
+                "id": f"panel{panelIndex}",
+                "reportSuite": {"id": f"dv_{rng.randrange(20)}", "__metaData__": {"name": "Data View"}},
+                "segmentGroups": [],
+                "subPanels": subPanels,
+            }
+        )
+    return {
+        "id": f"{index:024d}",
+        "name": f"Project {index}",
+        "description": "",
+        "type": "project",
+        "owner": {"name": "User", "imsUserId": "user@AdobeID", "login": "user@example.com"},
+        "definition": {"version": "38", "workspaces": [{"id": "workspace0", "panels": panels}]},
+    }
+
+
+@benchmark("prepareData_workspace")
+def benchPrepareData(scale: float) -> tuple:
+    rows = int(1000000 * scale)
+    page = generateReportPage(rows=rows, metrics=5)
+    request = reportRequest(metrics=5)
+    request["settings"]["page"] = 0
+    metrics = {column["columnId"]: column["id"] for column in request["metricContainer"]["metrics"]}
+    cja = createCJA()
+
+    def run():
+        prepared = cja._prepareData(page["rows"], reportType="normal")
+        Workspace(
+            responseData=prepared,
+            dataRequest=request,
+            columns=page["columns"],
+            summaryData=page["summaryData"],
+            cjaConnector=cja,
+            reportType="normal",
+            metrics=metrics,
+        )
+
+    return run, rows
+
+
+@benchmark("decrypteStaticData")
+def benchDecrypteStaticData(scale: float) -> tuple:
+    staticRows = max(int(500 * scale), 2)
+    nbMetrics = 40
+    metrics, metricFilters, columnIds = [], [], []
+    for row in range(staticRows):
+        metricFilters.append({"id": f"STATIC_ROW_COMPONENT_{row}", "type": "segment", "segmentId": f"segment_{row}"})
+        for metric in range(nbMetrics):
+            columnId = str(len(metrics))
+            metrics.append({"columnId": columnId, "id": f"metrics/metric{metric}", "filters": [f"STATIC_ROW_COMPONENT_{row}"]})
+            columnIds.append(columnId)
+    request = {"metricContainer": {"metrics": metrics, "metricFilters": metricFilters}}
+    response = {
+        "columns": {"columnIds": columnIds},
+        "summaryData": {"totals": [float(index) for index in range(len(columnIds))]},
+    }
+    cja = createCJA()
+    return (lambda: cja._decrypteStaticData(dataRequest=request, response=response)), len(columnIds)
+
+
+@benchmark("project_parsing")
+def benchProjectParsing(scale: float) -> tuple:
+    nbProjects = max(int(20000 * scale), 1)
+    projects = [deepProject(index) for index in range(nbProjects)]
+    return (lambda: [Project(project) for project in projects]), nbProjects
+
+
+@benchmark("findComponentsUsage")
+def benchFindComponentsUsage(scale: float) -> tuple:
+    data = SyntheticData(
+        filters=max(int(100000 * scale), 1),
+        calculatedMetrics=max(int(20000 * scale), 1),
+        dimensions=500,
+        metrics=500,
+    )
+    filters = [data.filter(index) for index in range(data.counts["filters"])]
+    calculatedMetrics = [data.calculatedMetric(index) for index in range(data.counts["calculatedMetrics"])]
+    projects = [Project(deepProject(index)) for index in range(max(int(20000 * scale), 1))]
+    components = [data.dimensionId(index) for index in range(0, 500, 25)] + [
+        data.metricId(index) for index in range(0, 500, 25)
+    ]
+    cja = createCJA()
+
+    def run():
+        cja.findComponentsUsage(
+            components=components,
+            projectDetails=projects,
+            filters=filters,
+            calculatedMetrics=calculatedMetrics,
+        )
+
+    return run, len(filters) + len(calculatedMetrics) + len(projects)
+
+
+@benchmark("requestCreator")
+def benchRequestCreator(scale: float) -> tuple:
+    """
+    Breakdown requests as built by getMultidimensionalReport: a copy of the template per item combination,
+    with the breakdown filters of the two previous levels added to every metric.
+    """
+    iterations = max(int(10000 * scale), 1)
+    nbMetrics = 20
+    base = reportRequest(metrics=nbMetrics)
+
+    def run():
+        for index in range(iterations):
+            breakdown = RequestCreator(base)
+            for filterId in (f"variables/dimension0:::{index // 100}", f"variables/dimension1:::{index}"):
+                for metric in range(nbMetrics):
+                    breakdown.addMetricFilter(metricId=f"metrics/metric{metric}", filterId=filterId)
+            breakdown.to_dict()
+
+    return run, iterations
+
+
+@benchmark("list_dataframe")
+def benchListDataFrame(scale: float) -> tuple:
+    nbFilters = max(int(100000 * scale), 1)
+    server = CJAStubServer(SyntheticData(filters=nbFilters))
+    cja = createCJA(transport=StubTransport(server))
+    ## the responses are generated once, before the measure
+    cja.getFilters(full=True, output="raw", cache=False)
+    return (lambda: cja.getFilters(full=True, output="df", cache=False)), nbFilters
+
+
+def measure(func: callable, repeat: int = 3) -> dict:
+    """
+    Returns the best and mean times of the function over the repetitions.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"best_s": round(min(times), 4), "mean_s": round(sum(times) / len(times), 4)}
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """
+    Returns the list of the benchmarks slower than the baseline by more than the threshold.
+    """
+    regressions = []
+    for name, result in results["results"].items():
+        reference = baseline.get("results", {}).get(name)
+        if reference is None or reference.get("size") != result.get("size"):
+            print(f"{name}: no comparable baseline")
+            continue
+        ratio = result["best_s"] / reference["best_s"] if reference["best_s"] else 1
+        status = "REGRESSION" if ratio > 1 + threshold else "ok"
+        print(f"{name}: {reference['best_s']}s -> {result['best_s']}s ({ratio:.2f}x) {status}")
+        if status == "REGRESSION":
+            regressions.append(name)
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier of the fixtures sizes (default 1)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), default=None)
+    parser.add_argument("--save", default=None, help="write the results in that JSON file")
+    parser.add_argument("--compare", default=None, help="JSON baseline to compare the results with")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown tolerated before reporting a regression")
+    args = parser.parse_args()
+    results = {
+        "cjapy": cjapy.__version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "scale": args.scale,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": {},
+    }
+    failures = []
+    for name in args.only or BENCHMARKS:
+        ## a failing benchmark is reported, the others still run
+        try:
+            func, size = BENCHMARKS[name](args.scale)
+            result = measure(func, args.repeat)
+        except Exception as error:
+            failures.append(name)
+            print(json.dumps({"benchmark": name, "error": f"{type(error).__name__}: {error}"}))
+            continue
+        result["size"] = size
+        results["results"][name] = result
+        print(json.dumps({"benchmark": name, **result}))
+    if args.save:
+        folder = os.path.dirname(args.save)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+    if failures:
+        print(f"FAILED {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Import-time benchmark of cjapy, guarding the lazy loading of its heavy dependencies.
+Each scenario runs in fresh interpreters: the best time is kept and the modules loaded are checked.
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --max-seconds 0.05 --output import_time.json
+    python benchmarks/import_time.py --importtime 15
+
+Scenarios:
+    import cjapy : the package alone (configuration functions), must not load requests, jwt, pandas or numpy.
+    configure : import and generate a configuration object, same constraint.
+    CJA class : "from cjapy import CJA", loads requests but must not load jwt, pandas or numpy.
+The script exits with status 1 when a scenario loads a forbidden module, or when "import cjapy" is slower than --max-seconds.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+SCENARIOS = {
+    "import cjapy": (
+        "import cjapy",
+        ["requests", "jwt", "pandas", "numpy", "cjapy.connector"],
+    ),
+    "configure": (
+        "import cjapy\ncjapy.generateConfigObject(org_id='benchmark@AdobeOrg', client_id='benchmark', secret='secret', scopes='openid')",
+        ["requests", "jwt", "pandas", "numpy", "cjapy.connector"],
+    ),
+    "CJA class": (
+        "from cjapy import CJA",
+        ["jwt", "pandas", "numpy"],
+    ),
+}
+
+## code run in the fresh interpreter, printing the measure as JSON
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+exec({statement!r})
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "modules": len(sys.modules), "loaded": [name for name in {forbidden!r} if name in sys.modules]}}))
+"""
+
+
+def runScenario(statement: str, forbidden: list, repeat: int = 5) -> dict:
+    """
+    Run the statement in repeat new interpreters and returns the best time, the number of modules loaded
+    and the forbidden modules that were imported.
+    """
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(statement=statement, forbidden=forbidden)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        times.append(result["seconds"])
+    return {
+        "best_s": round(min(times), 4),
+        "mean_s": round(sum(times) / len(times), 4),
+        "modules": result["modules"],
+        "forbiddenLoaded": result["loaded"],
+    }
+
+
+def importTime(statement: str, top: int = 10) -> list:
+    """
+    Returns the top modules by cumulative import time (python -X importtime) for the statement.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = []
+    for line in output.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules.append((int(cumulative), name.strip()))
+    return [
+        {"module": name, "cumulative_ms": round(cumulative / 1000, 1)}
+        for cumulative, name in sorted(modules, reverse=True)[:top]
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per scenario (default 5)")
+    parser.add_argument("--only", nargs="*", choices=sorted(SCENARIOS), default=None)
+    parser.add_argument("--max-seconds", type=float, default=None, help="budget of the 'import cjapy' scenario")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="display the N slowest imports of each scenario")
+    parser.add_argument("--output", default=None, help="write the results in that JSON file")
+    args = parser.parse_args()
+    results = {}
+    failures = []
+    for name in args.only or SCENARIOS:
+        statement, forbidden = SCENARIOS[name]
+        result = runScenario(statement, forbidden, args.repeat)
+        if args.importtime:
+            result["slowest"] = importTime(statement, args.importtime)
+        results[name] = result
+        print(json.dumps({"scenario": name, **result}))
+        if result["forbiddenLoaded"]:
+            failures.append(f"{name}: loads {', '.join(result['forbiddenLoaded'])}")
+        if name == "import cjapy" and args.max_seconds is not None and result["best_s"] > args.max_seconds:
+            failures.append(f"{name}: {result['best_s']}s above the budget of {args.max_seconds}s")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"FAILED {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Decode / encode throughput of the JSON codecs on synthetic report pages.
+
+    python benchmarks/json_codec.py --rows 20000 --metrics 30
+"""
+import argparse
+import json
+import random
+import time
+
+from cjapy.connector import JSONCodec, OrjsonCodec, orjson
+
+
+def generateReportPage(rows: int = 20000, metrics: int = 30, seed: int = 42) -> dict:
+    """
+    Returns a synthetic getReport response page.
+    """
+    rng = random.Random(seed)
+    return {
+        "totalPages": 1,
+        "firstPage": True,
+        "lastPage": True,
+        "numberOfElements": rows,
+        "number": 0,
+        "totalElements": rows,
+        "columns": {
+            "dimension": {"id": "variables/page", "type": "string"},
+            "columnIds": [str(index) for index in range(metrics)],
+        },
+        "rows": [
+            {
+                "itemId": str(rng.randint(10**9, 10**10)),
+                "value": f"page name {index} - {rng.random():.6f}",
+                "data": [round(rng.random() * 10000, 3) for _ in range(metrics)],
+            }
+            for index in range(rows)
+        ],
+        "summaryData": {"totals": [rng.random() * 10**6 for _ in range(metrics)]},
+    }
+
+
+def measure(func, repeat: int = 5) -> float:
+    """
+    Returns the best time of the function over the repetitions.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--metrics", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    page = generateReportPage(args.rows, args.metrics)
+    content = json.dumps(page).encode("utf-8")
+    size = len(content) / 1024 / 1024
+    codecs = [JSONCodec()]
+    if orjson is not None:
+        codecs.append(OrjsonCodec())
+    else:
+        print("orjson not installed, only the json codec is measured")
+    for codec in codecs:
+        decode = measure(lambda: codec.loads(content), args.repeat)
+        encode = measure(lambda: codec.dumps(page), args.repeat)
+        print(
+            json.dumps(
+                {
+                    "codec": codec.name,
+                    "payload_mb": round(size, 2),
+                    "decode_s": round(decode, 4),
+                    "decode_mb_per_s": round(size / decode, 1),
+                    "encode_s": round(encode, 4),
+                    "encode_mb_per_s": round(size / encode, 1),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
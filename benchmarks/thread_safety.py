@@ -0,0 +1,186 @@
+"""
+Stress test of a single CJA instance shared between many threads, against the in-process stub server.
+
+    python benchmarks/thread_safety.py
+    python benchmarks/thread_safety.py --threads 64 --iterations 2000 --burst 20 2
+
+Phases:
+    cache fill : every thread calls findComponentsUsage on a new instance with empty caches.
+        The filters, calculated metrics and projects must be requested as many times as by a single call.
+        The request coalescing is disabled, so only the cache lock can prevent the duplicated requests.
+        A partial list (projected filters, calculated metrics without definitions) must not be reused as the cache.
+    mixed calls : the threads share an instance and call getFilters, getCalculatedMetrics, getDimensions, getMetrics
+        and getProject, while some iterations expire the token.
+        Every result must be complete and the token must not be requested more than once per expiration.
+The script exits with status 1 when a check fails or a call raises.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import cjapy
+from cja_stub_server import CJAStubServer, SyntheticData
+
+## endpoints (handlers of the stub server) of the elements cached by findComponentsUsage
+CACHED_ENDPOINTS = ["filters", "calculatedMetrics", "projects", "getProject"]
+
+
+def newInstance(server: CJAStubServer, **kwargs) -> cjapy.CJA:
+    with server.globalEndpoint():
+        cja = cjapy.CJA(config_object=server.configObject(), **kwargs)
+    cja.connector.restTime = 1
+    return cja
+
+
+def cacheFill(server: CJAStubServer, threads: int) -> list:
+    """
+    Compare the requests of a single findComponentsUsage with the ones of concurrent calls on an empty instance.
+    Returns the list of failures.
+    """
+    components = [server.data.dimensionId(0), server.data.metricId(0)]
+    cja = newInstance(server, coalesce=False)
+    server.resetStats()
+    expected = cja.findComponentsUsage(components)
+    single = server.getStats()["endpoints"]
+    cja = newInstance(server, coalesce=False)
+    server.resetStats()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        results = list(executor.map(lambda _: cja.findComponentsUsage(components), range(threads)))
+    concurrent = server.getStats()["endpoints"]
+    failures = []
+    for endpoint in CACHED_ENDPOINTS:
+        if concurrent.get(endpoint, 0) != single.get(endpoint, 0):
+            failures.append(
+                f"cache fill: {concurrent.get(endpoint, 0)} '{endpoint}' requests for {threads} threads, "
+                f"{single.get(endpoint, 0)} for a single call"
+            )
+    if any(result != expected for result in results):
+        failures.append("cache fill: the concurrent results differ from the single call")
+    cja = newInstance(server, coalesce=False)
+    cja.getFilters(fields=["id", "name"], output="raw")
+    cja.getCalculatedMetrics(output="raw")
+    try:
+        if cja.findComponentsUsage(components) != expected:
+            failures.append("cache fill: the result after partial lists differs from the single call")
+    except Exception as error:
+        failures.append(f"cache fill: partial lists break findComponentsUsage: {type(error).__name__}: {error}")
+    print(json.dumps({"phase": "cache fill", "threads": threads, "single": single, "concurrent": concurrent}))
+    return failures
+
+
+def mixedCalls(server: CJAStubServer, threads: int, iterations: int, expireEvery: int) -> list:
+    """
+    Run iterations mixed calls on a single instance from threads threads. Returns the list of failures.
+    """
+    data = server.data
+    cja = newInstance(server)
+    credential = cja.connector.credentials.credentials[0]
+    expirations = Counter()
+    lock = threading.Lock()
+
+    def expire() -> bool:
+        with lock:
+            expirations["token"] += 1
+        credential.config["date_limit"] = 0
+        return True
+
+    operations = [
+        ("getFilters", lambda i: len(cja.getFilters(full=True, output="raw", cache=True)) == data.counts["filters"]),
+        (
+            "getCalculatedMetrics",
+            lambda i: len(cja.getCalculatedMetrics(full=True, output="df", cache=True)) == data.counts["calculatedMetrics"],
+        ),
+        (
+            "getDimensions",
+            lambda i: len(cja.getDimensions(data.dataViewId(i % data.counts["dataViews"]), output="raw"))
+            == data.counts["dimensions"],
+        ),
+        (
+            "getMetrics",
+            lambda i: len(cja.getMetrics(data.dataViewId(i % data.counts["dataViews"]), output="raw"))
+            == data.counts["metrics"],
+        ),
+        (
+            "getProject",
+            lambda i: cja.getProject(data.projectId(i % data.counts["projects"]), cache=True)["id"]
+            == data.projectId(i % data.counts["projects"]),
+        ),
+    ]
+    errors = Counter()
+    wrong = Counter()
+
+    def task(iteration: int) -> None:
+        if expireEvery and iteration % expireEvery == expireEvery - 1:
+            expire()
+        name, operation = operations[iteration % len(operations)]
+        try:
+            if operation(iteration) == False:
+                with lock:
+                    wrong[name] += 1
+        except Exception as error:
+            with lock:
+                errors[f"{name}: {type(error).__name__}: {error}"] += 1
+
+    server.resetStats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(task, range(iterations)))
+    elapsed = time.perf_counter() - start
+    stats = server.getStats()
+    failures = [f"mixed calls: {count} x {error}" for error, count in errors.items()]
+    failures += [f"mixed calls: {count} incomplete {name} results" for name, count in wrong.items()]
+    if stats["tokens"] > expirations["token"]:
+        failures.append(
+            f"mixed calls: {stats['tokens']} token requests for {expirations['token']} expirations"
+        )
+    if len(cja.filters) != data.counts["filters"] or len(cja.calculatedMetrics) != data.counts["calculatedMetrics"]:
+        failures.append("mixed calls: the cached filters or calculated metrics are incomplete")
+    print(
+        json.dumps(
+            {
+                "phase": "mixed calls",
+                "threads": threads,
+                "iterations": iterations,
+                "wall_s": round(elapsed, 3),
+                "requests": stats["requests"],
+                "tokens": stats["tokens"],
+                "expirations": expirations["token"],
+                "throttled": stats["throttled"],
+                "coalesced": cja.connector.singleFlight.hits if cja.connector.singleFlight is not None else None,
+            }
+        )
+    )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--iterations", type=int, default=1000, help="calls of the mixed calls phase (default 1000)")
+    parser.add_argument("--expire-every", type=int, default=100, help="expire the token every N calls, 0 to disable")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds per request of the stub server")
+    parser.add_argument("--burst", nargs=2, type=int, default=None, metavar=("EVERY", "LENGTH"),
+                        help="429 bursts of the stub server during the mixed calls phase")
+    parser.add_argument("--filters", type=int, default=2500)
+    parser.add_argument("--projects", type=int, default=30)
+    args = parser.parse_args()
+    data = SyntheticData(filters=args.filters, calculatedMetrics=1200, projects=args.projects)
+    failures = []
+    with CJAStubServer(data, latency=args.latency, jitter=0) as server:
+        failures += cacheFill(server, args.threads)
+    with CJAStubServer(
+        data, latency=args.latency, jitter=0, throttleBursts=tuple(args.burst) if args.burst else None
+    ) as server:
+        failures += mixedCalls(server, args.threads, args.iterations, args.expire_every)
+    for failure in failures:
+        print(f"FAILED {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Minimal local HTTP server throttling the requests above a concurrency capacity.
+Used by the benchmarks to simulate the CJA API behavior under load without touching the production quotas.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ThrottlingServer:
+    """
+    Local server answering every GET / POST request with a small JSON body.
+    The latency grows with the number of requests in flight, and a 429 is returned above the capacity.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 8,
+        latency: float = 0.05,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        """
+        Arguments:
+            capacity : OPTIONAL : number of requests in flight accepted before returning 429 (default 8)
+            latency : OPTIONAL : latency in seconds of a request when the server is idle (default 0.05)
+            host : OPTIONAL : host to bind (default 127.0.0.1)
+            port : OPTIONAL : port to bind (default 0, a free port)
+        """
+        self.capacity = capacity
+        self.latency = latency
+        self.inFlight = 0
+        self.requests = 0
+        self.throttled = 0
+        self.__lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                server.handle(self)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                server.handle(self)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.__thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        with self.__lock:
+            self.requests += 1
+            self.inFlight += 1
+            load = self.inFlight
+        try:
+            if load > self.capacity:
+                with self.__lock:
+                    self.throttled += 1
+                status, body = 429, {"error_code": "429050", "message": "Too many requests"}
+            else:
+                time.sleep(self.latency * (1 + load / self.capacity))
+                status, body = 200, {"content": [{"id": "dv_1"}], "lastPage": True}
+        finally:
+            with self.__lock:
+                self.inFlight -= 1
+        payload = json.dumps(body).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        request.wfile.write(payload)
+
+    def start(self) -> "ThrottlingServer":
+        self.__thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "ThrottlingServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
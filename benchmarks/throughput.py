@@ -0,0 +1,295 @@
+"""
+End-to-end throughput benchmark of cjapy against the in-process stub server, with pagination, latency and throttling.
+Each workload is run in the serial, threaded and async modes and the results are displayed side by side.
+Each run is a new process connected to the stub server of this process, so the peak RSS is the one of that run only,
+and the requests of its setup (token, listing of the data views) are not counted.
+
+    python benchmarks/throughput.py --latency 0.02 --burst 20 2 --workers 8
+    python benchmarks/throughput.py --workloads projects report_export --output throughput.json
+
+Workloads:
+    metadata_sync : data views, then dimensions and metrics of each data view, filters and calculated metrics.
+    multidimensional_report : 3-level getMultidimensionalReport, one per data view.
+    projects : getProject with projectClass=True for each project (what getAllProjectDetails does).
+    report_export : a single getReport of reportRows rows (1M by default), paginated by 50000 rows.
+
+cjapy has no asynchronous API: the async mode awaits the blocking calls run in a pool of --workers threads
+(run_in_executor), it is the threaded mode driven by an event loop and measures the overhead of an asyncio caller.
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cjapy
+from cjapy import config
+from cja_stub_server import CJAStubServer, SyntheticData, stubConfigObject
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+MODES = ["serial", "threaded", "async"]
+WORKLOADS = {}
+
+
+def workload(name: str) -> callable:
+    """
+    Register a workload. The decorated function receives the CJA instance and the synthetic data,
+    and returns the list of tasks (functions without argument) to run.
+    """
+
+    def decorator(func: callable) -> callable:
+        WORKLOADS[name] = func
+        return func
+
+    return decorator
+
+
+class RSSSampler:
+    """
+    Sample the resident memory of the process in a background thread and keep the peak.
+    Uses psutil when installed, /proc/self/statm on Linux, and the peak of the process (ru_maxrss) otherwise.
+    """
+
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.peak = 0
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    @staticmethod
+    def rss() -> int:
+        if psutil is not None:
+            return psutil.Process().memory_info().rss
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def __sample(self) -> None:
+        while self.__stop.wait(self.interval) == False:
+            self.peak = max(self.peak, self.rss())
+
+    def __enter__(self) -> "RSSSampler":
+        self.peak = self.rss()
+        self.__thread = threading.Thread(target=self.__sample, daemon=True)
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.__stop.set()
+        self.__thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+@workload("metadata_sync")
+def metadataSync(cja: cjapy.CJA, data: SyntheticData) -> list:
+    dataViews = cja.getDataViews(output="raw")
+    tasks = [
+        lambda: cja.getFilters(full=True, output="raw", cache=False),
+        lambda: cja.getCalculatedMetrics(full=True, output="raw"),
+    ]
+    for dataView in dataViews:
+        tasks.append(lambda dv=dataView["id"]: cja.getDimensions(dv, full=True, output="raw"))
+        tasks.append(lambda dv=dataView["id"]: cja.getMetrics(dv, full=True, output="raw"))
+    return tasks
+
+
+@workload("multidimensional_report")
+def multidimensionalReport(cja: cjapy.CJA, data: SyntheticData) -> list:
+    dimensions = [data.dimensionId(index) for index in range(3)]
+    return [
+        lambda dv=data.dataViewId(index): cja.getMultidimensionalReport(
+            dimensions=dimensions,
+            dimensionLimit={dimension: 5 for dimension in dimensions},
+            metrics=[data.metricId(0), data.metricId(1)],
+            dataViewId=dv,
+            globalFilters=["2024-01-01T00:00:00.000/2024-02-01T00:00:00.000"],
+        )
+        for index in range(data.counts["dataViews"])
+    ]
+
+
+@workload("projects")
+def projects(cja: cjapy.CJA, data: SyntheticData) -> list:
+    return [
+        lambda projectId=data.projectId(index): cja.getProject(projectId, projectClass=True)
+        for index in range(data.counts["projects"])
+    ]
+
+
+@workload("report_export")
+def reportExport(cja: cjapy.CJA, data: SyntheticData) -> list:
+    request = cjapy.RequestCreator()
+    request.setDataViewId(data.dataViewId(0))
+    request.setDimension(data.dimensionId(0))
+    request.addGlobalFilter("2024-01-01T00:00:00.000/2024-02-01T00:00:00.000")
+    for index in range(5):
+        request.addMetric(data.metricId(index))
+    return [lambda: cja.getReport(request.to_dict(), limit=50000)]
+
+
+def runTasks(tasks: list, mode: str, workers: int) -> None:
+    if mode == "serial":
+        for task in tasks:
+            task()
+    elif mode == "threaded":
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(lambda task: task(), tasks))
+    elif mode == "async":
+
+        async def runAll() -> None:
+            loop = asyncio.get_event_loop()
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                await asyncio.gather(*(loop.run_in_executor(executor, task) for task in tasks))
+
+        asyncio.run(runAll())
+    else:
+        raise ValueError(f"Unknown mode {mode}")
+
+
+def runScenario(url: str, name: str, mode: str, workers: int, data: SyntheticData) -> None:
+    """
+    Run a workload in a mode with a new CJA instance, in the process started by run.
+    Once the setup is done, "ready" is printed and the workload starts when a line is read on the standard input.
+    The measures are printed as JSON.
+    """
+    previous = config.endpoints["global"]
+    config.endpoints["global"] = url
+    try:
+        cja = cjapy.CJA(config_object=stubConfigObject(url), metrics=True)
+    finally:
+        config.endpoints["global"] = previous
+    cja.connector.restTime = 1
+    tasks = WORKLOADS[name](cja, data)
+    ## the retries of the setup requests are not counted
+    cja.connector.metrics.reset()
+    print("ready", flush=True)
+    sys.stdin.readline()
+    with RSSSampler() as sampler:
+        start = time.perf_counter()
+        runTasks(tasks, mode, workers)
+        elapsed = time.perf_counter() - start
+    endpoints = cja.stats()["endpoints"]
+    result = {
+        "tasks": len(tasks),
+        "wall_s": round(elapsed, 3),
+        "peak_rss_mb": round(sampler.peak / 1024 / 1024, 1),
+        "retries": sum(stats.get("retries", 0) for stats in endpoints.values()),
+    }
+    print(json.dumps(result), flush=True)
+
+
+def run(server: CJAStubServer, name: str, mode: str, workers: int, dataArgs: list) -> dict:
+    """
+    Run a workload in a mode in a new process and returns its measures.
+    The statistics of the server are reset once the process has done its setup.
+    """
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--scenario", name, mode, "--url", server.url, "--workers", str(workers)]
+        + dataArgs,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    if process.stdout.readline().strip() != "ready":
+        process.kill()
+        raise RuntimeError(f"{name} ({mode}): the setup failed")
+    server.resetStats()
+    output, _ = process.communicate("go\n")
+    if process.returncode != 0:
+        raise RuntimeError(f"{name} ({mode}): exited with status {process.returncode}")
+    measures = json.loads(output.strip().splitlines()[-1])
+    serverStats = server.getStats()
+    elapsed = measures["wall_s"]
+    return {
+        "workload": name,
+        "mode": mode,
+        "tasks": measures["tasks"],
+        "wall_s": elapsed,
+        "requests": serverStats["requests"],
+        "requests_per_s": round(serverStats["requests"] / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": measures["peak_rss_mb"],
+        "retries": measures["retries"],
+        "throttled": serverStats["throttled"],
+        "errors504": serverStats["errors504"],
+        "maxInFlight": serverStats["maxInFlight"],
+    }
+
+
+def display(results: list) -> None:
+    columns = ["workload", "mode", "tasks", "wall_s", "requests", "requests_per_s", "peak_rss_mb", "retries", "throttled"]
+    widths = {column: max(len(column), *(len(str(result[column])) for result in results)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for result in results:
+        print("  ".join(str(result[column]).ljust(widths[column]) for column in columns))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="*", choices=sorted(WORKLOADS), default=list(WORKLOADS))
+    parser.add_argument("--modes", nargs="*", choices=MODES, default=MODES)
+    parser.add_argument("--workers", type=int, default=8, help="threads of the threaded and async modes")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--capacity", type=int, default=None, help="requests in flight before returning 429")
+    parser.add_argument("--burst", type=float, nargs=2, metavar=("PERIOD", "DURATION"), default=None)
+    parser.add_argument("--error504", type=float, default=0)
+    parser.add_argument("--dataviews", type=int, default=5)
+    parser.add_argument("--filters", type=int, default=10000)
+    parser.add_argument("--projects", type=int, default=500)
+    parser.add_argument("--report-rows", type=int, default=1000000)
+    parser.add_argument("--output", default=None, help="write the results in that JSON file")
+    ## used by run to start a single workload in a new process
+    parser.add_argument("--scenario", nargs=2, metavar=("WORKLOAD", "MODE"), default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--url", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    data = SyntheticData(
+        dataViews=args.dataviews,
+        filters=args.filters,
+        projects=args.projects,
+        reportRows=args.report_rows,
+    )
+    if args.scenario is not None:
+        runScenario(args.url, args.scenario[0], args.scenario[1], args.workers, data)
+        return
+    dataArgs = [
+        "--dataviews", str(args.dataviews),
+        "--filters", str(args.filters),
+        "--projects", str(args.projects),
+        "--report-rows", str(args.report_rows),
+    ]
+    results = []
+    with CJAStubServer(
+        data=data,
+        latency=args.latency,
+        jitter=args.jitter,
+        capacity=args.capacity,
+        throttleBursts=tuple(args.burst) if args.burst else None,
+        error504Rate=args.error504,
+    ) as server:
+        for name in args.workloads:
+            for mode in args.modes:
+                result = run(server, name, mode, args.workers, dataArgs)
+                results.append(result)
+                print(json.dumps(result), file=sys.stderr)
+    display(results)
+    if "async" in args.modes:
+        print("async: blocking calls awaited in a pool of --workers threads (cjapy has no asynchronous API)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,58 @@
+import importlib
+
 from .__version__ import __version__
 from .config import *
 from .configs import *
-from .cjapy import *
+
+## imported on first access (PEP 562), so "import cjapy" does not load requests or pandas
+_LAZY_ATTRIBUTES = {
+    "CJA": "cjapy",
+    "JsonOrDataFrameType": "cjapy",
+    "JsonListOrDataFrameType": "cjapy",
+    "ConnectionManager": "manager",
+    "Workspace": "workspace",
+    "RequestCreator": "requestCreator",
+    "Project": "projects",
+    "ComponentCatalog": "catalog",
+    "CircuitOpenError": "circuitbreaker",
+    "Profiler": "profiling",
+    "RequestPlan": "planner",
+}
+_SUBMODULES = (
+    "catalog",
+    "circuitbreaker",
+    "cjapy",
+    "connector",
+    "credentials",
+    "hedging",
+    "lazy",
+    "manager",
+    "metrics",
+    "planner",
+    "profiling",
+    "projects",
+    "ratelimit",
+    "requestCreator",
+    "token_provider",
+    "tracing",
+    "transport",
+    "workspace",
+)
+
+__all__ = [name for name in globals() if not name.startswith("_") and name != "importlib"] + list(
+    _LAZY_ATTRIBUTES
+)
+
+
+def __getattr__(name: str) -> object:
+    if name in _LAZY_ATTRIBUTES:
+        value = getattr(importlib.import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    if name in _SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES) | set(_SUBMODULES))
@@ -0,0 +1,350 @@
+import json
+import re
+import bisect
+import time
+import threading
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .tracing import propagate
+
+
+class ComponentCatalog:
+    """
+    A class that keeps the dimensions and metrics of several data views with inverted indexes.
+    Lookups (data views containing a component, search by name, components using a source field)
+    are answered locally instead of requesting getDimensions / getMetrics for every data view.
+    """
+
+    expansion = "sourceFieldId,schemaPath"
+
+    def __init__(self, cjaConnector: object = None) -> None:
+        """
+        Instantiate an empty catalog. Use the build method to fill it.
+        Arguments:
+            cjaConnector : OPTIONAL : instance of the CJA class used to retrieve the components.
+                Not required if the catalog is only loaded from a file.
+        """
+        self.cjaConnector = cjaConnector
+        self.dataViews = {}  ## {dataViewId: {"name": name, "refreshed": timestamp}}
+        self.components = {}  ## {componentId: {"id","type"}}
+        self.dataViewComponents = {}  ## {dataViewId: {componentId: name}}
+        self.dataViewSources = {}  ## {dataViewId: {componentId: {"sourceFieldId","schemaPath"}}}
+        self.componentIndex = defaultdict(set)  ## {componentId: {dataViewId}}
+        self.tokenIndex = defaultdict(set)  ## {token: {componentId}}
+        self.sourceFieldIndex = defaultdict(set)  ## {sourceFieldId: {(dataViewId, componentId)}}
+        self.__componentTokens = {}  ## {componentId: {token}} used to clean tokenIndex
+        self.__sortedTokens = None  ## sorted tokens of tokenIndex for prefix search, None when outdated
+        self.__lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return json.dumps(
+            {
+                "dataViews": len(self.dataViews),
+                "components": len(self.components),
+                "tokens": len(self.tokenIndex),
+            },
+            indent=4,
+        )
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    @staticmethod
+    def normalizeName(name: str = None) -> list:
+        """
+        Returns the normalized tokens of a name (lower case, no accent, alphanumeric words).
+        Arguments:
+            name : REQUIRED : the name to normalize.
+        """
+        if name is None:
+            return []
+        name = unicodedata.normalize("NFKD", str(name))
+        name = "".join(char for char in name if not unicodedata.combining(char))
+        return re.findall(r"[a-z0-9]+", name.lower())
+
+    def build(self, dataViewIds: list = None, max_workers: int = None) -> None:
+        """
+        Retrieve the components of the data views and index them.
+        Arguments:
+            dataViewIds : OPTIONAL : list of data view IDs to index. By default, all data views available.
+            max_workers : OPTIONAL : number of data views retrieved at the same time
+                (default 5, or the maxLimit of the concurrencyLimiter of the CJA instance when one is used)
+        """
+        if self.cjaConnector is None:
+            raise Exception("Require a CJA instance to build the catalog")
+        dataviews = self.cjaConnector.getDataViews(
+            full=False, output="raw", expansion="name"
+        )
+        names = {dv["id"]: dv.get("name", "") for dv in dataviews}
+        if dataViewIds is None:
+            dataViewIds = list(names.keys())
+        with ThreadPoolExecutor(max_workers=self.cjaConnector._maxWorkers(max_workers, default=5)) as executor:
+            list(
+                executor.map(
+                    propagate(
+                        lambda dataViewId: self.refresh(
+                            dataViewId, dataViewName=names.get(dataViewId)
+                        )
+                    ),
+                    dataViewIds,
+                )
+            )
+
+    def refresh(self, dataViewId: str = None, dataViewName: str = None) -> None:
+        """
+        Retrieve again the components of a single data view and update the indexes.
+        Arguments:
+            dataViewId : REQUIRED : the data view ID to refresh.
+            dataViewName : OPTIONAL : name of the data view, retrieved if not provided.
+        """
+        if dataViewId is None:
+            raise ValueError("Require a data view ID")
+        if self.cjaConnector is None:
+            raise Exception("Require a CJA instance to refresh the catalog")
+        if dataViewName is None:
+            dataViewName = self.cjaConnector.getDataView(dataViewId, full=False).get(
+                "name", ""
+            )
+        dimensions = self.cjaConnector.getDimensions(
+            dataViewId, output="raw", expansion=self.expansion
+        )
+        metrics = self.cjaConnector.getMetrics(
+            dataViewId, output="raw", expansion=self.expansion
+        )
+        components = [("dimension", comp) for comp in dimensions]
+        components += [("metric", comp) for comp in metrics]
+        self._indexDataView(dataViewId, dataViewName, components)
+
+    def _indexDataView(
+        self, dataViewId: str, dataViewName: str, components: list
+    ) -> None:
+        """
+        Replace the components of a data view in the indexes.
+        Arguments:
+            dataViewId : REQUIRED : the data view ID
+            dataViewName : REQUIRED : the data view name
+            components : REQUIRED : list of tuple (componentType, componentDefinition)
+        """
+        with self.__lock:
+            previous = set(self.dataViewComponents.get(dataViewId, {}).keys())
+            self._removeSources(dataViewId)
+            self.dataViews[dataViewId] = {"name": dataViewName, "refreshed": time.time()}
+            self.dataViewComponents[dataViewId] = {}
+            self.dataViewSources[dataViewId] = {}
+            for compType, comp in components:
+                compId = comp["id"]
+                self.dataViewComponents[dataViewId][compId] = comp.get("name", "")
+                self.componentIndex[compId].add(dataViewId)
+                self.components[compId] = {"id": compId, "type": compType}
+                ## the source field of a component can differ between data views
+                self.dataViewSources[dataViewId][compId] = {
+                    "sourceFieldId": comp.get("sourceFieldId"),
+                    "schemaPath": comp.get("schemaPath"),
+                }
+                if comp.get("sourceFieldId") is not None:
+                    self.sourceFieldIndex[comp["sourceFieldId"]].add((dataViewId, compId))
+            current = set(self.dataViewComponents[dataViewId].keys())
+            for compId in previous - current:
+                self.componentIndex[compId].discard(dataViewId)
+            for compId in previous | current:
+                self._indexComponentTokens(compId)
+
+    def _removeSources(self, dataViewId: str) -> None:
+        """
+        Remove the source fields of the components of a data view from sourceFieldIndex.
+        """
+        for compId, source in self.dataViewSources.pop(dataViewId, {}).items():
+            sourceField = source.get("sourceFieldId")
+            if sourceField is None:
+                continue
+            self.sourceFieldIndex[sourceField].discard((dataViewId, compId))
+            if len(self.sourceFieldIndex[sourceField]) == 0:
+                del self.sourceFieldIndex[sourceField]
+
+    def _indexComponentTokens(self, compId: str) -> None:
+        """
+        Recompute the name tokens of a component from the names it has in the different data views.
+        Remove the component from the catalog if no data view contains it anymore.
+        """
+        self.__sortedTokens = None
+        for token in self.__componentTokens.pop(compId, set()):
+            self.tokenIndex[token].discard(compId)
+            if len(self.tokenIndex[token]) == 0:
+                del self.tokenIndex[token]
+        if len(self.componentIndex.get(compId, set())) == 0:
+            self.componentIndex.pop(compId, None)
+            self.components.pop(compId, None)
+            return
+        tokens = set()
+        for dataViewId in self.componentIndex[compId]:
+            tokens.update(
+                self.normalizeName(self.dataViewComponents[dataViewId].get(compId))
+            )
+        tokens.update(self.normalizeName(compId))
+        for token in tokens:
+            self.tokenIndex[token].add(compId)
+        self.__componentTokens[compId] = tokens
+
+    def removeDataView(self, dataViewId: str = None) -> None:
+        """
+        Remove a data view and its components from the catalog.
+        Arguments:
+            dataViewId : REQUIRED : the data view ID to remove.
+        """
+        if dataViewId is None:
+            raise ValueError("Require a data view ID")
+        with self.__lock:
+            components = self.dataViewComponents.pop(dataViewId, {})
+            self._removeSources(dataViewId)
+            self.dataViews.pop(dataViewId, None)
+            for compId in components:
+                self.componentIndex[compId].discard(dataViewId)
+                self._indexComponentTokens(compId)
+
+    def getComponent(self, componentId: str = None, dataViewIds: list = None) -> dict:
+        """
+        Returns the information of a component with the data views containing it:
+        its name ("dataViews") and its source field ("sourceFields") in each data view.
+        Arguments:
+            componentId : REQUIRED : the component ID (ex: "variables/page")
+            dataViewIds : OPTIONAL : restrict the data views returned to this list.
+        """
+        if componentId is None:
+            raise ValueError("Require a component ID")
+        with self.__lock:
+            return self._componentInfo(componentId, dataViewIds)
+
+    def _componentInfo(self, componentId: str, dataViewIds: list = None) -> dict:
+        """
+        Returns the information of a component, as getComponent. Called while the lock is held.
+        """
+        if componentId not in self.components:
+            return {}
+        comp = dict(self.components[componentId])
+        dataViews = self.componentIndex.get(componentId, set())
+        dataViewIds = sorted(
+            dataViews if dataViewIds is None else dataViews & set(dataViewIds)
+        )
+        comp["dataViews"] = {
+            dataViewId: self.dataViewComponents[dataViewId].get(componentId)
+            for dataViewId in dataViewIds
+        }
+        comp["sourceFields"] = {
+            dataViewId: self.dataViewSources.get(dataViewId, {}).get(componentId, {})
+            for dataViewId in dataViewIds
+        }
+        return comp
+
+    def getDataViews(self, componentId: str = None) -> list:
+        """
+        Returns the list of data view IDs containing the component.
+        Arguments:
+            componentId : REQUIRED : the component ID (ex: "variables/page")
+        """
+        if componentId is None:
+            raise ValueError("Require a component ID")
+        with self.__lock:
+            return sorted(self.componentIndex.get(componentId, set()))
+
+    def searchComponents(self, name: str = None, exact: bool = False) -> list:
+        """
+        Returns the components matching the name across all data views.
+        Every normalized word of the name has to be found in the component name or ID.
+        Arguments:
+            name : REQUIRED : the name or part of the name to look for.
+            exact : OPTIONAL : If set to True, the words have to match entirely (default False, the words are matched as prefix)
+        """
+        if name is None:
+            raise ValueError("Require a name to search")
+        queryTokens = self.normalizeName(name)
+        if len(queryTokens) == 0:
+            return []
+        ## the indexes are read under the lock, a concurrent build or refresh modifies them
+        with self.__lock:
+            if exact == False and self.__sortedTokens is None:
+                self.__sortedTokens = sorted(self.tokenIndex)
+            sortedTokens = self.__sortedTokens
+            matches = None
+            for queryToken in queryTokens:
+                if exact:
+                    found = set(self.tokenIndex.get(queryToken, set()))
+                else:
+                    found = set()
+                    position = bisect.bisect_left(sortedTokens, queryToken)
+                    while position < len(sortedTokens) and sortedTokens[position].startswith(queryToken):
+                        found.update(self.tokenIndex.get(sortedTokens[position], set()))
+                        position += 1
+                matches = found if matches is None else matches & found
+                if len(matches) == 0:
+                    return []
+            return [self._componentInfo(compId) for compId in sorted(matches)]
+
+    def getComponentsBySourceField(self, sourceFieldId: str = None) -> list:
+        """
+        Returns the components built on a source field (schema path), with the data views containing them.
+        Arguments:
+            sourceFieldId : REQUIRED : the source field ID.
+        """
+        if sourceFieldId is None:
+            raise ValueError("Require a source field ID")
+        dataViewsByComponent = defaultdict(set)
+        with self.__lock:
+            for dataViewId, compId in self.sourceFieldIndex.get(sourceFieldId, set()):
+                dataViewsByComponent[compId].add(dataViewId)
+            return [
+                self._componentInfo(compId, dataViewIds=dataViewsByComponent[compId])
+                for compId in sorted(dataViewsByComponent)
+            ]
+
+    def to_dict(self) -> dict:
+        """
+        Returns the catalog as a dictionary. Indexes are rebuilt when the catalog is loaded.
+        """
+        return {
+            "dataViews": self.dataViews,
+            "components": self.components,
+            "dataViewComponents": self.dataViewComponents,
+            "dataViewSources": self.dataViewSources,
+        }
+
+    def save(self, filename: str = "cjapy_catalog.json") -> str:
+        """
+        Save the catalog in a JSON file.
+        Arguments:
+            filename : OPTIONAL : name of the file (default "cjapy_catalog.json")
+        """
+        with self.__lock:
+            with open(filename, "w") as f:
+                f.write(json.dumps(self.to_dict()))
+        return filename
+
+    @classmethod
+    def load(cls, filename: str = "cjapy_catalog.json", cjaConnector: object = None) -> object:
+        """
+        Load a catalog saved with the save method.
+        Arguments:
+            filename : OPTIONAL : name of the file (default "cjapy_catalog.json")
+            cjaConnector : OPTIONAL : instance of the CJA class, required to refresh the data views.
+        """
+        if Path(filename).exists() == False:
+            raise FileNotFoundError(f"Unable to find the catalog under path `{filename}`.")
+        with open(filename, "r") as f:
+            data = json.load(f)
+        catalog = cls(cjaConnector)
+        components = data.get("components", {})
+        sources = data.get("dataViewSources", {})
+        for dataViewId, dataViewComponents in data.get("dataViewComponents", {}).items():
+            definitions = []
+            for compId, compName in dataViewComponents.items():
+                comp = dict(components.get(compId, {"id": compId}))
+                ## files saved before the source fields were kept per data view have them in components
+                comp.update(sources.get(dataViewId, {}).get(compId, {}))
+                comp["name"] = compName
+                definitions.append((comp.get("type"), comp))
+            dataViewInfo = data.get("dataViews", {}).get(dataViewId, {})
+            catalog._indexDataView(dataViewId, dataViewInfo.get("name", ""), definitions)
+            catalog.dataViews[dataViewId] = dataViewInfo
+        return catalog
@@ -0,0 +1,151 @@
+import time
+import threading
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a request is sent to an endpoint family whose circuit is open.
+    """
+
+    def __init__(self, family: str = None, retryIn: float = 0) -> None:
+        self.family = family
+        self.retryIn = retryIn
+        super().__init__(
+            f"Circuit open for the `{family}` endpoints, retry in {round(retryIn, 1)} seconds"
+        )
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker of a single endpoint family.
+    closed : requests are sent, the outcomes are recorded.
+    open : requests fail fast with CircuitOpenError, after too many failures in the window.
+    half-open : after openTime seconds, a few probe requests are sent. A success closes the circuit, a failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        family: str = None,
+        failureRate: float = 0.5,
+        minRequests: int = 10,
+        window: float = 60,
+        openTime: float = 30,
+        halfOpenRequests: int = 1,
+    ) -> None:
+        """
+        Arguments:
+            family : OPTIONAL : name of the endpoint family.
+            failureRate : OPTIONAL : share of failed requests in the window that opens the circuit (default 0.5)
+            minRequests : OPTIONAL : minimum number of requests in the window before opening the circuit (default 10)
+            window : OPTIONAL : number of seconds of outcomes considered (default 60)
+            openTime : OPTIONAL : number of seconds the circuit stays open before probing (default 30)
+            halfOpenRequests : OPTIONAL : number of probe requests allowed in half-open state (default 1)
+        """
+        self.family = family
+        self.failureRate = failureRate
+        self.minRequests = minRequests
+        self.window = window
+        self.openTime = openTime
+        self.halfOpenRequests = halfOpenRequests
+        self.state = self.CLOSED
+        self.openedAt = None
+        self.opened = 0
+        self.rejected = 0
+        self.__outcomes = deque()  ## (timestamp, success)
+        self.__probes = 0
+        self.__lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"CircuitBreaker(family={self.family}, state={self.state})"
+
+    def __purge(self, now: float) -> None:
+        while len(self.__outcomes) > 0 and self.__outcomes[0][0] < now - self.window:
+            self.__outcomes.popleft()
+
+    def __open(self, now: float) -> None:
+        self.state = self.OPEN
+        self.openedAt = now
+        self.opened += 1
+        self.__probes = 0
+
+    def before(self) -> bool:
+        """
+        Check that a request can be sent, raise a CircuitOpenError otherwise.
+        Returns True when the request takes a probe slot of the half-open state,
+        it has to be given back with release if the request is not sent.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            if self.state == self.OPEN:
+                retryIn = self.openedAt + self.openTime - now
+                if retryIn > 0:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.family, retryIn)
+                self.state = self.HALF_OPEN
+                self.__probes = 0
+            if self.state == self.HALF_OPEN:
+                if self.__probes >= self.halfOpenRequests:
+                    self.rejected += 1
+                    raise CircuitOpenError(self.family, 0)
+                self.__probes += 1
+                return True
+            return False
+
+    def release(self) -> None:
+        """
+        Give back the probe slot taken by before() for a request that was not sent (ex: the token retrieval failed),
+        so the circuit does not stay half-open without probe.
+        """
+        with self.__lock:
+            if self.state == self.HALF_OPEN and self.__probes > 0:
+                self.__probes -= 1
+
+    def record(self, success: bool = True) -> None:
+        """
+        Record the outcome of a request.
+        Arguments:
+            success : REQUIRED : False if the request failed (5xx or no response).
+        """
+        with self.__lock:
+            now = time.monotonic()
+            if self.state == self.HALF_OPEN:
+                if success:
+                    self.state = self.CLOSED
+                    self.__outcomes.clear()
+                else:
+                    self.__open(now)
+                return
+            if self.state == self.OPEN:
+                return
+            self.__outcomes.append((now, success))
+            self.__purge(now)
+            failures = sum(1 for _, ok in self.__outcomes if ok == False)
+            if (
+                len(self.__outcomes) >= self.minRequests
+                and failures / len(self.__outcomes) >= self.failureRate
+            ):
+                self.__open(now)
+
+    def getState(self) -> dict:
+        """
+        Returns the state of the circuit and the counters of the window.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__purge(now)
+            failures = sum(1 for _, ok in self.__outcomes if ok == False)
+            return {
+                "state": self.state,
+                "requests": len(self.__outcomes),
+                "failures": failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "retryIn": max(0, self.openedAt + self.openTime - now)
+                if self.state == self.OPEN
+                else 0,
+            }
@@ -4,27 +4,36 @@ import json
 from copy import deepcopy
 from pathlib import Path
 from typing import IO, Union, List
-from collections import defaultdict, deque
-import time, logging, re
+from collections import defaultdict
+import time, logging, re, threading, uuid
 from itertools import tee
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 import string
 
-# Non standard libraries
-import pandas as pd
+# Non standard libraries, pandas and numpy are imported when a DataFrame is built
 from cjapy import config, connector
+from .lazy import LazyModule, isDataFrame
 from .workspace import Workspace
 from .requestCreator import RequestCreator
 from .projects import Project
+from .tracing import traced, propagate
+from .profiling import Profiler, profiledPhase
+from .planner import RequestPlan, pagesPerCall
 
-JsonOrDataFrameType = Union[pd.DataFrame, dict]
-JsonListOrDataFrameType = Union[pd.DataFrame, List[dict]]
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+JsonOrDataFrameType = Union["pd.DataFrame", dict]
+JsonListOrDataFrameType = Union["pd.DataFrame", List[dict]]
 
 
 class CJA:
     """
     Class that instantiate a connection to a single CJA API connection.
     You can pass a logging object to log information.
+    An instance can be shared between threads: the token refresh is done once for all threads
+    and the cached elements (filters, calculatedMetrics, listProjectIds, projectsDetails) are checked and filled under a lock.
     """
 
     loggingEnabled = False
@@ -35,6 +44,7 @@ class CJA:
         config_object: dict = config.config_object,
         header: dict = config.header,
         loggingObject: dict = None,
+        **kwargs,
     ) -> None:
         """
         Instantiate the class with the information provided.
@@ -42,6 +52,23 @@ class CJA:
             loggingObject : OPTIONAL :If you want to set logging capability for your actions.
             header : REQUIRED : config header loaded (DO NOT MODIFY)
             config_object : REQUIRED : config object loaded (DO NOT MODIFY)
+        Possible kwargs (passed to the connector):
+            tokenCache : If set to True, the token is stored in and reused from a file shared between processes.
+                You can also pass the path of the cache file.
+            backgroundRefresh : If set to True, a background thread renews the token before it expires.
+            refreshMargin : number of seconds before the token date limit when the background refresh happens (default 300)
+            credentials : list of additional configuration objects used as a credential pool.
+            session : requests.Session to use, so the HTTP connections can be shared.
+            semaphore : semaphore limiting the number of requests in flight.
+            rateLimiter : RateLimiter instance (cjapy.ratelimit) applied before every request.
+            coalesce : If set to False, concurrent identical GET requests are not shared (default True)
+            hedging : HedgingPolicy instance (cjapy.hedging), or True, to send a duplicate of slow GET requests.
+            concurrencyLimiter : AdaptiveConcurrencyLimiter instance (cjapy.ratelimit) adapting the number of requests in flight.
+            circuitBreaker : If set to True (or a dictionary of settings), a circuit breaker is used per endpoint family.
+            codec : codec of the JSON bodies, "orjson" or "json" (default orjson when installed)
+            compressRequests : If set to True (or a minimum size in bytes), the large request bodies are sent gzip encoded.
+            metrics : If set to True, the requests are recorded per method and endpoint (see the stats method).
+            tracing : If set to True (or a Tracer instance), the requests and the high-level methods are recorded as spans (see the exportTrace method).
         """
         if loggingObject is not None and sorted(
             ["level", "stream", "format", "filename", "file"]
@@ -63,14 +90,75 @@ class CJA:
             header=header,
             loggingEnabled=self.loggingEnabled,
             logger=self.logger,
+            **kwargs,
         )
-        self.header = self.connector.header
         self.endpoint = config.endpoints["global"]
+        self._cacheLock = threading.RLock()
         self.listProjectIds = []
         self.projectsDetails = {}
         self.filters = []
         self.calculatedMetrics: JsonListOrDataFrameType = []
 
+    @property
+    def header(self) -> dict:
+        """
+        Returns the header currently used by the connector.
+        """
+        return self.connector.header
+
+    def stats(self, format: str = "dict") -> Union[dict, str]:
+        """
+        Returns the statistics of the requests sent by this instance.
+        The requests per endpoint (count, latency percentiles, bytes, retries, 429, waiting time) require metrics=True when creating the instance.
+        Arguments:
+            format : OPTIONAL : "dict" (default) or "prometheus" for the Prometheus text exposition format.
+        """
+        if format == "prometheus":
+            if self.connector.metrics is None:
+                return ""
+            return self.connector.metrics.to_prometheus()
+        return self.connector.getStats()
+
+    def exportTrace(self, filename: str = "cjapy_trace.json", format: str = "chrome") -> str:
+        """
+        Write the spans recorded by this instance in a JSON file and returns the filename.
+        Requires tracing=True when creating the instance.
+        The "chrome" format can be opened in chrome://tracing or https://ui.perfetto.dev.
+        Arguments:
+            filename : OPTIONAL : name of the file (default "cjapy_trace.json")
+            format : OPTIONAL : "chrome" (default) for the trace-event format or "otlp" for the OpenTelemetry JSON format.
+        """
+        if self.connector.tracer is None:
+            raise Exception("The tracing is not enabled, use tracing=True when creating the instance")
+        return self.connector.tracer.export(filename, format=format)
+
+    def profile(
+        self,
+        cprofile: bool = False,
+        memory: bool = False,
+        verbose: bool = True,
+        sortBy: str = "cumulative",
+        top: int = 25,
+    ) -> Profiler:
+        """
+        Returns a context manager profiling the methods called inside on this instance.
+        The wall time is split in phases: auth, network, throttling, decode, name resolution and post-processing.
+        The breakdown is printed at the end (verbose) and returned by the to_dict method of the profiler.
+        Example:
+            with cja.profile(memory=True) as prof:
+                cja.getReport(request)
+            prof.to_dict()
+        Arguments:
+            cprofile : OPTIONAL : If set to True, the code is also profiled with cProfile and the statistics are added.
+            memory : OPTIONAL : If set to True, the peak allocation of each phase is measured with tracemalloc (slower).
+            verbose : OPTIONAL : If set to True (default), print the breakdown at the end.
+            sortBy : OPTIONAL : sort key of the cProfile statistics (default "cumulative")
+            top : OPTIONAL : number of functions kept in the cProfile statistics (default 25)
+        """
+        return Profiler(
+            self.connector, cprofile=cprofile, memory=memory, verbose=verbose, sortBy=sortBy, top=top
+        )
+
     def getCurrentUser(self, admin: bool = False, useCache: bool = True, **kwargs) -> dict:
         """
         return the current user
@@ -103,6 +191,7 @@ class CJA:
             last_page = res.get('lastPage',True)          
         return data
 
+    @traced()
     def getCalculatedMetrics(
         self,
         full: bool = False,
@@ -136,6 +225,7 @@ class CJA:
             favorite : OPTIONAL : If set to true, return only favorties calculated metrics. (default False)
             approved : OPTIONAL : If set to true, returns only approved calculated metrics. (default False)
             cache : OPTIONAL : cache the result in a local variable.
+                Only the complete list of full calculated metrics (full=True, no other filter) is cached.
             output : OPTIONAL : by default returns a "dataframe", can also return the list when set to "raw"
         """
         if self.loggingEnabled:
@@ -169,13 +259,17 @@ class CJA:
             res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
             data += res["content"]
             lastPage = res.get("lastPage", True)
+        ## only the complete list with the definitions can be reused by findComponentsUsage
+        cache = cache and full and not any((dataIds, ownerId, filterByIds, favorite, approved))
         if output == "df":
             df = pd.DataFrame(data)
             if cache:
-                self.calculatedMetrics = df
+                with self._cacheLock:
+                    self.calculatedMetrics = df
             return df
         if cache:
-            self.calculatedMetrics = data
+            with self._cacheLock:
+                self.calculatedMetrics = data
         return res
 
     def getCalculatedMetricsFunctions(
@@ -195,6 +289,7 @@ class CJA:
             return df
         return res
 
+    @profiledPhase("name resolution")
     def getCalculatedMetric(self, calcId: str = None, full: bool = True, **kwargs) -> dict:
         """
         Return a single calculated metrics based on its ID.
@@ -422,6 +517,7 @@ class CJA:
         res = self.connector.putData(self.endpoint + path, params=params, data=data)
         return res
 
+    @traced()
     def getDateRanges(
         self,
         limit: int = 1000,
@@ -677,6 +773,31 @@ class CJA:
         res = self.connector.putData(self.endpoint + path, data=data)
         return res
 
+    def _fieldsToExpansion(self, fields: Union[list, str] = None, expansion: str = None) -> str:
+        """
+        Returns the smallest expansion parameter required to get the fields requested.
+        Fields that are not part of the possible expansion values are returned by default by the API.
+        Arguments:
+            fields : REQUIRED : list (or comma-delimited string) of the fields requested.
+            expansion : REQUIRED : comma-delimited string of the possible expansion values for that endpoint.
+        """
+        if type(fields) == str:
+            fields = fields.split(",")
+        possibleExpansions = set(expansion.split(","))
+        return ",".join(field for field in fields if field in possibleExpansions)
+
+    def _projectFields(self, data: list = None, fields: Union[list, str] = None) -> list:
+        """
+        Only keep the fields requested in the list of elements returned by the API.
+        Arguments:
+            data : REQUIRED : list of dictionaries returned by the API.
+            fields : REQUIRED : list (or comma-delimited string) of the fields to keep.
+        """
+        if type(fields) == str:
+            fields = fields.split(",")
+        return [{field: element.get(field) for field in fields} for element in data]
+
+    @traced()
     def getTopItems(
         self,
         dataId: str = None,
@@ -752,6 +873,7 @@ class CJA:
         res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
         return res
 
+    @traced()
     def getDimensions(
         self,
         dataviewId: str = None,
@@ -759,6 +881,7 @@ class CJA:
         inclType: str = None,
         verbose: bool = False,
         output: str = "df",
+        fields: Union[list, str] = None,
         **kwargs
     ) -> dict:
         """
@@ -768,6 +891,7 @@ class CJA:
             full : OPTIONAL : To add additional elements (default False)
             inclType : OPTIONAL : Possibility to add "hidden" values
             output : OPTIONAL : Type of output selected, either "df" (default) or "raw"
+            fields : OPTIONAL : list of the fields to return (ex: ["id","name"]). Only the expansion required for these fields is requested. Overrides full.
         """
         if dataviewId is None:
             raise ValueError("Require a Data View ID")
@@ -775,10 +899,13 @@ class CJA:
             self.logger.debug(f"getDimensions start")
         path = f"/data/dataviews/{dataviewId}/dimensions"
         params = {"page":0}
-        if full:
-            params[
-                "expansion"
-            ] = "approved,favorite,tags,usageSummary,usageSummaryWithRelevancyScore,description,sourceFieldId,segmentable,required,hideFromReporting,hidden,includeExcludeSetting,fieldDefinition,bucketingSetting,noValueOptionsSetting,defaultDimensionSort,persistenceSetting,storageId,tableName,dataSetIds,dataSetType,type,schemaPath,hasData,sourceFieldName,schemaType,sourceFieldType,fromGlobalLookup,multiValued,precision"
+        fullExpansion = "approved,favorite,tags,usageSummary,usageSummaryWithRelevancyScore,description,sourceFieldId,segmentable,required,hideFromReporting,hidden,includeExcludeSetting,fieldDefinition,bucketingSetting,noValueOptionsSetting,defaultDimensionSort,persistenceSetting,storageId,tableName,dataSetIds,dataSetType,type,schemaPath,hasData,sourceFieldName,schemaType,sourceFieldType,fromGlobalLookup,multiValued,precision"
+        if fields is not None:
+            expansion = self._fieldsToExpansion(fields, fullExpansion)
+            if expansion:
+                params["expansion"] = expansion
+        elif full:
+            params["expansion"] = fullExpansion
         if inclType == "hidden":
             params["includeType"] = "hidden"
         res = self.connector.getData(
@@ -793,14 +920,24 @@ class CJA:
             )
             dimensions += res.get('content',[])
             lastPage = res.get('lastPage',True)
+        if fields is not None:
+            dimensions = self._projectFields(dimensions, fields)
         if output == "df":
             df = pd.DataFrame(dimensions)
             return df
         return dimensions
 
-    def getSharedComponentsMatrix(self, include_dimensions=True, include_metrics=True):
+    @traced()
+    def getSharedComponentsMatrix(
+        self,
+        include_dimensions: bool = True,
+        include_metrics: bool = True,
+        max_workers: int = None,
+        sparse: bool = False,
+    ) -> "pd.DataFrame":
         """
         Build a matrix of shared components (dimensions and/or metrics) across dataviews.
+        The components of the different dataviews are retrieved concurrently, with only the sharedComponent, id and name information.
 
         Parameters
         ----------
@@ -808,6 +945,10 @@ class CJA:
             Whether to include shared dimensions (default: True).
         include_metrics : bool, optional
             Whether to include shared metrics (default: True).
+        max_workers : int, optional
+            Number of dataviews fetched at the same time (default: 5, or the maxLimit of the concurrencyLimiter when one is used).
+        sparse : bool, optional
+            Whether the dataview columns use a pandas sparse dtype, built without dense intermediate (requires scipy, default: False).
 
         Returns
         -------
@@ -828,29 +969,61 @@ class CJA:
         print(
             f"Shared components matrix generation started..."
         )
-        dataviews = self.getDataViews()
-        dv_map = dict(zip(dataviews["id"], dataviews["name"]))
+        dataviews = self.getDataViews(full=False, output="raw", expansion="name")
+        dv_map = {dv["id"]: dv.get("name", dv["id"]) for dv in dataviews}
+        max_workers = self._maxWorkers(max_workers, default=5)
 
         def build_shared_matrix(fetch_fn, comp_type):
             results = {}
             id_to_name = {}
 
-            for dv_id, dv_name in dv_map.items():
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        propagate(fetch_fn), dv_id, inclType=True, output="raw", expansion="sharedComponent"
+                    ): dv_id
+                    for dv_id in dv_map
+                }
+                for future in futures:
+                    dv_id = futures[future]
+                    dv_name = dv_map[dv_id]
+                    try:
+                        comps = future.result()
+                    except Exception as e:
+                        print(f"Error fetching {comp_type} for {dv_id} ({dv_name}): {e}")
+                        continue
+                    shared = [comp for comp in comps if comp.get("sharedComponent") == True]
+                    results[dv_name] = [comp["id"] for comp in shared]
+                    id_to_name.update({comp["id"]: comp.get("name") for comp in shared})
+
+            ## COO representation: one (row, column) coordinate per shared component
+            all_ids = sorted(id_to_name)
+            row_position = {comp_id: position for position, comp_id in enumerate(all_ids)}
+            dv_names = list(results)
+            rows = np.array(
+                [row_position[comp_id] for dv_name in dv_names for comp_id in results[dv_name]],
+                dtype=int,
+            )
+            cols = np.array(
+                [column for column, dv_name in enumerate(dv_names) for _ in results[dv_name]],
+                dtype=int,
+            )
+            if sparse:
                 try:
-                    comps = fetch_fn(dv_id, inclType=True, full=True)
-                    shared = comps[comps["sharedComponent"] == True][["id", "name"]]
-                    results[dv_name] = set(shared["id"].tolist())
-                    id_to_name.update(dict(zip(shared["id"], shared["name"])))
-                except Exception as e:
-                    print(f"Error fetching {comp_type} for {dv_id} ({dv_name}): {e}")
-
-            all_ids = sorted(set().union(*results.values()))
-            df = pd.DataFrame(index=all_ids)
-
-            for dv_name, comp_ids in results.items():
-                df[dv_name] = df.index.isin(comp_ids).astype(int)
+                    from scipy.sparse import coo_matrix
+                except ImportError:
+                    raise ImportError("sparse=True requires scipy (pip install cjapy[sparse])")
+                matrix = coo_matrix(
+                    (np.ones(len(rows), dtype=int), (rows, cols)),
+                    shape=(len(all_ids), len(dv_names)),
+                )
+                df = pd.DataFrame.sparse.from_spmatrix(matrix, index=all_ids, columns=dv_names)
+            else:
+                matrix = np.zeros((len(all_ids), len(dv_names)), dtype=int)
+                matrix[rows, cols] = 1
+                df = pd.DataFrame(matrix, index=all_ids, columns=dv_names)
 
-            df.insert(0, "name", df.index.map(id_to_name))
+            df.insert(0, "name", [id_to_name[comp_id] for comp_id in all_ids])
             df.insert(0, "type", comp_type)
             return df
 
@@ -899,13 +1072,15 @@ class CJA:
         res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
         return res
 
+    @traced()
     def getMetrics(
         self,
         dataviewId: str = None,
         full: bool = False,
         inclType: str = None,
         verbose: bool = False,
-                output: str = "df",
+        output: str = "df",
+        fields: Union[list, str] = None,
         **kwargs
     ) -> dict:
         """
@@ -915,6 +1090,7 @@ class CJA:
             full : OPTIONAL : To add additional elements (default False)
             inclType : OPTIONAL : Possibility to add "hidden" values
             output : OPTIONAL : Type of output selected, either "df" (default) or "raw"
+            fields : OPTIONAL : list of the fields to return (ex: ["id","name"]). Only the expansion required for these fields is requested. Overrides full.
         """
         if dataviewId is None:
             raise ValueError("Require a Data View ID")
@@ -922,10 +1098,13 @@ class CJA:
             self.logger.debug(f"getMetrics start")
         path = f"/data/dataviews/{dataviewId}/metrics"
         params = {"page":0}
-        if full:
-            params[
-                "expansion"
-            ] = "approved,favorite,tags,usageSummary,usageSummaryWithRelevancyScore,description,sourceFieldId,segmentable,required,hideFromReporting,hidden,includeExcludeSetting,fieldDefinition,storageId,tableName,dataSetIds,dataSetType,type,schemaPath,hasData,sourceFieldName,schemaType,sourceFieldType,fromGlobalLookup,multiValued,precision"
+        fullExpansion = "approved,favorite,tags,usageSummary,usageSummaryWithRelevancyScore,description,sourceFieldId,segmentable,required,hideFromReporting,hidden,includeExcludeSetting,fieldDefinition,storageId,tableName,dataSetIds,dataSetType,type,schemaPath,hasData,sourceFieldName,schemaType,sourceFieldType,fromGlobalLookup,multiValued,precision"
+        if fields is not None:
+            expansion = self._fieldsToExpansion(fields, fullExpansion)
+            if expansion:
+                params["expansion"] = expansion
+        elif full:
+            params["expansion"] = fullExpansion
         if inclType == "hidden":
             params["includeType"] = "hidden"
         res = self.connector.getData(
@@ -940,10 +1119,12 @@ class CJA:
             )
             metrics += res.get('content',[])
             lastPage = res.get('lastPage',True)
+        if fields is not None:
+            metrics = self._projectFields(metrics, fields)
         if output =='df':
             df = pd.DataFrame(metrics)
             return df
-        return res
+        return metrics
 
     def getMetric(
         self, dataviewId: str = None, metricId: str = None, full: bool = True, **kwargs
@@ -970,6 +1151,7 @@ class CJA:
         res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
         return res
 
+    @traced()
     def getDataViews(
         self,
         limit: int = 100,
@@ -1230,6 +1412,7 @@ class CJA:
         res = self.connector.putData(self.endpoint + path, **kwargs)
         return res
 
+    @traced()
     def getFilters(
         self,
         limit: int = 1000,
@@ -1243,6 +1426,7 @@ class CJA:
         cached: bool = True,
         cache: bool = True,
         verbose: bool = False,
+        fields: Union[list, str] = None,
         **kwargs
     ) -> JsonListOrDataFrameType:
         """
@@ -1258,8 +1442,10 @@ class CJA:
             ownerId : OPTIONAL : Filter by a specific owner ID.
             filterByIds : OPTIONAL : Filters by filter ID (comma-separated list)
             cached : OPTIONAL : return cached results
-            cache : OPTIONAL : If you want to cache the results in a local variable
+            cache : OPTIONAL : If you want to cache the results in a local variable.
+                Only the complete list of full filters (full=True, no fields, name, dataIds, ownerId or filterByIds) is cached.
             toBeUsedInRsid : OPTIONAL : The report suite where the filters is intended to be used. This report suite will be used to determine things like compatibility and permissions.
+            fields : OPTIONAL : list of the fields to return (ex: ["id","name"]). Only the expansion required for these fields is requested. Overrides full.
         """
         if self.loggingEnabled:
             self.logger.debug(f"getFilters start, output: {output}")
@@ -1270,10 +1456,13 @@ class CJA:
             "includeType": includeType,
             "page": 0,
         }
-        if full:
-            params[
-                "expansion"
-            ] = "compatibility,definition,internal,modified,isDeleted,definitionLastModified,createdDate,recentRecordedAccess,performanceScore,owner,dataId,ownerFullName,dataName,sharesFullName,approved,favorite,shares,tags,usageSummary,usageSummaryWithRelevancyScore"
+        fullExpansion = "compatibility,definition,internal,modified,isDeleted,definitionLastModified,createdDate,recentRecordedAccess,performanceScore,owner,dataId,ownerFullName,dataName,sharesFullName,approved,favorite,shares,tags,usageSummary,usageSummaryWithRelevancyScore"
+        if fields is not None:
+            expansion = self._fieldsToExpansion(fields, fullExpansion)
+            if expansion:
+                params["expansion"] = expansion
+        elif full:
+            params["expansion"] = fullExpansion
         if name is not None:
             params["name"] = name
         if dataIds is not None:
@@ -1294,13 +1483,18 @@ class CJA:
             )
             data += res["content"]
             lastPage = res.get("lastPage", True)
-        if cache:
-            self.filtes = data
+        if fields is not None:
+            data = self._projectFields(data, fields)
+        ## only the complete list with the definitions can be reused by findComponentsUsage
+        if cache and full and fields is None and not any((name, dataIds, ownerId, filterByIds)):
+            with self._cacheLock:
+                self.filters = data
         if output == "df":
             df = pd.DataFrame(data)
             return df
         return data
 
+    @profiledPhase("name resolution")
     def getFilter(
         self,
         filterId: str = None,
@@ -1402,7 +1596,7 @@ class CJA:
         res = self.connector.putData(self.endpoint + path, data=data, **kwargs)
         return res
 
-    def getAuditLogs(
+    def _auditLogsParams(
         self,
         startDate: str = None,
         endDate: str = None,
@@ -1414,33 +1608,11 @@ class CJA:
         userEmail: str = None,
         description: str = None,
         pageSize: int = 100,
-        n_results: Union[str, int] = "inf",
-        output: str = "df",
-        save: bool = False,
-    ) -> JsonListOrDataFrameType:
+    ) -> dict:
         """
-        Get Audit Log when few filters are applied.
-        All filters are applied with an AND condition.
-        Arguments:
-            startDate : OPTIONAL : begin range date, format: YYYY-01-01T00:00:00-07 (required if endDate is used)
-            endDate : OPTIONAL : begin range date, format: YYYY-01-01T00:00:00-07 (required if startDate is used)
-            action : OPTIONAL : The type of action a user or system can make.
-                Possible values : CREATE, EDIT, DELETE, LOGIN_FAILED, LOGIN_SUCCESSFUL, API_REQUEST
-            component : OPTIONAL :The type of component.
-                Possible values : CALCULATED_METRIC, CONNECTION, DATA_GROUP, DATA_VIEW, DATE_RANGE, FILTER, MOBILE, PROJECT, REPORT, SCHEDULED_PROJECT
-            componentId : OPTIONAL : The id of the component.
-            userType : OPTIONAL : The type of user.
-            userId : OPTIONAL : The ID of the user.
-            userEmail : OPTIONAL : The email address of the user.
-            description : OPTIONAL : The description of the audit log.
-            pageSize : OPTIONAL : Number of results per page. If left null, the default size is 100.
-            n_results : OPTIONAL : Total number of results you want for that search. Default "inf" will return everything
-            output : OPTIONAL : DataFrame by default, can be "raw"
+        Build the query parameters used by the audit logs endpoint.
         """
-        if self.loggingEnabled:
-            self.logger.debug(f"getAuditLogs start")
         params = {"pageNumber": 0, "pageSize": pageSize}
-        path = "/auditlogs/api/v1/auditlogs"
         if startDate is not None and endDate is not None:
             params["startDate"] = startDate
             params["endDate"] = endDate
@@ -1451,51 +1623,279 @@ class CJA:
         if componentId is not None:
             params["componentId"] = componentId
         if userType is not None:
-            params["userType"]
+            params["userType"] = userType
         if userId is not None:
             params["userId"] = userId
         if userEmail is not None:
             params["userEmail"] = userEmail
         if description is not None:
             params["description"] = description
+        return params
+
+    def _checkAuditLogsPage(self, res: dict = None, pageNumber: int = 0) -> None:
+        """
+        Raise an exception when a page of the audit logs endpoints is an error response (no "content"),
+        so a failed page is not read as an empty or last page.
+        Arguments:
+            res : REQUIRED : response of the page
+            pageNumber : OPTIONAL : number of the page, used in the error message.
+        """
+        if type(res) == dict and "content" in res.keys():
+            return
+        if self.loggingEnabled:
+            self.logger.error(f"audit logs page {pageNumber} failed: {res}")
+        raise Exception(f"Audit logs page {pageNumber} failed: {res}")
+
+    def _getAuditLogsPages(
+        self, params: dict = None, n_results: Union[str, int] = "inf"
+    ) -> list:
+        """
+        Loop through the pages of the audit logs endpoint for the parameters provided.
+        Raise an exception when a page returns an error.
+        Arguments:
+            params : REQUIRED : parameters generated by the _auditLogsParams method.
+            n_results : OPTIONAL : stop the loop once that number of results is reached.
+        """
+        path = "/auditlogs/api/v1/auditlogs"
+        params = deepcopy(params)
         lastPage = False
         data = []
         while lastPage != True:
             res = self.connector.getData(self.endpoint + path, params=params)
-            data += res.get("content", [])
+            self._checkAuditLogsPage(res, params["pageNumber"])
+            data += res["content"]
             lastPage = res.get("last", True)
             if len(data) > float(n_results):
                 lastPage = True
             params["pageNumber"] += 1
+        return data
+
+    def _flattenAuditLogs(self, data: list = None) -> "pd.DataFrame":
+        """
+        Create the audit logs dataframe and extract the user and component information in their own columns.
+        The nested objects are normalized in a single pass per column.
+        Arguments:
+            data : REQUIRED : list of audit logs entries
+        """
+        df = pd.DataFrame(data)
+        flattening = {
+            "user": {"id": "userId"},
+            "component": {
+                "id": "componentId",
+                "idType": "componentType",
+                "name": "componentName",
+            },
+        }
+        for column, fields in flattening.items():
+            if column not in df.columns:
+                if self.loggingEnabled:
+                    self.logger.debug(f"issue extracting {column} information")
+                continue
+            normalized = pd.json_normalize(
+                [obj if isinstance(obj, dict) else {} for obj in df[column]],
+                max_level=0,
+            )
+            normalized = normalized.reindex(columns=list(fields.keys())).fillna("")
+            for field, newColumn in fields.items():
+                df[newColumn] = normalized[field].values
+        return df
+
+    @traced()
+    def getAuditLogs(
+        self,
+        startDate: str = None,
+        endDate: str = None,
+        action: str = None,
+        component: str = None,
+        componentId: str = None,
+        userType: str = None,
+        userId: str = None,
+        userEmail: str = None,
+        description: str = None,
+        pageSize: int = 100,
+        n_results: Union[str, int] = "inf",
+        output: str = "df",
+        save: bool = False,
+    ) -> JsonListOrDataFrameType:
+        """
+        Get Audit Log when few filters are applied.
+        All filters are applied with an AND condition.
+        Arguments:
+            startDate : OPTIONAL : begin range date, format: YYYY-01-01T00:00:00-07 (required if endDate is used)
+            endDate : OPTIONAL : begin range date, format: YYYY-01-01T00:00:00-07 (required if startDate is used)
+            action : OPTIONAL : The type of action a user or system can make.
+                Possible values : CREATE, EDIT, DELETE, LOGIN_FAILED, LOGIN_SUCCESSFUL, API_REQUEST
+            component : OPTIONAL :The type of component.
+                Possible values : CALCULATED_METRIC, CONNECTION, DATA_GROUP, DATA_VIEW, DATE_RANGE, FILTER, MOBILE, PROJECT, REPORT, SCHEDULED_PROJECT
+            componentId : OPTIONAL : The id of the component.
+            userType : OPTIONAL : The type of user.
+            userId : OPTIONAL : The ID of the user.
+            userEmail : OPTIONAL : The email address of the user.
+            description : OPTIONAL : The description of the audit log.
+            pageSize : OPTIONAL : Number of results per page. If left null, the default size is 100.
+            n_results : OPTIONAL : Total number of results you want for that search. Default "inf" will return everything
+            output : OPTIONAL : DataFrame by default, can be "raw"
+        Raise an exception when a page returns an error.
+        """
+        if self.loggingEnabled:
+            self.logger.debug(f"getAuditLogs start")
+        params = self._auditLogsParams(
+            startDate=startDate,
+            endDate=endDate,
+            action=action,
+            component=component,
+            componentId=componentId,
+            userType=userType,
+            userId=userId,
+            userEmail=userEmail,
+            description=description,
+            pageSize=pageSize,
+        )
+        data = self._getAuditLogsPages(params, n_results=n_results)
         if output == "raw":
             if save:
                 with open(f"audit_logs_{int(time.time())}.json", "w") as f:
                     f.write(json.dumps(data))
-        df = pd.DataFrame(data)
-        try:
-            df["userId"] = df["user"].apply(lambda x: x.get("id", ""))
-        except:
-            if self.loggingEnabled:
-                self.logger.debug(f"issue extracting userId")
-        try:
-            df["componentId"] = df["component"].apply(lambda x: x.get("id", ""))
-        except:
-            if self.loggingEnabled:
-                self.logger.debug(f"issue extracting componentId")
-        try:
-            df["componentType"] = df["component"].apply(lambda x: x.get("idType", ""))
-        except:
-            if self.loggingEnabled:
-                self.logger.debug(f"issue extracting componentType")
-        try:
-            df["componentName"] = df["component"].apply(lambda x: x.get("name", ""))
-        except:
-            if self.loggingEnabled:
-                self.logger.debug(f"issue extracting componentName")
+        df = self._flattenAuditLogs(data)
         if save:
             df.to_csv(f"audit_logs.{int(time.time())}.csv", index=False)
         return df
 
+    @traced()
+    def exportAuditLogs(
+        self,
+        startDate: str = None,
+        endDate: str = None,
+        folder: str = "audit_logs",
+        fileFormat: str = "parquet",
+        windowHours: int = 24,
+        max_workers: int = None,
+        pageSize: int = 1000,
+        useWatermark: bool = True,
+        **kwargs,
+    ) -> dict:
+        """
+        Export the audit logs to date-partitioned files (folder/date=YYYY-MM-DD/).
+        The time range is split in windows that are fetched concurrently.
+        A high-water mark is kept in the folder so the next run only fetches the new entries.
+        Each run writes its own file in the partitions. Nothing is written when a page of a window returns an error:
+        the exception is raised and the watermark is not moved.
+        Arguments:
+            startDate : OPTIONAL : begin range date, format: YYYY-01-01T00:00:00-07.
+                Required on the first run, default to the watermark on the next runs.
+                When set, the watermark does not filter the entries (backfill): the range is exported again.
+            endDate : OPTIONAL : end range date, format: YYYY-01-01T00:00:00-07 (default now)
+            folder : OPTIONAL : folder where the partitions and the watermark are written (default "audit_logs")
+            fileFormat : OPTIONAL : "parquet" (default, requires pyarrow) or "csv"
+            windowHours : OPTIONAL : size of each time window in hours (default 24)
+            max_workers : OPTIONAL : number of windows fetched at the same time (default 4, or the maxLimit of the concurrencyLimiter when one is used)
+            pageSize : OPTIONAL : number of results per page (default 1000)
+            useWatermark : OPTIONAL : read and update the high-water mark (default True)
+        Possible kwargs:
+            action, component, componentId, userType, userId, userEmail, description : same filters as getAuditLogs.
+        Returns a dictionary with the number of entries exported, the files written and the new watermark.
+        """
+        if fileFormat not in ["parquet", "csv"]:
+            raise ValueError("fileFormat must be 'parquet' or 'csv'")
+        if self.loggingEnabled:
+            self.logger.debug(f"exportAuditLogs start")
+        folderPath = Path(folder)
+        folderPath.mkdir(parents=True, exist_ok=True)
+        watermarkPath = folderPath / "_watermark.json"
+        watermark = {}
+        if useWatermark and watermarkPath.exists():
+            with open(watermarkPath, "r") as f:
+                watermark = json.load(f)
+        backfill = startDate is not None
+        if startDate is None:
+            startDate = watermark.get("dateCreated")
+        if startDate is None:
+            raise ValueError("Require a startDate when no watermark is available")
+        start = pd.Timestamp(startDate)
+        if start.tzinfo is None:
+            start = start.tz_localize("UTC")
+        if endDate is None:
+            end = pd.Timestamp.now(tz="UTC")
+        else:
+            end = pd.Timestamp(endDate)
+            if end.tzinfo is None:
+                end = end.tz_localize("UTC")
+        windows = []
+        cursor = start
+        while cursor < end:
+            windowEnd = min(cursor + pd.Timedelta(hours=windowHours), end)
+            windows.append((cursor, windowEnd))
+            cursor = windowEnd
+        filters = {
+            key: kwargs.get(key)
+            for key in ["action", "component", "componentId", "userType", "userId", "userEmail", "description"]
+        }
+        windowParams = [
+            self._auditLogsParams(
+                startDate=windowStart.isoformat(),
+                endDate=windowEnd.isoformat(),
+                pageSize=pageSize,
+                **filters,
+            )
+            for windowStart, windowEnd in windows
+        ]
+        if self.loggingEnabled:
+            self.logger.info(f"{len(windowParams)} windows to retrieve")
+        data = []
+        with ThreadPoolExecutor(max_workers=self._maxWorkers(max_workers, default=4)) as executor:
+            for windowData in executor.map(propagate(self._getAuditLogsPages), windowParams):
+                data += windowData
+        result = {"entries": 0, "files": [], "watermark": watermark.get("dateCreated")}
+        if len(data) == 0:
+            return result
+        df = self._flattenAuditLogs(data)
+        hasIds = "id" in df.columns
+        df = df.drop_duplicates(subset=["id"]) if hasIds else df
+        dates = pd.to_datetime(df["dateCreated"], utc=True)
+        previous = None
+        if watermark.get("dateCreated") is not None:
+            previous = pd.Timestamp(watermark["dateCreated"])
+        if previous is not None and backfill == False:
+            keep = dates > previous
+            if hasIds:
+                keep |= (dates == previous) & ~df["id"].isin(set(watermark.get("ids", [])))
+            df, dates = df[keep], dates[keep]
+        if df.empty:
+            return result
+        ## nested objects are stored as JSON string to keep a flat schema
+        for column in ["user", "component"]:
+            if column in df.columns:
+                df[column] = [json.dumps(obj) for obj in df[column]]
+        ## one file per run, so concurrent runs and changing columns never mix in the same file
+        runId = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime())}_{uuid.uuid4().hex[:8]}"
+        for day, partition in df.groupby(dates.dt.strftime("%Y-%m-%d")):
+            partitionPath = folderPath / f"date={day}"
+            partitionPath.mkdir(exist_ok=True)
+            filePath = partitionPath / f"audit_logs_{runId}.{fileFormat}"
+            if fileFormat == "parquet":
+                partition.to_parquet(filePath, index=False)
+            else:
+                partition.to_csv(filePath, index=False)
+            result["files"].append(str(filePath))
+        result["entries"] = len(df)
+        newWatermark = dates.max()
+        if previous is not None and previous > newWatermark:
+            ## a backfill older than the watermark does not move it back
+            return result
+        ids = list(df.loc[dates == newWatermark, "id"]) if hasIds else []
+        if previous is not None and previous == newWatermark:
+            ids = list(dict.fromkeys(watermark.get("ids", []) + ids))
+        result["watermark"] = newWatermark.isoformat()
+        if useWatermark:
+            with open(watermarkPath, "w") as f:
+                f.write(
+                    json.dumps(
+                        {"dateCreated": newWatermark.isoformat(), "ids": ids},
+                        indent=4,
+                    )
+                )
+        return result
+
     SAMPLE_FILTERMESSAGE_LOGS = {
         "criteria": {
             "fieldOperator": "AND",
@@ -1534,21 +1934,115 @@ class CJA:
         "pageNumber": 0,
     }
 
-    def searchAuditLogs(self, filterMessage: dict = None) -> JsonListOrDataFrameType:
+    def _iterSearchAuditLogs(
+        self, filterMessage: dict = None, n_results: Union[str, int] = "inf"
+    ):
+        """
+        Generator returning the audit logs entries of a search, one page in memory at a time.
+        Arguments:
+            filterMessage : REQUIRED : A dictionary of the search to the Audit Log.
+            n_results : OPTIONAL : stop once that number of entries has been returned.
+        Raise an exception when a page returns an error.
+        """
+        path = "/auditlogs/api/v1/auditlogs/search"
+        message = deepcopy(filterMessage)
+        message["pageNumber"] = message.get("pageNumber") or 0
+        count = 0
+        lastPage = False
+        while lastPage != True:
+            res = self.connector.postData(self.endpoint + path, data=message)
+            self._checkAuditLogsPage(res, message["pageNumber"])
+            content = res["content"]
+            for entry in content:
+                if count >= float(n_results):
+                    return
+                count += 1
+                yield entry
+            lastPage = res.get("last", True) or len(content) == 0
+            message["pageNumber"] += 1
+
+    @traced()
+    def searchAuditLogs(
+        self,
+        filterMessage: dict = None,
+        n_results: Union[str, int] = "inf",
+        max_workers: int = None,
+        output: str = "raw",
+    ) -> Union[dict, JsonListOrDataFrameType]:
         """
         Get Audit Log when several filters are applied. You can define the different type of operator and connector to use.
         Operators: EQUALS, CONTAINS, NOT_EQUALS, IN
         Connectors: AND, OR
         Arguments:
             filterMessage : REQUIRED : A dictionary of the search to the Audit Log.
+            n_results : OPTIONAL : Total number of results you want for that search. Default "inf" will return everything
+            max_workers : OPTIONAL : number of pages fetched at the same time once the total number of pages is known
+                (default 1, or the maxLimit of the concurrencyLimiter when one is used)
+            output : OPTIONAL : "raw" (default) returns the response of the first page, with the entries of all pages in "content".
+                "list" returns the list of entries, "df" a DataFrame (same columns than getAuditLogs)
+                "generator" returns a generator of entries, fetching one page at a time.
+        Raise an exception when a page returns an error, instead of returning partial results.
         """
-        path = "/auditlogs/api/v1/auditlogs/search"
         if self.loggingEnabled:
             self.logger.debug(f"searchAuditLogs start")
         if filterMessage is None:
             raise ValueError("Require a filterMessage")
-        res = self.connector.postData(self.endpoint + path, data=filterMessage)
-        return res
+        if output == "generator":
+            return self._iterSearchAuditLogs(filterMessage, n_results=n_results)
+        path = "/auditlogs/api/v1/auditlogs/search"
+        message = deepcopy(filterMessage)
+        message["pageNumber"] = message.get("pageNumber") or 0
+        res = self.connector.postData(self.endpoint + path, data=message)
+        self._checkAuditLogsPage(res, message["pageNumber"])
+        firstPage = res
+        max_workers = self._maxWorkers(max_workers, default=1)
+        data = list(res["content"])
+        lastPage = res.get("last", True) or len(data) == 0
+        totalPages = res.get("totalPages")
+        if lastPage != True and max_workers > 1 and totalPages is not None:
+            lastPageNumber = totalPages
+            if n_results != "inf":
+                pageSize = message.get("pageSize") or max(len(data), 1)
+                neededPages = -(-(int(n_results) - len(data)) // pageSize)
+                lastPageNumber = min(totalPages, message["pageNumber"] + 1 + neededPages)
+            messages = []
+            for pageNumber in range(message["pageNumber"] + 1, lastPageNumber):
+                pageMessage = deepcopy(message)
+                pageMessage["pageNumber"] = pageNumber
+                messages.append(pageMessage)
+            if self.loggingEnabled:
+                self.logger.debug(f"{len(messages)} pages to retrieve concurrently")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = executor.map(
+                    propagate(
+                        lambda pageMessage: self.connector.postData(
+                            self.endpoint + path, data=pageMessage
+                        )
+                    ),
+                    messages,
+                )
+                for pageMessage, pageRes in zip(messages, responses):
+                    self._checkAuditLogsPage(pageRes, pageMessage["pageNumber"])
+                    data += pageRes["content"]
+        else:
+            while lastPage != True and len(data) < float(n_results):
+                message["pageNumber"] += 1
+                res = self.connector.postData(self.endpoint + path, data=message)
+                self._checkAuditLogsPage(res, message["pageNumber"])
+                content = res["content"]
+                data += content
+                lastPage = res.get("last", True) or len(content) == 0
+        if n_results != "inf":
+            data = data[: int(n_results)]
+        if output == "df":
+            return self._flattenAuditLogs(data)
+        if output == "list":
+            return data
+        ## same shape than the API response, as returned before the pagination was supported
+        result = dict(firstPage)
+        result["content"] = data
+        result["numberOfElements"] = len(data)
+        return result
     
     def getAnnotations(self,full:bool=True,includeType:str='all',limit:int=1000,page:int=0)->list:
         """
@@ -1706,6 +2200,7 @@ class CJA:
         res = self.connector.putData(self.endpoint+path,data=annotationObj)
         return res
 
+    @traced()
     def getProjects(
         self,
         full: bool = True,
@@ -1718,6 +2213,8 @@ class CJA:
         save: bool = False,
         output: str = "df",
         cache: bool = True,
+        fields: Union[list, str] = None,
+        stream: bool = False,
         **kwargs,
     ) -> JsonListOrDataFrameType:
         """
@@ -1731,8 +2228,11 @@ class CJA:
             n_results : OPTIONAL : If you want to restrict to a certain number of requests (default: "inf" loop through all)
             usedIn : OPTIONAL : Additional parameter to compute some usage of the projects. Recommended to be used with limit
             save : OPTIONAL : if you want to save the result
-            cache : OPTIONAL : if you want to save the project in a local Variable.
+            cache : OPTIONAL : if you want to save the project in a local Variable. Not done when fields is used.
             output : OPTIONAL : the type of output to return "df" or "raw"
+            fields : OPTIONAL : list of the fields to return (ex: ["id","name"]). Only the expansion required for these fields is requested. Overrides full.
+            stream : OPTIONAL : If set to True, the projects are read while the response is downloaded, lowering the memory used.
+                Requires the ijson library, the whole response is parsed at once otherwise.
         Possible kwargs:
             page : the page number to reach.
         """
@@ -1744,20 +2244,30 @@ class CJA:
             params["limit"] = limit
             params["page"] = kwargs.get('page',0)
             params["pagination"] = "true"
-        if full:
+        fullExpansion = "shares,tags,accessLevel,modified,externalReferences,definition,ownerFullName,sharesFullName,complexity,lastRecordedAccess,usageSummary,usedIn"
+        if fields is not None:
+            expansion = self._fieldsToExpansion(fields, fullExpansion)
+            if expansion:
+                params["expansion"] = expansion
+        elif full:
             params[
                 "expansion"
             ] = "shares,tags,accessLevel,modified,externalReferences,definition,ownerFullName,sharesFullName,complexity,lastRecordedAccess,usageSummary"
         if usedIn:
-            params['expansion'] += ',usedIn'
+            params['expansion'] = ",".join(
+                [exp for exp in [params.get('expansion'), 'usedIn'] if exp]
+            )
         if filterByIds:
             params["filterByIds"] = filterByIds
         if ownerId:
             params["ownerId"] = ownerId
-        res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
-        if params.get('pagination','false') != 'true':
+        if stream:
+            data, res = self._streamProjects(self.endpoint + path, params, n_results, fields, **kwargs)
+        elif params.get('pagination','false') != 'true':
+            res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
             data = res
         else:
+            res = self.connector.getData(self.endpoint + path, params=params, **kwargs)
             lastPage = res.get('lastPage',False)
             data = res["content"]
             while float(len(data)) < float(n_results) and lastPage == False:
@@ -1767,18 +2277,54 @@ class CJA:
                 lastPage = res.get('lastPage',False)
                 if float(len(data)) >= float(n_results):
                     lastPage=True
+        if fields is not None and stream == False:
+            data = self._projectFields(data, fields)
         if output == "raw":
             if save:
                 with open(f"projects_{int(time.time())}.json", "w") as f:
                     f.write(json.dumps(res, indent=2))
             return data
-        if cache:
-            self.listProjectIds = data
+        ## a projected list is not kept as the cache, the other methods need the complete projects
+        if cache and fields is None:
+            with self._cacheLock:
+                self.listProjectIds = data
         data = pd.DataFrame(data)
         if save:
             data.to_csv(f"projects_{int(time.time())}", index=False)
         return data
 
+    def _streamProjects(
+        self,
+        url: str = None,
+        params: dict = None,
+        n_results: Union[int, str] = "inf",
+        fields: Union[list, str] = None,
+        **kwargs,
+    ) -> tuple:
+        """
+        Read the projects while the responses are downloaded, keeping only the fields requested.
+        Like the non-streamed requests, the pages are kept whole: the loop stops after the page reaching n_results.
+        Returns a tuple (list of projects, last response without its content).
+        """
+        paginated = params.get("pagination", "false") == "true"
+        data = []
+        lastPage = False
+        while lastPage == False:
+            with self.connector.streamData(
+                "GET", url, arrayKey="content" if paginated else None, params=params, **kwargs
+            ) as stream:
+                for project in stream:
+                    if fields is not None:
+                        project = self._projectFields([project], fields)[0]
+                    data.append(project)
+            res = stream.metadata
+            if paginated == False or float(len(data)) >= float(n_results):
+                break
+            lastPage = res.get("lastPage", False)
+            params["page"] += 1
+        return data, (res if paginated else data)
+
+    @traced()
     def getProject(
         self,
         projectId: str = None,
@@ -1808,12 +2354,15 @@ class CJA:
             return Project(res, dvIdSuffix=dvIdSuffix)
         if cache:
             try:
-                self.projectsDetails[projectId] = Project(res)
+                project = Project(res)
+                with self._cacheLock:
+                    self.projectsDetails[projectId] = project
             except:
                 if self.loggingEnabled:
                     self.logger.warning(f"Cannot convert Project to Project class")
         return res
 
+    @traced()
     def getAllProjectDetails(
         self,
         projects: JsonListOrDataFrameType = None,
@@ -1823,7 +2372,8 @@ class CJA:
         cache: bool = False,
         dvIdSuffix: bool = False,
         output:str="dict",
-    ) -> dict:
+        dryRun: bool = False,
+    ) -> Union[dict, RequestPlan]:
         """
         Retrieve all projects details. You can either pass the list of dataframe returned from the getProjects methods and some filters.
         Returns a dict of ProjectId and the value is the Project class instance for that project.
@@ -1838,23 +2388,30 @@ class CJA:
             dvIdSuffix : OPTIONAL : If you want to add data view ID as suffix of metrics and dimensions (::dvId)
             cache : OPTIONAL : If you want to cache the different elements retrieved for future usage.
             output : OPTIONAL : If you want to return a "list" or "dict" from this method. (default "dict")
+            dryRun : OPTIONAL : If set to True, the project details are not retrieved: returns the RequestPlan with the number of calls
+                and the estimated duration. A single project is requested to measure the latency.
         Not using filter may end up taking a while to retrieve the information.
         """
         if self.loggingEnabled:
             self.logger.debug(f"starting getAllProjectDetails")
+        listed = False  ## True when the projects are listed with getProjects, a request counted in the dry-run probes
         ## if no project data
         if projects is None:
             if self.loggingEnabled:
                 self.logger.debug(f"No projects passed")
-            if len(self.listProjectIds) > 0 and useAttribute:
-                fullProjectIds = self.listProjectIds
-            else:
-                fullProjectIds = self.getProjects(output="raw", cache=cache)
+            with self._cacheLock:
+                if len(self.listProjectIds) > 0 and useAttribute:
+                    fullProjectIds = self.listProjectIds
+                else:
+                    listed = True
+                    fullProjectIds = self.getProjects(output="raw", cache=cache)
+                    if cache:
+                        self.listProjectIds = fullProjectIds
         ## if project data is passed
         elif projects is not None:
             if self.loggingEnabled:
                 self.logger.debug(f"projects passed")
-            if isinstance(projects, pd.DataFrame):
+            if isDataFrame(projects):
                 fullProjectIds = projects.to_dict(orient="records")
             elif isinstance(projects, list):
                 fullProjectIds = (proj["id"] for proj in projects)
@@ -1874,6 +2431,20 @@ class CJA:
                 for project in fullProjectIds
                 if filterNameOwner in project["owner"].get("name", "")
             ]
+        if dryRun:
+            fullProjectIds = list(fullProjectIds)
+            plan = RequestPlan("getAllProjectDetails", limits=self._rateLimits())
+            if listed:
+                ## the listing is not a getProject request, its latency is not used for the estimation
+                plan.addProbe()
+            if len(fullProjectIds) > 0:
+                start = time.perf_counter()
+                self.getProject(fullProjectIds[0]["id"], cache=False)
+                plan.addProbe(time.perf_counter() - start)
+            plan.addStep("getProject", calls=len(fullProjectIds))
+            if self.loggingEnabled:
+                self.logger.info(str(plan))
+            return plan
         if self.loggingEnabled:
             self.logger.info(f"{len(fullProjectIds)} project details to retrieve")
             self.logger.debug(
@@ -1887,7 +2458,8 @@ class CJA:
             for projectId in projectIds
         }
         if filterNameProject is None and filterNameOwner is None:
-            self.projectsDetails = projectsDetails
+            with self._cacheLock:
+                self.projectsDetails = projectsDetails
         if output == "list":
             list_projectsDetails = [projectsDetails[key] for key in projectsDetails]
             return list_projectsDetails
@@ -1960,12 +2532,22 @@ class CJA:
         )
         return res
 
+    @staticmethod
+    def _hasDefinitions(elements: JsonListOrDataFrameType = None) -> bool:
+        """
+        Returns True if the cached filters or calculated metrics are not empty and contain their definition.
+        """
+        if isDataFrame(elements):
+            return len(elements) > 0 and "definition" in elements.columns
+        return len(elements) > 0 and all("definition" in element for element in elements)
+
+    @traced()
     def findComponentsUsage(
         self,
         components: list = None,
         projectDetails: list = None,
-        filters: Union[list, pd.DataFrame] = None,
-        calculatedMetrics: Union[list, pd.DataFrame] = None,
+        filters: Union[list, "pd.DataFrame"] = None,
+        calculatedMetrics: Union[list, "pd.DataFrame"] = None,
         recursive: bool = False,
         regexUsed: bool = False,
         resetProjectDetails: bool = False,
@@ -1999,54 +2581,39 @@ class CJA:
         ## Segments
         if self.loggingEnabled:
             self.logger.debug(f"retrieving filters")
-        if len(self.filters) == 0 and filters is None:
-            self.filters = self.getFilters(full=True)
-            myFilters = self.filters
-        elif len(self.filters) > 0 and filters is None:
-            if type(self.filters) == list:
-                myFilters = pd.DataFrame(self.filters)
-            myFilters = self.filters
-        elif filters is not None:
-            if type(filters) == list:
-                myFilters = pd.DataFrame(filters)
+        if filters is None:
+            ## the lock is held until the cache is filled, so concurrent calls fetch the filters once
+            with self._cacheLock:
+                if not self._hasDefinitions(self.filters):
+                    self.filters = self.getFilters(full=True)
+                myFilters = self.filters
         else:
             myFilters = filters
+        if type(myFilters) == list:
+            myFilters = pd.DataFrame(myFilters)
         ### Calculated Metrics
         if self.loggingEnabled:
             self.logger.debug(f"retrieving calculated metrics")
-        if len(self.calculatedMetrics) == 0 and calculatedMetrics is None:
-            self.calculatedMetrics = self.getCalculatedMetrics(full=True)
-            myMetrics = self.calculatedMetrics
-        elif len(self.calculatedMetrics) > 0 and calculatedMetrics is None:
-            if type(self.calculatedMetrics) == list:
-                myMetrics = pd.DataFrame(self.calculatedMetrics)
-            elif type(self.calculatedMetrics) == pd.DataFrame:
+        if calculatedMetrics is None:
+            with self._cacheLock:
+                if not self._hasDefinitions(self.calculatedMetrics):
+                    self.calculatedMetrics = self.getCalculatedMetrics(full=True)
                 myMetrics = self.calculatedMetrics
-        elif calculatedMetrics is not None:
-            if type(calculatedMetrics) == list:
-                myMetrics = pd.DataFrame(calculatedMetrics)
         else:
             myMetrics = calculatedMetrics
+        if type(myMetrics) == list:
+            myMetrics = pd.DataFrame(myMetrics)
         ### Projects
-        if (
-            len(self.projectsDetails) == 0 and projectDetails is None
-        ) or resetProjectDetails:
-            if self.loggingEnabled:
-                self.logger.debug(f"retrieving projects details")
-            self.projectDetails = self.getAllProjectDetails(dvIdSuffix=dvIdSuffix)
-            myProjectDetails = (
-                self.projectsDetails[key].to_dict() for key in self.projectsDetails
-            )
-        elif (
-            len(self.projectsDetails) > 0
-            and projectDetails is None
-            and resetProjectDetails == False
-        ):
-            if self.loggingEnabled:
-                self.logger.debug(f"transforming projects details")
-            myProjectDetails = (
-                self.projectsDetails[key].to_dict() for key in self.projectsDetails
-            )
+        if projectDetails is None or resetProjectDetails:
+            with self._cacheLock:
+                if len(self.projectsDetails) == 0 or resetProjectDetails:
+                    if self.loggingEnabled:
+                        self.logger.debug(f"retrieving projects details")
+                    self.getAllProjectDetails(dvIdSuffix=dvIdSuffix)
+                elif self.loggingEnabled:
+                    self.logger.debug(f"transforming projects details")
+                cachedProjects = list(self.projectsDetails.values())
+            myProjectDetails = (project.to_dict() for project in cachedProjects)
         elif projectDetails is not None:
             if self.loggingEnabled:
                 self.logger.debug(f"setting the project details")
@@ -2125,6 +2692,36 @@ class CJA:
             returnObj["recursion"] = recurseObj
         return returnObj
 
+    def _getReportPage(
+        self,
+        url: str = None,
+        dataRequest: dict = None,
+        params: dict = None,
+        streamedData: dict = None,
+    ) -> dict:
+        """
+        Request a page of report and returns the response.
+        When streamedData is passed, the rows are read while the page is downloaded and stored in it,
+        the response returned has an empty "rows" list. The whole page is kept, as for the non-streamed requests.
+        Arguments:
+            url : REQUIRED : URL of the reports endpoint
+            dataRequest : REQUIRED : the report request
+            params : OPTIONAL : query parameters
+            streamedData : OPTIONAL : dictionary with "rows" (list or None), "prepared" (dictionary) and "count" keys.
+        """
+        if streamedData is None:
+            return self.connector.postData(url, data=dataRequest, params=params)
+        with self.connector.streamData(
+            "POST", url, arrayKey="rows", params=params, data=dataRequest
+        ) as stream:
+            for row in stream:
+                streamedData["count"] += 1
+                if streamedData["rows"] is not None:
+                    streamedData["rows"].append(row)
+                else:
+                    streamedData["prepared"][row["itemId"]] = [row["value"]] + row["data"]
+        return stream.metadata
+
     def _prepareData(
         self,
         dataRows: list = None,
@@ -2226,6 +2823,7 @@ class CJA:
                 ## should ends like : {'segmentName' : ['STATIC',123,456]}
         return nb_columns, tableColumnIds, segmentApplied, filterRelations, dataRows
 
+    @traced()
     def getReport(
         self,
         request: Union[dict, IO] = None,
@@ -2243,6 +2841,7 @@ class CJA:
         resolveColumns: bool = True,
         save: bool = False,
         returnClass: bool = True,
+        stream: bool = False,
     ) -> Union[Workspace, dict]:
         """
         Return an instance of Workspace that contains the data requested.
@@ -2262,6 +2861,8 @@ class CJA:
             resolveColumns: OPTIONAL : automatically resolve columns from ID to name for calculated metrics & segments. Default True. (works on returnClass only)
             save : OPTIONAL : If you want to save the data (in JSON or CSV, depending the class is used or not)
             returnClass : OPTIONAL : return the class building dataframe and better comprehension of data. (default yes)
+            stream : OPTIONAL : If set to True, the rows are read while each page is downloaded, lowering the memory used.
+                Requires the ijson library, the whole page is parsed at once otherwise.
         """
         if self.loggingEnabled:
             self.logger.debug(f"Start getReport")
@@ -2300,39 +2901,51 @@ class CJA:
         else:
             dataRequest["statistics"]["ignoreZeroes"] = False
         ### Request data
-        if self.loggingEnabled:
+        if self.loggingEnabled and self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(f"getReport request: {json.dumps(dataRequest,indent=4)}")
-        res = self.connector.postData(
-            self.endpoint + path, data=dataRequest, params=params
+        streamedData = None
+        if stream:
+            ## rows are kept as a list only when returned as such, otherwise prepared directly
+            streamedData = {
+                "rows": [] if returnClass == False else None,
+                "prepared": {},
+                "count": 0,
+            }
+        res = self._getReportPage(
+            self.endpoint + path, dataRequest, params, streamedData
         )
         if "rows" in res.keys():
             reportType = "normal"
             if self.loggingEnabled:
                 self.logger.debug(f"reportType: {reportType}")
-            dataRows = res.get("rows")
+            if streamedData is None:
+                dataRows = res.get("rows")
             columns = res.get("columns")
             summaryData = res.get("summaryData")
             resultsTruncated = res.get("resultsTruncated")
             totalElements = res.get("numberOfElements")
             lastPage = res.get("lastPage", True)
-            if float(len(dataRows)) >= float(n_results):
+            nbRows = len(dataRows) if streamedData is None else streamedData["count"]
+            if float(nbRows) >= float(n_results):
                 ## force end of loop when a limit is set on n_results
                 lastPage = True
             while lastPage != True:
                 dataRequest["settings"]["page"] += 1
-                res = self.connector.postData(
-                    self.endpoint + path, data=dataRequest, params=params
+                res = self._getReportPage(
+                    self.endpoint + path, dataRequest, params, streamedData
                 )
-                dataRows += res.get("rows")
+                if streamedData is None:
+                    dataRows += res.get("rows")
                 lastPage = res.get("lastPage", True)
                 totalElements += res.get("numberOfElements")
-                if float(len(dataRows)) >= float(n_results):
+                nbRows = len(dataRows) if streamedData is None else streamedData["count"]
+                if float(nbRows) >= float(n_results):
                     ## force end of loop when a limit is set on n_results
                     lastPage = True
             if self.loggingEnabled:
-                self.logger.debug(f"loop for report over: {len(dataRows)} results")
+                self.logger.debug(f"loop for report over: {nbRows} results")
             if returnClass == False:
-                return dataRows
+                return dataRows if streamedData is None else streamedData["rows"]
             ### create relation between metrics and filters applied
             columnIdRelations = {
                 obj["columnId"]: obj["id"]
@@ -2407,7 +3020,10 @@ class CJA:
         ### preparing data points
         if self.loggingEnabled:
             self.logger.debug(f"preparing data")
-        preparedData = self._prepareData(dataRows, reportType=reportType)
+        if streamedData is not None and reportType == "normal":
+            preparedData = streamedData["prepared"]
+        else:
+            preparedData = self._prepareData(dataRows, reportType=reportType)
         if returnClass:
             if self.loggingEnabled:
                 self.logger.debug(f"returning Workspace class")
@@ -2428,6 +3044,7 @@ class CJA:
                 data.to_csv()
             return data
 
+    @traced()
     def getMultidimensionalReport(
         self,
         dimensions: list = None,
@@ -2438,7 +3055,8 @@ class CJA:
         metricFilters: dict = None,
         countRepeatInstances: bool = True,
         returnNones: bool = True,
-    ) -> pd.DataFrame:
+        dryRun: bool = False,
+    ) -> Union[Workspace, RequestPlan]:
         """
         Realize a multi-level breakdown report from the elements provided.
         Returns either
@@ -2455,6 +3073,8 @@ class CJA:
                 dictionnary like this : {"metric1":"segId1","metric":"segId2"}
             countRepeatInstances : OPTIONAL : set to count repeatInstances values (or not). True by default.
             returnNones : OPTIONAL : Set the behavior of the None values in that request. (True by default)
+            dryRun : OPTIONAL : If set to True, no report is requested: returns the RequestPlan with the number of calls
+                per level and pages per call, estimated from the number of items of each dimension (getTopItems), and the estimated duration.
         """
         if dimensions is None:
             raise ValueError("Require a list of dimensions")
@@ -2466,6 +3086,10 @@ class CJA:
             raise ValueError("Require a list of metrics")
         if dataViewId is None:
             raise ValueError("Require a Data View ID")
+        if dryRun:
+            return self._planMultidimensionalReport(
+                dimensions, dimensionLimit, dataViewId, globalFilters
+            )
         if self.loggingEnabled:
             self.logger.debug(f"Starting getMultidimensionalReport")
         template = RequestCreator()
@@ -2481,111 +3105,64 @@ class CJA:
                 template.addMetricFilter(
                     metricId=filterKey, filterId=metricFilters[filterKey]
                 )
-        if self.loggingEnabled:
+        if self.loggingEnabled and self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(
                 f"first request: {json.dumps(template.to_dict(),indent=2)}"
             )
         level = 0
-        list_breakdown = deepcopy(
-            dimensions[1:]
-        )  ## use to assign the correct variable to the itemsId retrieved
-        dict_breakdown_itemId = defaultdict(list)  ## for dimension - itemId
-        dict_breakdown_relation = defaultdict(list)  ## for itemId - Sub itemId
-        translate_itemId_value = {}  ## for translation between itemId and Value
+        ## breakdown filters and values of the item combinations of the previous levels, one report per combination
+        parents = [([], {})]
+        frames = []
         for dimension in dimensions:
-            df_final = pd.DataFrame()
-            template.setDimension(dimension)
-            if float(dimensionLimit[dimension]) > 20000:
-                template.setLimit("20000")
-                limit = "20000"
-            else:
-                template.setLimit(dimensionLimit[dimension])
-                limit = dimensionLimit[dimension]
-            ### if we need to add filters
-            if dimension == dimensions[0]:
-                if self.loggingEnabled:
-                    self.logger.debug(f"Starting first iteration: {dimension}")
-                request = template.to_dict()
-                res = self.getReport(
-                    request=request,
-                    n_results=dimensionLimit[dimension],
-                    limit=limit,
-                )
-                dataframe = res.dataframe
-                dict_breakdown_itemId[list_breakdown[level]] = list(dataframe["itemId"])
-                ### ex : {'dimension1' : [itemID1,itemID2,...]}
-                translate_itemId_value[dimension] = {
-                    itemId: value
-                    for itemId, value in zip(
-                        list(dataframe["itemId"]), list(dataframe.iloc[:, 1])
-                    )
-                }  ### {"dimension1":{'itemIdValue':'realValue'}}
-            else:  ### starting breakdowns
+            with self.connector._span(
+                "getMultidimensionalReport.level", level=level, dimension=dimension, calls=len(parents)
+            ):
+                template.setDimension(dimension)
+                if float(dimensionLimit[dimension]) > 20000:
+                    template.setLimit("20000")
+                    limit = "20000"
+                else:
+                    template.setLimit(dimensionLimit[dimension])
+                    limit = dimensionLimit[dimension]
                 if self.loggingEnabled:
-                    self.logger.debug(f"Starting breakdowns")
-                for itemId in dict_breakdown_itemId[dimension]:
-                    ### for each item in the previous element
-                    if level > 1:
-                        ## adding previous breakdown value to the metric filter
-                        original_filterId = dict_breakdown_relation[itemId]
+                    self.logger.debug(f"level {level}: {dimension}, {len(parents)} report(s)")
+                frames = []
+                children = []
+                for breakdownFilters, values in parents:
+                    breakdown = RequestCreator(template.to_dict())
+                    for filterId in breakdownFilters:
                         for metric in metrics:
-                            template.addMetricFilter(
-                                metricId=metric, filterId=original_filterId
-                            )
-                    filterId = f"{dimensions[level - 1]}:::{itemId}"
-                    for metric in metrics:
-                        template.addMetricFilter(metricId=metric, filterId=filterId)
-                    request = template.to_dict()
-                    if self.loggingEnabled:
-                        self.logger.info(json.dumps(request, indent=4))
+                            breakdown.addMetricFilter(metricId=metric, filterId=filterId)
+                    request = breakdown.to_dict()
+                    if self.loggingEnabled and self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug(json.dumps(request, indent=4))
                     res = self.getReport(
                         request=request,
                         n_results=dimensionLimit[dimension],
                         limit=limit,
                     )
-                    ## cleaning breakdown filters
-                    template.removeMetricFilter(filterId=filterId)
-                    if level > 1:
-                        original_filterId = dict_breakdown_relation[itemId]
-                        template.removeMetricFilter(filterId=original_filterId)
-                    if self.loggingEnabled:
-                        self.logger.debug(json.dumps(template.to_dict(), indent=4))
                     dataframe = res.dataframe
-                    list_itemIds = list(dataframe["itemId"])
-                    dict_breakdown_itemId[dimension] = list_itemIds
-                    ### ex : {'dimension2' : [itemID1,itemID2,...]}
-                    dict_breakdown_relation = {
-                        itemId: filterId for itemId in list_itemIds
-                    }
-                    ## translating itemId to value
-                    ## {'dimension1':{'itemId':'value'}}
-                    translate_itemId_value[dimension] = {
-                        itemId: value
+                    ## in case breakdown doesn't have values.
+                    if dataframe.empty:
+                        continue
+                    ### ex : (["dimension1:::itemId1", "dimension2:::itemId2"], {"dimension1": "value1", "dimension2": "value2"})
+                    children += [
+                        (breakdownFilters + [f"{dimension}:::{itemId}"], {**values, dimension: value})
                         for itemId, value in zip(
                             list(dataframe["itemId"]), list(dataframe.iloc[:, 1])
                         )
-                    }
-                    ## in case breakdown doesn't have values.
-                    if dataframe.empty == False:
-                        nb_metrics = len(metrics)
-                        metricsCols = list(dataframe.columns[-nb_metrics:])
-                        dictReplace = {
-                            oldColName: newColName
-                            for oldColName, newColName in zip(metricsCols, metrics)
-                        }
-                        dataframe.rename(columns=dictReplace, inplace=True)
-                        columns_order = deque(dataframe.columns)
-                        for lvl in range(level):
-                            dataframe[dimensions[lvl]] = translate_itemId_value[
-                                dimensions[lvl]
-                            ].get(itemId, itemId)
-                            columns_order.appendleft(dimensions[lvl])
-                        if df_final.empty:
-                            df_final = dataframe
-                        else:
-                            df_final = df_final.append(dataframe, ignore_index=True)
-                    df_final = df_final[columns_order]
+                    ]
+                    metricsCols = list(dataframe.columns[-len(metrics) :])
+                    dataframe = dataframe.rename(columns=dict(zip(metricsCols, metrics)))
+                    for previousDimension, value in values.items():
+                        dataframe[previousDimension] = value
+                    columns_order = list(values) + [
+                        column for column in dataframe.columns if column not in values
+                    ]
+                    frames.append(dataframe[columns_order])
+                parents = children
             level += 1
+        df_final = pd.concat(frames, ignore_index=True) if len(frames) > 0 else pd.DataFrame()
         workspace = Workspace(
             df_final,
             dataRequest=template.to_dict(),
@@ -2596,6 +3173,76 @@ class CJA:
         )
         return workspace
 
+    def _planMultidimensionalReport(
+        self,
+        dimensions: list = None,
+        dimensionLimit: dict = None,
+        dataViewId: str = None,
+        globalFilters: list = None,
+    ) -> RequestPlan:
+        """
+        Returns the RequestPlan of getMultidimensionalReport.
+        The number of items of each dimension is probed with getTopItems on the date range of the global filters,
+        the other filters are not applied so the plan is an upper bound.
+        """
+        plan = RequestPlan("getMultidimensionalReport", limits=self._rateLimits())
+        dateRange = None
+        for filter in globalFilters or []:
+            match = re.match(r"^(\d{4}-\d{2}-\d{2})T[^/]*/(\d{4}-\d{2}-\d{2})T", filter)
+            if match is not None:
+                dateRange = f"{match.group(1)}/{match.group(2)}"
+                break
+        parents = 1  ## number of item combinations of the previous levels
+        for level, dimension in enumerate(dimensions):
+            start = time.perf_counter()
+            try:
+                probe = self.getTopItems(dataViewId, dimension, dateRange=dateRange, limit=1)
+                cardinality = probe.get("totalElements")
+            except Exception:
+                cardinality = None
+            plan.addProbe(time.perf_counter() - start)
+            limit = float(dimensionLimit[dimension])
+            pageSize = 20000 if limit > 20000 else int(limit)
+            rows = min(limit, cardinality) if cardinality is not None else limit
+            if rows == float("inf"):
+                ## number of items unknown, counting one full page
+                rows = pageSize
+            plan.addStep(
+                dimension,
+                calls=parents,
+                pagesPerCall=pagesPerCall(rows, pageSize),
+                level=level,
+                limit=dimensionLimit[dimension],
+                cardinality=cardinality,
+            )
+            parents = int(parents * rows)
+        if self.loggingEnabled:
+            self.logger.info(str(plan))
+        return plan
+
+    def _maxWorkers(self, max_workers: int = None, default: int = 5) -> int:
+        """
+        Returns the number of threads of an executor: max_workers when set,
+        the highest limit of the AdaptiveConcurrencyLimiter of the connector when one is used, so the limiter decides how many requests are in flight,
+        the default otherwise.
+        Arguments:
+            max_workers : OPTIONAL : number of threads requested by the user.
+            default : OPTIONAL : number of threads when no limiter is used (default 5)
+        """
+        if max_workers is not None:
+            return max_workers
+        if self.connector.concurrencyLimiter is not None:
+            return self.connector.concurrencyLimiter.maxLimit
+        return default
+
+    def _rateLimits(self) -> list:
+        """
+        Returns the rate limits used by the connector, the CJA API limits when no RateLimiter is set.
+        """
+        if self.connector.rateLimiter is not None:
+            return self.connector.rateLimiter.limits
+        return None
+
     def getFreeformTable(
         self,
         dimension: str = None,
@@ -2607,7 +3254,7 @@ class CJA:
         filterId: str = None,
         search: Union[str, list] = None,
         search_operator: str = "OR",
-    ) -> pd.DataFrame:
+    ) -> "pd.DataFrame":
         """
         Retrieves a freeform table report with the specified parameters.
         
@@ -2714,7 +3361,7 @@ class CJA:
         fullPersonHistoryOnly: bool = False,
         removeSingleEventPeople: bool = False,
         filterId: str = None
-    ) -> pd.DataFrame:
+    ) -> "pd.DataFrame":
         """
         Retrieves a dataset where every row is a person profile.
         
@@ -1,11 +1,13 @@
 import json
 import os
+from copy import deepcopy
 from pathlib import Path
 from typing import Optional
 import time
 
 # Non standard libraries
 from .config import config_object, header
+from . import config
 
 
 def find_path(path: str) -> Optional[Path]:
@@ -62,6 +64,7 @@ def importConfigFile(
         path: str = None,
         auth_type: str = None,
         client_secret_index: int = 0,
+        credentialPool: bool = False,
         )-> None:
     """Reads the file denoted by the supplied `path` and retrieves the configuration information
     from it.
@@ -70,6 +73,8 @@ def importConfigFile(
         path: REQUIRED : path to the configuration file. Can be either a fully-qualified or relative.
         auth_type : OPTIONAL : type of authentication, either "jwt" or "oauthV2". Detected based on keys present in config file.
         client_secret_index : OPTIONAL : choose which of your client secrets that you want to use, specify the index, default 0.
+        credentialPool : OPTIONAL : If set to True, all of the client secrets are used (credential pool).
+            The requests are then routed to the least throttled credential.
     
     Example of path value.
     "config.json"
@@ -77,6 +82,23 @@ def importConfigFile(
     "/my-folder/config.json"
     """
 
+    args, list_secrets = _readConfigFile(path, auth_type, client_secret_index)
+    configure(**args)
+    if credentialPool and len(list_secrets) > 1:
+        config_object["credentialPool"] = [
+            {**config_object, "secret": secret, "date_limit": 0, "token": ""}
+            for secret in list_secrets
+        ]
+
+
+def _readConfigFile(
+        path: str = None,
+        auth_type: str = None,
+        client_secret_index: int = 0,
+        ) -> tuple:
+    """
+    Reads the configuration file and returns a tuple (arguments for configure, list of client secrets).
+    """
     config_file_path: Optional[Path] = find_path(path)
     if config_file_path is None:
         raise FileNotFoundError(
@@ -114,6 +136,7 @@ def importConfigFile(
         elif "SCOPES" in provided_keys:
             scopes = provided_config["SCOPES"]
         
+        list_secrets = client_secret if type(client_secret) == list else [client_secret]
         client_secret = client_secret[client_secret_index] if type(client_secret) == list else client_secret
         if auth_type is None:
             if 'scopes' in provided_keys:
@@ -131,7 +154,7 @@ def importConfigFile(
         elif auth_type == "oauthV2":
             scopes = ",".join(scopes) if type(scopes) == list else scopes
             args["scopes"] = scopes.replace(' ','')
-        configure(**args)
+        return args, list_secrets
 
 
 def configure(
@@ -153,6 +176,45 @@ def configure(
         private_key : REQUIRED : If you do not use a file but pass a variable directly.
         scopes : OPTIONAL : The scope define in your project for your API connection. Oauth V2, for clients and customers.
     """
+    newConfig = generateConfigObject(
+        org_id=org_id,
+        tech_id=tech_id,
+        secret=secret,
+        client_id=client_id,
+        path_to_key=path_to_key,
+        private_key=private_key,
+        scopes=scopes,
+        ims_endpoint=config_object["imsEndpoint"],
+    )
+    header["x-api-key"] = client_id
+    header["x-gw-ims-org-id"] = org_id
+    # ensure the reset of the state by overwriting possible values from previous import.
+    config_object.pop("credentialPool", None)
+    config_object.update(newConfig)
+
+
+def generateConfigObject(
+    org_id: str = None,
+    tech_id: str = None,
+    secret: str = None,
+    client_id: str = None,
+    path_to_key: str = None,
+    private_key: str = None,
+    scopes: str = None,
+    ims_endpoint: str = None,
+) -> dict:
+    """Returns a new configuration object from the values provided, without modifying the module configuration.
+    It can be passed as config_object to the CJA class or to the ConnectionManager to work with several organizations.
+    Arguments:
+        org_id : REQUIRED : Organization ID
+        tech_id : REQUIRED : Technical Account ID
+        secret : REQUIRED : secret generated for your connection
+        client_id : REQUIRED : The client_id (old api_key) provided by the JWT connection.
+        path_to_key : REQUIRED : If you have a file containing your private key value.
+        private_key : REQUIRED : If you do not use a file but pass a variable directly.
+        scopes : OPTIONAL : The scope define in your project for your API connection. Oauth V2, for clients and customers.
+        ims_endpoint : OPTIONAL : IMS endpoint to use (default "https://ims-na1.adobelogin.com")
+    """
     if not org_id:
         raise ValueError("`org_id` must be specified in the configuration.")
     if not client_id:
@@ -161,21 +223,47 @@ def configure(
         raise ValueError("either `scopes` needs to be specified or one of `private_key` or `path_to_key` with tech_id")
     if not secret:
         raise ValueError("`secret` must be specified in the configuration.")
-    config_object["org_id"] = org_id
-    config_object["client_id"] = client_id
-    header["x-api-key"] = client_id
-    header["x-gw-ims-org-id"] = org_id
-    config_object["tech_id"] = tech_id
-    config_object["secret"] = secret
-    config_object["pathToKey"] = path_to_key
-    config_object["private_key"] = private_key
-    config_object["scopes"] = scopes
-    config_object["jwtTokenEndpoint"] = f"{config_object['imsEndpoint']}/ims/exchange/jwt"
-    config_object["oauthTokenEndpointV2"] = f"{config_object['imsEndpoint']}/ims/token/v3"
+    newConfig = deepcopy(config.config_object)
+    newConfig.pop("credentialPool", None)
+    if ims_endpoint is not None:
+        newConfig["imsEndpoint"] = ims_endpoint
+    newConfig["org_id"] = org_id
+    newConfig["client_id"] = client_id
+    newConfig["tech_id"] = tech_id
+    newConfig["secret"] = secret
+    newConfig["pathToKey"] = path_to_key
+    newConfig["private_key"] = private_key
+    newConfig["scopes"] = scopes
+    newConfig["jwtTokenEndpoint"] = f"{newConfig['imsEndpoint']}/ims/exchange/jwt"
+    newConfig["oauthTokenEndpointV2"] = f"{newConfig['imsEndpoint']}/ims/token/v3"
+    newConfig["date_limit"] = 0
+    newConfig["token"] = ""
+    return newConfig
 
-    # ensure the reset of the state by overwriting possible values from previous import.
-    config_object["date_limit"] = 0
-    config_object["token"] = ""
+
+def generateConfigObjectFromFile(
+        path: str = None,
+        auth_type: str = None,
+        client_secret_index: int = 0,
+        credentialPool: bool = False,
+        ims_endpoint: str = None,
+        ) -> dict:
+    """Reads the configuration file and returns a new configuration object, without modifying the module configuration.
+    Arguments:
+        path: REQUIRED : path to the configuration file. Can be either a fully-qualified or relative.
+        auth_type : OPTIONAL : type of authentication, either "jwt" or "oauthV2". Detected based on keys present in config file.
+        client_secret_index : OPTIONAL : choose which of your client secrets that you want to use, specify the index, default 0.
+        credentialPool : OPTIONAL : If set to True, all of the client secrets are used (credential pool).
+        ims_endpoint : OPTIONAL : IMS endpoint to use (default "https://ims-na1.adobelogin.com")
+    """
+    args, list_secrets = _readConfigFile(path, auth_type, client_secret_index)
+    newConfig = generateConfigObject(**args, ims_endpoint=ims_endpoint)
+    if credentialPool and len(list_secrets) > 1:
+        newConfig["credentialPool"] = [
+            {**newConfig, "secret": secret}
+            for secret in list_secrets
+        ]
+    return newConfig
 
 
 def get_private_key_from_config(config: dict) -> str:
@@ -1,21 +1,280 @@
+import gzip
 import json
 import time
+import threading
 from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import nullcontext
+from typing import Union
+from urllib.parse import urlparse
 
 # Non standard libraries
 import requests
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ijson
+except ImportError:
+    ijson = None
 
 from cjapy import config, token_provider
+from .credentials import Credential, CredentialPool
+from .hedging import HedgingPolicy
+from .circuitbreaker import CircuitBreaker
+from .metrics import MetricsRegistry, endpointTemplate
+from .tracing import Tracer, currentSpan, propagate
+
+
+class JSONCodec:
+    """
+    Serialize the request bodies and parse the response bodies with the standard json library.
+    """
+
+    name = "json"
+
+    def dumps(self, data: object) -> bytes:
+        return json.dumps(data).encode("utf-8")
+
+    def loads(self, content: Union[bytes, str]) -> object:
+        return json.loads(content)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    Serialize and parse with orjson, directly from and to bytes.
+    Falls back on the standard library for the objects that orjson cannot serialize,
+    and for the bodies it refuses to parse (integers above 64 bits, NaN and Infinity).
+    """
+
+    name = "orjson"
+
+    def dumps(self, data: object) -> bytes:
+        try:
+            return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return super().dumps(data)
+
+    def loads(self, content: Union[bytes, str]) -> object:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            ## stricter than the json library, invalid JSON raises again from json.loads
+            return super().loads(content)
+
+
+def getCodec(codec: Union[str, JSONCodec] = None) -> JSONCodec:
+    """
+    Returns the codec to use for the JSON bodies.
+    Arguments:
+        codec : OPTIONAL : "orjson", "json" or a JSONCodec instance. By default, orjson when installed, json otherwise.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+    if codec is None:
+        codec = "orjson" if orjson is not None else "json"
+    if codec == "orjson":
+        if orjson is None:
+            raise ImportError("orjson is not installed, use pip install orjson")
+        return OrjsonCodec()
+    if codec == "json":
+        return JSONCodec()
+    raise ValueError(f"Unknown codec `{codec}`, possible values: 'orjson', 'json'")
+
+
+class JSONStream:
+    """
+    Iterate over the elements of an array of a JSON response while the response is downloaded.
+    The other keys of the response are available in the metadata attribute once the iteration is over.
+    Requires the ijson library for the incremental parsing, the whole body is parsed at once otherwise.
+    A throttling error returned with a success status (error code 429050) is only known once the body is read:
+    the request is then sent again with the retry function.
+    """
+
+    def __init__(
+        self,
+        response: requests.Response,
+        arrayKey: str = None,
+        codec: JSONCodec = None,
+        retry: callable = None,
+    ) -> None:
+        """
+        Arguments:
+            response : REQUIRED : response requested with stream=True.
+            arrayKey : OPTIONAL : key of the array to iterate over, None if the response is an array.
+            codec : OPTIONAL : codec used when ijson is not available or the response is an error.
+            retry : OPTIONAL : function without argument returning a new response, called when the body is a throttling error.
+        """
+        self.response = response
+        self.arrayKey = arrayKey
+        self.codec = codec or getCodec()
+        self.retry = retry
+        self.metadata = {}
+        self.found = False  ## True if the array has been found in the response
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.response.close()
+
+    def __iter__(self):
+        while True:
+            if self.response.status_code >= 400 or ijson is None:
+                yield from self.__iterParsed()
+            else:
+                yield from self.__iterStream()
+            ## an error body has no element, nothing has been returned before the retry
+            if self.retry is None or self.count > 0 or isThrottlingError(self.metadata) == False:
+                return
+            self.response.close()
+            self.response = self.retry()
+            self.metadata = {}
+            self.found = False
+
+    def __iterParsed(self):
+        try:
+            data = self.codec.loads(self.response.content)
+        except Exception:
+            if self.response.status_code == 504:
+                data = {"error-504": "504 Gateway Time-out"}
+            else:
+                data = {"error": f"Request Error, status: {self.response.status_code}"}
+        if self.arrayKey is None:
+            items = data if type(data) == list else []
+            self.metadata = {} if type(data) == list else data
+        else:
+            items = data.get(self.arrayKey, []) if type(data) == dict else []
+            self.metadata = data
+            if type(data) == dict and self.arrayKey in data:
+                self.found = True
+                self.metadata = {**data, self.arrayKey: []}
+        if type(data) == list and self.arrayKey is None:
+            self.found = True
+        for item in items:
+            self.count += 1
+            yield item
+
+    def __iterStream(self):
+        self.response.raw.decode_content = True
+        itemPrefix = "item" if self.arrayKey is None else f"{self.arrayKey}.item"
+        arrayPrefix = "" if self.arrayKey is None else self.arrayKey
+        root = ijson.ObjectBuilder()
+        builder = None
+        for prefix, event, value in ijson.parse(self.response.raw, use_float=True):
+            if prefix == itemPrefix or prefix.startswith(itemPrefix + "."):
+                if builder is None:
+                    builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+                if prefix == itemPrefix and event not in ("start_map", "start_array", "map_key"):
+                    ## end of the element (end of container or scalar value)
+                    self.count += 1
+                    yield builder.value
+                    builder = None
+                continue
+            if prefix == arrayPrefix and event == "start_array":
+                self.found = True
+            root.event(event, value)
+        value = root.value if hasattr(root, "value") else {}
+        if self.arrayKey is None:
+            ## an object instead of the array is an error body
+            self.metadata = value if type(value) == dict else {}
+        else:
+            self.metadata = value
+
+
+def isThrottlingError(body: object = None) -> bool:
+    """
+    Returns True when the parsed body is the throttling error of the API (error code 429050).
+    Arguments:
+        body : REQUIRED : parsed JSON body of a response.
+    """
+    if isinstance(body, dict) == False:
+        return False
+    errorCode = body.get("error_code", body.get("errorCode"))
+    return str(errorCode) == "429050"
+
+
+class SingleFlight:
+    """
+    Share a single execution between the concurrent calls using the same key.
+    The first caller executes the function, the others wait for its result.
+    Attributes:
+        hits : number of calls that received the result of another call.
+    """
+
+    class _Call:
+        def __init__(self) -> None:
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+            self.followers = 0
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.__calls = {}
+        self.__lock = threading.Lock()
+
+    def do(self, key: tuple, func: callable, copy: callable = None) -> tuple:
+        """
+        Returns a tuple (result, shared). shared is True when the result comes from another call.
+        Arguments:
+            key : REQUIRED : key identifying identical calls.
+            func : REQUIRED : function without argument to execute.
+            copy : OPTIONAL : function copying the result. When the result is shared, every caller (the first one included)
+                receives its own copy and the original is never returned, so a caller modifying its result does not affect the others.
+        """
+        with self.__lock:
+            call = self.__calls.get(key)
+            if call is None:
+                call = self._Call()
+                self.__calls[key] = call
+                leader = True
+            else:
+                self.hits += 1
+                call.followers += 1
+                leader = False
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+                raise
+            finally:
+                ## no follower can join once the call is removed, the number of followers is final
+                with self.__lock:
+                    del self.__calls[key]
+                call.event.set()
+            if copy is not None and call.followers > 0:
+                return copy(call.result), True
+            return call.result, False
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        if copy is not None:
+            return copy(call.result), True
+        return call.result, True
 
 
 class AdobeRequest:
     """
     Handle request to Audience Manager and taking care that the request have a valid token set each time.
+    An instance can be shared between threads: the token refresh is done by a single thread
+    and each request uses a snapshot of the header.
+    Several credentials can be used (credential pool), each request is then sent with the least throttled one.
     Attributes:
         restTime : Time to rest before sending new request when reaching too many request status code.
     """
 
     loggingEnabled = False
+    endpointFamilies = ("/reports", "/data/dataviews", "/filters", "/projects", "/auditlogs")
 
     def __init__(
         self,
@@ -25,6 +284,22 @@ class AdobeRequest:
         retry: int = 0,
         loggingEnabled: bool = False,
         logger: object = None,
+        tokenCache: Union[bool, str] = False,
+        backgroundRefresh: bool = False,
+        refreshMargin: int = 300,
+        credentials: list = None,
+        session: requests.Session = None,
+        semaphore: object = None,
+        rateLimiter: object = None,
+        coalesce: bool = True,
+        hedging: Union[bool, HedgingPolicy] = None,
+        concurrencyLimiter: object = None,
+        circuitBreaker: Union[bool, dict] = None,
+        codec: Union[str, JSONCodec] = None,
+        compressRequests: Union[bool, int] = False,
+        metrics: bool = False,
+        tracing: Union[bool, Tracer] = None,
+        transport: object = None,
     ) -> None:
         """
         Set the connector to be used for handling request to AAM
@@ -35,64 +310,529 @@ class AdobeRequest:
             retry : OPTIONAL : If you wish to retry failed GET requests
             loggingEnabled : OPTIONAL : if the logging is enable for that instance.
             logger : OPTIONAL : instance of the logger created
+            tokenCache : OPTIONAL : If set to True, the token is stored in and reused from a file shared between processes (~/.cjapy/token_cache.json).
+                You can also pass the path of the cache file.
+            backgroundRefresh : OPTIONAL : If set to True, a background thread renews the token before it expires.
+            refreshMargin : OPTIONAL : number of seconds before the token date limit when the background refresh happens (default 300)
+            credentials : OPTIONAL : list of additional configuration objects (other integrations or client secrets).
+                The requests are then routed to the least throttled credential.
+                The "credentialPool" key of the config_object (set by importConfigFile) is used the same way.
+            session : OPTIONAL : requests.Session to use, so the HTTP connections can be shared between connectors.
+                A new session is created by default.
+            semaphore : OPTIONAL : semaphore limiting the number of requests in flight, can be shared between connectors.
+            rateLimiter : OPTIONAL : RateLimiter instance (cjapy.ratelimit) applied before every request.
+            coalesce : OPTIONAL : If set to True (default), concurrent identical GET requests share a single HTTP call and its result.
+            hedging : OPTIONAL : HedgingPolicy instance (cjapy.hedging), or True for the default policy.
+                A duplicate of a GET request is sent when it has not answered after the threshold of the policy.
+            concurrencyLimiter : OPTIONAL : AdaptiveConcurrencyLimiter instance (cjapy.ratelimit), can be shared between connectors.
+                The number of requests in flight is adapted from the 429, 5xx and latency of the responses.
+            circuitBreaker : OPTIONAL : If set to True, a circuit breaker is used per endpoint family (endpointFamilies attribute).
+                A dictionary of CircuitBreaker arguments (failureRate, minRequests, window, openTime, halfOpenRequests) can be passed instead.
+                Requests to an open circuit raise a CircuitOpenError.
+            codec : OPTIONAL : codec of the JSON bodies, "orjson" or "json" (default orjson when installed)
+            compressRequests : OPTIONAL : If set to True, the POST, PUT and PATCH bodies larger than 16 KB are sent gzip encoded.
+                An integer sets the minimum size in bytes. The body is sent again uncompressed if the server answers 415.
+            metrics : OPTIONAL : If set to True, the requests are recorded per method and endpoint in a MetricsRegistry (metrics attribute).
+            tracing : OPTIONAL : Tracer instance (cjapy.tracing), or True for a new one (tracer attribute).
+                A span is recorded for each request, each attempt and each backoff, and for the high-level methods of the CJA class.
+            transport : OPTIONAL : object sending the requests instead of the session, with the same request method as requests.Session.
+                RecordTransport and ReplayTransport (cjapy.transport) record the requests in a cassette file and answer them offline.
         """
         if config_object["org_id"] == "":
             raise Exception(
                 "You have to upload the configuration file with importConfigFile method."
             )
-        self.config = deepcopy(config_object)
-        self.header = deepcopy(header)
         self.loggingEnabled = loggingEnabled
         self.logger = logger
         self.restTime = 30
         self.retry = retry
-        self.connectionType = 'oauthV2'
-        if self.config["token"] == "" or time.time() > self.config["date_limit"]:
-            if self.config["private_key"] is not None or self.config["pathToKey"] is not None:
-                self.connectionType = 'jwt'
-                token_and_expiry = token_provider.get_jwt_token_and_expiry_for_config(
-                    config=self.config, verbose=verbose
-                )
-            elif self.config["scopes"] is not None:
-                self.connectionType = 'oauthV2'
-                token_and_expiry = token_provider.get_oauth_token_and_expiry_for_config(
-                    config=self.config,
-                    verbose=verbose
+        if tokenCache == True:
+            self.tokenCache = token_provider.DEFAULT_TOKEN_CACHE
+        elif tokenCache:
+            self.tokenCache = tokenCache
+        else:
+            self.tokenCache = None
+        self.refreshMargin = refreshMargin
+        if transport is not None:
+            self.session = transport
+        else:
+            self.session = session if session is not None else requests.Session()
+        self.semaphore = semaphore
+        self.rateLimiter = rateLimiter
+        self.concurrencyLimiter = concurrencyLimiter
+        if circuitBreaker:
+            settings = circuitBreaker if type(circuitBreaker) == dict else {}
+            self.circuitBreakers = {
+                family: CircuitBreaker(family=family, **settings)
+                for family in self.endpointFamilies
+            }
+        else:
+            self.circuitBreakers = {}
+        self.codec = getCodec(codec)
+        self.metrics = MetricsRegistry() if metrics else None
+        self.tracer = Tracer() if tracing == True else (tracing or None)
+        ## Profiler set by CJA.profile
+        self.profiler = None
+        if compressRequests == True:
+            self.compressionThreshold = 16 * 1024
+        elif compressRequests:
+            self.compressionThreshold = int(compressRequests)
+        else:
+            self.compressionThreshold = None
+        self.acceptEncoding = ACCEPT_ENCODING
+        self.transferStats = {
+            "requests": 0,
+            "bytesSent": 0,
+            "bytesSentUncompressed": 0,
+            "bytesReceived": 0,
+            "bytesReceivedDecompressed": 0,
+        }
+        self.__uncompressedEndpoints = set()
+        self.__statsLock = threading.Lock()
+        self.singleFlight = SingleFlight() if coalesce else None
+        self.hedging = HedgingPolicy() if hedging == True else (hedging or None)
+        self.__hedgeExecutor = None
+        self.__hedgeLock = threading.Lock()
+        list_configs = config_object.get("credentialPool") or [config_object]
+        list_configs = list(list_configs) + list(credentials or [])
+        self.credentials = CredentialPool(
+            [
+                Credential(
+                    config_object=conf,
+                    header=header,
+                    tokenCache=self.tokenCache,
+                    refreshMargin=refreshMargin,
+                    loggingEnabled=loggingEnabled,
+                    logger=logger,
+                    verbose=verbose,
                 )
-            token = token_and_expiry["token"]
-            expiry = token_and_expiry["expiry"]
-            if self.loggingEnabled:
-                self.logger.info(f"token retrieved: {token}")
-            self.token = token
-            self.config["token"] = token
-            self.config["date_limit"] = time.time() + expiry - 500
-            self.header.update({"Authorization": f"Bearer {token}"})
+                for conf in list_configs
+            ]
+        )
+        if backgroundRefresh:
+            self.startBackgroundRefresh()
+
+    @property
+    def config(self) -> dict:
+        """
+        Configuration of the main credential.
+        """
+        return self.credentials.credentials[0].config
+
+    @property
+    def header(self) -> dict:
+        """
+        Header of the main credential.
+        """
+        return self.credentials.credentials[0].header
+
+    @property
+    def token(self) -> str:
+        """
+        Token of the main credential.
+        """
+        return self.credentials.credentials[0].token
+
+    @property
+    def connectionType(self) -> str:
+        return self.credentials.credentials[0].connectionType
+
+    def startBackgroundRefresh(self) -> None:
+        """
+        Start a daemon thread per credential that renews the token refreshMargin seconds before its date limit,
+        so requests never wait on IMS.
+        """
+        for credential in self.credentials.credentials:
+            credential.startBackgroundRefresh()
+
+    def stopBackgroundRefresh(self) -> None:
+        """
+        Stop the background token refresh threads.
+        """
+        for credential in self.credentials.credentials:
+            credential.stopBackgroundRefresh()
 
     def _checkingDate(self) -> None:
         """
-        Checking if the token is still valid
+        Checking if the tokens are still valid
         """
-        now = time.time()
-        if now > self.config["date_limit"]:
-            if self.loggingEnabled:
-                self.logger.warning("token expired. Trying to retrieve a new token")
-            if self.connectionType == 'jwt':
-                token_with_expiry = token_provider.get_jwt_token_and_expiry_for_config(
-                    config=self.config)
-            elif self.connectionType == 'oauthV2':
-                token_with_expiry = token_provider.get_oauth_token_and_expiry_for_config(
-                    config=self.config)
-            token = token_with_expiry["token"]
-            expiry = token_with_expiry["expiry"]
-            if self.loggingEnabled:
-                self.logger.info("new token retrieved : {token}")
-            self.config["token"] = token
-            self.config["date_limit"] = time.time() + expiry - 500
-            self.header.update({"Authorization": f"Bearer {token}"})
-            self.config["date_limit"] = (
-                time.time() + (token_with_expiry["expiry"]) - 500
-            )
-            
+        for credential in self.credentials.credentials:
+            credential.checkingDate()
+
+    def _endpointFamily(self, endpoint: str) -> str:
+        """
+        Returns the endpoint family of the URL (see endpointFamilies), None if it does not belong to one.
+        """
+        path = urlparse(endpoint).path
+        for family in self.endpointFamilies:
+            if path.startswith(family) or f"{family}/" in path or path.endswith(family):
+                return family
+        return None
+
+    def getCircuitStates(self) -> dict:
+        """
+        Returns the state of the circuit breaker of each endpoint family.
+        """
+        return {
+            family: breaker.getState()
+            for family, breaker in self.circuitBreakers.items()
+        }
+
+    def getStats(self) -> dict:
+        """
+        Returns the statistics of the connector: requests per endpoint (when metrics is enabled),
+        shared GET requests, bytes transferred, circuit breakers, hedging and concurrency limit.
+        """
+        stats = {
+            "endpoints": self.metrics.to_dict() if self.metrics is not None else {},
+            "coalescedRequests": self.singleFlight.hits if self.singleFlight is not None else 0,
+            "transfer": self.getTransferStats(),
+        }
+        if len(self.circuitBreakers) > 0:
+            stats["circuits"] = self.getCircuitStates()
+        if self.hedging is not None:
+            stats["hedging"] = {
+                "threshold": self.hedging.getThreshold(),
+                "requests": self.hedging.requests,
+                "hedges": self.hedging.hedges,
+                "hedgeWins": self.hedging.hedgeWins,
+            }
+        if self.concurrencyLimiter is not None:
+            stats["concurrencyLimit"] = round(self.concurrencyLimiter.limit, 2)
+        return stats
+
+    def _span(self, name: str, **attributes):
+        """
+        Returns a context manager opening a span when the tracing is enabled, a null context otherwise.
+        """
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(name, **attributes)
+
+    def _phase(self, name: str):
+        """
+        Returns a context manager attributing the time spent inside to a phase when the connector is profiled, a null context otherwise.
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(name)
+
+    def _isThrottled(self, res: requests.Response, stream: bool = False) -> bool:
+        """
+        Returns True when the response is a throttling response (429 status or 429050 error code).
+        """
+        if res.status_code == 429:
+            return True
+        if stream and res.status_code < 400:
+            ## do not download a streamed body
+            return False
+        ## the throttling error body is small, avoid parsing large responses
+        if len(res.content) >= 1024:
+            return False
+        try:
+            body = json.loads(res.content)
+        except ValueError:
+            return False
+        return isThrottlingError(body)
+
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        data: Union[str, bytes] = None,
+        headers: dict = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send the request with the least throttled credential.
+        When the response is a throttling response, the credential is put aside for restTime seconds
+        and the request is sent again, waiting only if all credentials are throttled.
+        Arguments:
+            method : REQUIRED : HTTP method
+            endpoint : REQUIRED : URL of the request
+            params : OPTIONAL : query parameters
+            data : OPTIONAL : body of the request, already serialized
+            headers : OPTIONAL : headers to use instead of the credential header
+            stream : OPTIONAL : If set to True, the body of the response is not downloaded before returning.
+        """
+        spanName = f"HTTP {method} {endpointTemplate(endpoint)}" if self.tracer is not None else None
+        with self._span(spanName, **{"http.method": method, "http.url": endpoint}) as span:
+            body, extraHeaders = self._encodeBody(method, endpoint, data)
+            while True:
+                with self._phase("network"):
+                    if self.hedging is not None and method == "GET" and stream == False:
+                        res, credential = self._hedgedSend(method, endpoint, params, body, headers)
+                    else:
+                        res, credential = self._send(method, endpoint, params, body, headers, extraHeaders, stream)
+                self._recordTransfer(data, body, res, stream)
+                if extraHeaders is not None and res.status_code == 415:
+                    ## the endpoint does not accept compressed bodies
+                    if self.loggingEnabled:
+                        self.logger.info(f"compressed body refused, sending it uncompressed: {endpoint}")
+                    with self.__statsLock:
+                        self.__uncompressedEndpoints.add(self._compressionKey(endpoint))
+                    body, extraHeaders = data, None
+                    if self.metrics is not None:
+                        self.metrics.recordRetry(method, endpoint)
+                    continue
+                if self.loggingEnabled:
+                    self.logger.debug(f"request_URL : {res.request.url}")
+                    self.logger.debug(f"status_code: {res.status_code}")
+                if span is not None:
+                    span.setAttribute("http.status_code", res.status_code)
+                if self._isThrottled(res, stream) == False:
+                    return res
+                credential.setThrottled(self.restTime)
+                sleepTime = self.credentials.waitTime()
+                if self.loggingEnabled:
+                    self.logger.info(
+                        f"Too many requests: retrying in {round(sleepTime, 1)} seconds"
+                    )
+                if kwargs.get("verbose", False):
+                    print(f"Too many requests: retrying in {round(sleepTime, 1)} seconds")
+                with self._span("backoff", seconds=round(sleepTime, 3)), self._phase("throttling"):
+                    time.sleep(sleepTime)
+                if self.metrics is not None:
+                    self.metrics.recordRetry(method, endpoint, sleepTime)
+
+    def _requestKey(
+        self, endpoint: str, params: dict = None, data: dict = None, headers: dict = None, **kwargs
+    ) -> tuple:
+        """
+        Returns the key identifying identical GET requests (URL, parameters and authentication).
+        """
+        if headers is not None:
+            auth = (headers.get("x-gw-ims-org-id"), headers.get("x-api-key"), headers.get("Authorization"))
+        else:
+            auth = (self.config["org_id"], self.config["client_id"])
+        return (
+            endpoint,
+            json.dumps(params, sort_keys=True, default=str),
+            json.dumps(data, sort_keys=True, default=str),
+            auth,
+            kwargs.get("legacy", False),
+        )
+
+    def _compressionKey(self, endpoint: str) -> str:
+        return self._endpointFamily(endpoint) or urlparse(endpoint).path
+
+    def _encodeBody(self, method: str, endpoint: str, data: bytes = None) -> tuple:
+        """
+        Returns a tuple (body, extra headers) with the body gzip encoded when compressRequests is used.
+        """
+        if (
+            data is None
+            or self.compressionThreshold is None
+            or method not in ("POST", "PUT", "PATCH")
+            or len(data) < self.compressionThreshold
+            or self._compressionKey(endpoint) in self.__uncompressedEndpoints
+        ):
+            return data, None
+        return gzip.compress(data, compresslevel=5), {"Content-Encoding": "gzip"}
+
+    def _recordTransfer(
+        self, data: bytes, body: bytes, res: requests.Response, stream: bool = False
+    ) -> None:
+        """
+        Record the bytes sent and received, before and after compression.
+        The bytes received are not recorded for streamed responses.
+        """
+        if stream:
+            with self.__statsLock:
+                self.transferStats["requests"] += 1
+                self.transferStats["bytesSent"] += len(body or b"")
+                self.transferStats["bytesSentUncompressed"] += len(data or b"")
+            return
+        decompressed = len(res.content)
+        received = None
+        try:
+            ## number of bytes read from the connection, before decoding
+            received = res.raw.tell()
+        except Exception:
+            pass
+        if not received:
+            contentLength = res.headers.get("Content-Length")
+            received = int(contentLength) if contentLength else decompressed
+        with self.__statsLock:
+            self.transferStats["requests"] += 1
+            self.transferStats["bytesSent"] += len(body or b"")
+            self.transferStats["bytesSentUncompressed"] += len(data or b"")
+            self.transferStats["bytesReceived"] += received
+            self.transferStats["bytesReceivedDecompressed"] += decompressed
+
+    def getTransferStats(self) -> dict:
+        """
+        Returns the bytes sent and received by the connector, compressed and uncompressed, with the compression ratios.
+        """
+        with self.__statsLock:
+            stats = dict(self.transferStats)
+        stats["sentRatio"] = round(stats["bytesSent"] / stats["bytesSentUncompressed"], 3) if stats["bytesSentUncompressed"] else None
+        stats["receivedRatio"] = round(stats["bytesReceived"] / stats["bytesReceivedDecompressed"], 3) if stats["bytesReceivedDecompressed"] else None
+        return stats
+
+    def _send(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        data: Union[str, bytes] = None,
+        headers: dict = None,
+        extraHeaders: dict = None,
+        stream: bool = False,
+    ) -> tuple:
+        """
+        Send the request once with the least throttled credential.
+        Returns a tuple (response, credential used).
+        """
+        if self.tracer is None:
+            return self._sendOnce(method, endpoint, params, data, headers, extraHeaders, stream)
+        with self.tracer.span("attempt") as span:
+            res, credential = self._sendOnce(method, endpoint, params, data, headers, extraHeaders, stream)
+            span.setAttribute("http.status_code", res.status_code)
+            return res, credential
+
+    def _sendOnce(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        data: Union[str, bytes] = None,
+        headers: dict = None,
+        extraHeaders: dict = None,
+        stream: bool = False,
+    ) -> tuple:
+        breaker = self.circuitBreakers.get(self._endpointFamily(endpoint))
+        ## checked first to fail fast, the probe slot is given back if the request is not sent
+        probe = breaker.before() if breaker is not None else False
+        recorded = False
+        try:
+            queued = 0
+            if self.rateLimiter is not None:
+                queued += self.rateLimiter.acquire()
+            if self.concurrencyLimiter is not None:
+                queued += self.concurrencyLimiter.acquire()
+            if queued > 0 and self.tracer is not None:
+                currentSpan().setAttribute("queued", round(queued, 4))
+            res = None
+            statusCode = None
+            start = time.perf_counter()
+            try:
+                credential = self.credentials.acquire()
+                try:
+                    with self._phase("auth"):
+                        credential.checkingDate()
+                    if self.semaphore is not None:
+                        self.semaphore.acquire()
+                    try:
+                        start = time.perf_counter()
+                        try:
+                            requestHeaders = credential.getHeaders(headers)
+                            requestHeaders.setdefault("Accept-Encoding", self.acceptEncoding)
+                            if extraHeaders is not None:
+                                requestHeaders.update(extraHeaders)
+                            res = self.session.request(
+                                method,
+                                endpoint,
+                                headers=requestHeaders,
+                                params=params,
+                                data=data,
+                                stream=stream,
+                            )
+                        except Exception:
+                            if breaker is not None:
+                                recorded = True
+                                breaker.record(False)
+                            raise
+                        if breaker is not None:
+                            recorded = True
+                            breaker.record(res.status_code < 500)
+                        if self.hedging is not None and method == "GET" and stream == False:
+                            ## the threshold is derived from the time on the network, not the time waited for the limiters
+                            self.hedging.record(time.perf_counter() - start)
+                        statusCode = 429 if self._isThrottled(res, stream) else res.status_code
+                    finally:
+                        if self.semaphore is not None:
+                            self.semaphore.release()
+                finally:
+                    self.credentials.release(credential)
+            finally:
+                latency = time.perf_counter() - start
+                if self.concurrencyLimiter is not None:
+                    self.concurrencyLimiter.release(latency, statusCode)
+                if self.metrics is not None:
+                    if res is None:
+                        size = 0
+                    elif stream:
+                        size = int(res.headers.get("Content-Length") or 0)
+                    else:
+                        size = len(res.content)
+                    self.metrics.recordQueue(method, endpoint, queued)
+                    self.metrics.recordRequest(method, endpoint, statusCode, latency, size)
+        except BaseException:
+            if probe and recorded == False:
+                breaker.release()
+            raise
+        return res, credential
+
+    def _hedgedSend(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict = None,
+        data: Union[str, bytes] = None,
+        headers: dict = None,
+    ) -> tuple:
+        """
+        Send the request and, if it has not answered after the threshold of the hedging policy,
+        send a duplicate when the budget allows it. The first response is returned, the other one is discarded.
+        """
+        if self.__hedgeExecutor is None:
+            with self.__hedgeLock:
+                if self.__hedgeExecutor is None:
+                    self.__hedgeExecutor = ThreadPoolExecutor(
+                        max_workers=32, thread_name_prefix="cjapy-hedge"
+                    )
+        args = (method, endpoint, params, data, headers)
+        self.hedging.start()
+        primary = self.__hedgeExecutor.submit(propagate(self._send), *args)
+        threshold = self.hedging.getThreshold()
+        if threshold is None:
+            return primary.result()
+        done, _ = wait([primary], timeout=threshold)
+        if len(done) > 0:
+            return primary.result()
+        breaker = self.circuitBreakers.get(self._endpointFamily(endpoint))
+        if breaker is not None and breaker.state != CircuitBreaker.CLOSED:
+            ## a half-open circuit only lets the probe through, the duplicate would fail or take another probe slot
+            return primary.result()
+        if self.hedging.allowHedge() == False:
+            return primary.result()
+        if self.loggingEnabled:
+            self.logger.debug(f"hedging GET request after {round(threshold, 3)} seconds: {endpoint}")
+        if self.tracer is not None:
+            currentSpan().setAttribute("hedged", True)
+        hedge = self.__hedgeExecutor.submit(propagate(self._send), *args)
+        done, _ = wait([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = primary if primary in done else hedge
+        loser = hedge if winner is primary else primary
+        if winner.exception() is not None and loser.exception() is None:
+            ## one of the requests failed, use the other one
+            winner, loser = loser, winner
+        if winner is hedge:
+            self.hedging.recordWin()
+        if loser.cancel() == False:
+            loser.add_done_callback(self.__discardResponse)
+        return winner.result()
+
+    @staticmethod
+    def __discardResponse(future) -> None:
+        if future.exception() is None:
+            res = future.result()[0]
+            if hasattr(res, "close"):
+                res.close()
+
     def getData(
         self,
         endpoint: str,
@@ -104,36 +844,42 @@ class AdobeRequest:
     ):
         """
         Abstraction for getting data
+        Concurrent identical requests share the same HTTP call, each caller receives its own copy of the result.
         """
-        internRetry = kwargs.get("retry", self.retry)
         expansion = kwargs.get("expansion")
         if expansion:
             params["expansion"] = expansion
-        self._checkingDate()
-        if headers is None:
-            headers = self.header
-        if params is None and data is None:
-            res = requests.get(endpoint, headers=headers)
-        elif params is not None and data is None:
-            res = requests.get(endpoint, headers=headers, params=params)
-        elif params is None and data is not None:
-            res = requests.get(endpoint, headers=headers, data=data)
-        elif params is not None and data is not None:
-            res = requests.get(endpoint, headers=headers, params=params, data=data)
+        if self.singleFlight is None:
+            return self._getData(endpoint, params=params, data=data, headers=headers, **kwargs)
+        key = self._requestKey(endpoint, params=params, data=data, headers=headers, **kwargs)
+        res_json, shared = self.singleFlight.do(
+            key,
+            lambda: self._getData(endpoint, params=params, data=data, headers=headers, **kwargs),
+            copy=deepcopy,
+        )
+        if shared and self.loggingEnabled:
+            self.logger.debug(f"GET request shared with a concurrent call: {endpoint}")
+        return res_json
+
+    def _getData(
+        self,
+        endpoint: str,
+        params: dict = None,
+        data: dict = None,
+        headers: dict = None,
+        *args,
+        **kwargs,
+    ):
+        """
+        Send the GET request and parse the response, retrying if requested.
+        """
+        internRetry = kwargs.get("retry", self.retry)
+        res = self._request("GET", endpoint, params=params, data=data, headers=headers, **kwargs)
         if self.loggingEnabled:
-            self.logger.debug(f"request_URL : {res.request.url}")
-            self.logger.debug(f"header used: {json.dumps(headers)}")
-            self.logger.debug(f"status_code: {res.status_code}")
-            self.logger.debug(f"parameters used: {json.dumps(params)}")
+            self.logger.debug(f"parameters used: {params}")
         try:
-            while str(res.status_code) == "429":
-                if self.loggingEnabled:
-                    self.logger.info(
-                        f"Too many requests: retrying in {self.restTime} seconds"
-                    )
-                time.sleep(self.restTime)
-                res = requests.get(endpoint, headers=headers, params=params, data=data)
-            res_json = res.json()
+            with self._phase("decode"):
+                res_json = self.codec.loads(res.content)
         except:
             ## handling 1.4
             if kwargs.get("legacy", False):
@@ -142,7 +888,7 @@ class AdobeRequest:
                 except:
                     if self.loggingEnabled:
                         self.logger.error(
-                            f"GET method failed: {res.status}, {res.status}"
+                            f"GET method failed: {res.status_code}, {res.text}"
                         )
                     return res.text
             res_json = {"error": "Request Error"}
@@ -153,18 +899,65 @@ class AdobeRequest:
                     print("Retry parameter activated")
                     print(f"{internRetry} retry left")
                 if "error" in res_json.keys():
-                    time.sleep(30)
-                    res_json = self.getData(
+                    with self._span("backoff", seconds=30), self._phase("throttling"):
+                        time.sleep(30)
+                    if self.metrics is not None:
+                        self.metrics.recordRetry("GET", endpoint, 30)
+                    kwargs["retry"] = internRetry - 1
+                    res_json = self._getData(
                         endpoint,
                         params=params,
                         data=data,
                         headers=headers,
-                        retry=internRetry - 1,
                         **kwargs,
                     )
                     return res_json
         return res_json
 
+    def streamData(
+        self,
+        method: str = "GET",
+        endpoint: str = None,
+        arrayKey: str = None,
+        params: dict = None,
+        data: dict = None,
+        headers: dict = None,
+        *args,
+        **kwargs,
+    ) -> JSONStream:
+        """
+        Send the request and returns a JSONStream iterating over the elements of an array of the response while it is downloaded.
+        Arguments:
+            method : OPTIONAL : HTTP method (default "GET")
+            endpoint : REQUIRED : URL of the request
+            arrayKey : OPTIONAL : key of the array to iterate over (ex: "rows", "content"), None if the response is an array.
+            params : OPTIONAL : query parameters
+            data : OPTIONAL : body of the request (not serialized)
+            headers : OPTIONAL : headers to use instead of the credential header
+        """
+        expansion = kwargs.get("expansion")
+        if expansion:
+            params["expansion"] = expansion
+        body = None
+        if data is not None:
+            body = data if method == "GET" else self.codec.dumps(data)
+        def send() -> requests.Response:
+            return self._request(
+                method, endpoint, params=params, data=body, headers=headers, stream=True, **kwargs
+            )
+
+        def retry() -> requests.Response:
+            ## the credential used is not known here, the rest time is waited before sending again
+            if self.loggingEnabled:
+                self.logger.info(f"Too many requests: retrying in {self.restTime} seconds")
+            with self._span("backoff", seconds=self.restTime), self._phase("throttling"):
+                time.sleep(self.restTime)
+            if self.metrics is not None:
+                self.metrics.recordRetry(method, endpoint, self.restTime)
+            return send()
+
+        return JSONStream(send(), arrayKey=arrayKey, codec=self.codec, retry=retry)
+
     def postData(
         self,
         endpoint: str,
@@ -180,31 +973,17 @@ class AdobeRequest:
         expansion = kwargs.get("expansion")
         if expansion:
             params["expansion"] = expansion
-        self._checkingDate()
-        if headers is None:
-            headers = self.header
-        if params is None and data is None:
-            res = requests.post(endpoint, headers=headers)
-        elif params is not None and data is None:
-            res = requests.post(endpoint, headers=headers, params=params)
-        elif params is None and data is not None:
-            res = requests.post(endpoint, headers=headers, data=json.dumps(data))
-        elif params is not None and data is not None:
-            res = requests.post(
-                endpoint, headers=headers, params=params, data=json.dumps(data)
-            )
-        if self.loggingEnabled:
-            self.logger.debug(f"request_URL : {res.request.url}")
-            self.logger.debug(f"status_code: {res.status_code}")
+        res = self._request(
+            "POST",
+            endpoint,
+            params=params,
+            data=self.codec.dumps(data) if data is not None else None,
+            headers=headers,
+            **kwargs,
+        )
         try:
-            while (
-                res.status_code == 429 or res.json().get("error_code", None) == "429050"
-            ):
-                if self.loggingEnabled:
-                    self.logger.warning(f"too many request: {res.status}, {res.text}")
-                time.sleep(30)
-                res = self.postData(endpoint, headers=headers, params=params, data=data)
-            res_json = res.json()
+            with self._phase("decode"):
+                res_json = self.codec.loads(res.content)
         except:
             ## handling 1.4
             if kwargs.get("legacy", False):
@@ -213,10 +992,10 @@ class AdobeRequest:
                 except:
                     if self.loggingEnabled:
                         self.logger.error(
-                            f"POST method failed: {res.status}, {res.text}"
+                            f"POST method failed: {res.status_code}, {res.text}"
                         )
                     return res.text
-            if res.status_code == '504':
+            if res.status_code == 504:
                 res_json = {"error-504": "504 Gateway Time-out"}
             else:
                 res_json = {"error": f"Request Error, status: {res.status_code}"}
@@ -234,32 +1013,20 @@ class AdobeRequest:
         """
         Abstraction for patching data
         """
-        self._checkingDate()
-        if headers is None:
-            headers = self.header
-        if params is not None and data is None:
-            res = requests.patch(endpoint, headers=headers, params=params)
-        elif params is None and data is not None:
-            res = requests.patch(endpoint, headers=headers, data=json.dumps(data))
-        elif params is not None and data is not None:
-            res = requests.patch(
-                endpoint, headers=headers, params=params, data=json.dumps(data)
-            )
-        if self.loggingEnabled:
-            self.logger.debug(f"request_URL : {res.request.url}")
-            self.logger.debug(f"status_code: {res.status_code}")
+        res = self._request(
+            "PATCH",
+            endpoint,
+            params=params,
+            data=self.codec.dumps(data) if data is not None else None,
+            headers=headers,
+            **kwargs,
+        )
         try:
-            while str(res.status_code) == "429":
-                if kwargs.get("verbose", False):
-                    print(f"Too many requests: retrying in {self.restTime} seconds")
-                time.sleep(self.restTime)
-                res = requests.patch(
-                    endpoint, headers=headers, params=params, data=json.dumps(data)
-                )
-            res_json = res.json()
+            with self._phase("decode"):
+                res_json = self.codec.loads(res.content)
         except:
             if self.loggingEnabled:
-                self.logger.error(f"PATCH method failed: {res.status}, {res.text}")
+                self.logger.error(f"PATCH method failed: {res.status_code}, {res.text}")
             res_json = {"error": "Request Error"}
         return res_json
 
@@ -278,29 +1045,20 @@ class AdobeRequest:
         expansion = kwargs.get("expansion")
         if expansion:
             params["expansion"] = expansion
-        self._checkingDate()
-        if headers is None:
-            headers = self.header
-        if params is not None and data is None:
-            res = requests.put(endpoint, headers=headers, params=params)
-        elif params is None and data is not None:
-            res = requests.put(endpoint, headers=headers, data=json.dumps(data))
-        elif params is not None and data is not None:
-            res = requests.put(
-                endpoint, headers=headers, params=params, data=json.dumps(data)
-            )
-        elif params is None and data is None:
-            res = requests.put(
-                endpoint, headers=headers
-            )
-        if self.loggingEnabled:
-            self.logger.debug(f"request_URL : {res.request.url}")
-            self.logger.debug(f"status_code: {res.status_code}")
+        res = self._request(
+            "PUT",
+            endpoint,
+            params=params,
+            data=self.codec.dumps(data) if data is not None else None,
+            headers=headers,
+            **kwargs,
+        )
         try:
-            status_code = res.json()
+            with self._phase("decode"):
+                status_code = self.codec.loads(res.content)
         except:
             if self.loggingEnabled:
-                self.logger.error(f"PUT method failed: {res.status}, {res.text}")
+                self.logger.error(f"PUT method failed: {res.status_code}, {res.text}")
             status_code = {"error": "Request Error"}
         return status_code
 
@@ -310,22 +1068,5 @@ class AdobeRequest:
         """
         Abstraction for deleting data
         """
-        self._checkingDate()
-        if headers is None:
-            headers = self.header
-        if params is None:
-            res = requests.delete(endpoint, headers=headers)
-        elif params is not None:
-            res = requests.delete(endpoint, headers=headers, params=params)
-        try:
-            while str(res.status_code) == "429":
-                if kwargs.get("verbose", False):
-                    print(f"Too many requests: retrying in {self.restTime} seconds")
-                time.sleep(self.restTime)
-                res = requests.delete(endpoint, headers=headers, params=params)
-            status_code = res.status_code
-        except:
-            if self.loggingEnabled:
-                self.logger.error(f"DELETE method failed: {res.status}, {res.text}")
-            status_code = {"error": "Request Error"}
-        return status_code
+        res = self._request("DELETE", endpoint, params=params, headers=headers, **kwargs)
+        return res.status_code
@@ -0,0 +1,229 @@
+import time
+import threading
+from collections import deque
+from copy import deepcopy
+
+from cjapy import config, token_provider
+
+
+class Credential:
+    """
+    A set of credentials (one integration or one client secret) with its own token lifecycle and throttling state.
+    The token refresh is done by a single thread at a time.
+    """
+
+    def __init__(
+        self,
+        config_object: dict = config.config_object,
+        header: dict = config.header,
+        tokenCache: str = None,
+        refreshMargin: int = 300,
+        loggingEnabled: bool = False,
+        logger: object = None,
+        verbose: bool = False,
+    ) -> None:
+        """
+        Instantiate the credential and retrieve its token if needed.
+        Arguments:
+            config_object : REQUIRED : configuration object of that credential.
+            header : OPTIONAL : base header, the x-api-key and x-gw-ims-org-id are set from the configuration.
+            tokenCache : OPTIONAL : path of the token cache file shared between processes.
+            refreshMargin : OPTIONAL : number of seconds before the token date limit when the background refresh happens (default 300)
+            loggingEnabled : OPTIONAL : if the logging is enable for that instance.
+            logger : OPTIONAL : instance of the logger created
+            verbose : OPTIONAL : display comment on the token retrieval.
+        """
+        self.config = deepcopy(config_object)
+        self.header = dict(header)
+        self.header["x-api-key"] = self.config["client_id"]
+        self.header["x-gw-ims-org-id"] = self.config["org_id"]
+        self.tokenCache = tokenCache
+        self.refreshMargin = refreshMargin
+        self.loggingEnabled = loggingEnabled
+        self.logger = logger
+        if self.config.get("private_key") is not None or self.config.get("pathToKey") is not None:
+            self.connectionType = 'jwt'
+        else:
+            self.connectionType = 'oauthV2'
+        ## throttling state
+        self.inFlight = 0
+        self.throttledUntil = 0
+        self.throttles = deque()  ## timestamps of the recent 429 responses
+        self.__tokenLock = threading.Lock()
+        self.__stopRefresh = threading.Event()
+        self.__refreshThread = None
+        if self.config["token"] == "" or time.time() > self.config["date_limit"]:
+            self.retrieveToken(verbose=verbose)
+        else:
+            self.setToken(self.config["token"], self.config["date_limit"])
+
+    @property
+    def clientId(self) -> str:
+        return self.config["client_id"]
+
+    def retrieveToken(self, verbose: bool = False, useCache: bool = True) -> None:
+        """
+        Retrieve a token, from the token cache when enabled or from IMS, and set it on the credential.
+        Arguments:
+            verbose : OPTIONAL : display comment on the token retrieval.
+            useCache : OPTIONAL : read the token cache before requesting IMS (default True)
+        """
+        if self.tokenCache is not None and useCache:
+            cached = token_provider.get_cached_token(
+                self.config, path=self.tokenCache, margin=self.refreshMargin
+            )
+            if cached is not None:
+                if self.loggingEnabled:
+                    self.logger.info("token retrieved from the token cache")
+                self.setToken(cached["token"], cached["date_limit"])
+                return
+        if self.connectionType == 'jwt':
+            token_and_expiry = token_provider.get_jwt_token_and_expiry_for_config(
+                config=self.config, verbose=verbose
+            )
+        elif self.connectionType == 'oauthV2':
+            token_and_expiry = token_provider.get_oauth_token_and_expiry_for_config(
+                config=self.config,
+                verbose=verbose
+            )
+        token = token_and_expiry["token"]
+        expiry = token_and_expiry["expiry"]
+        if self.loggingEnabled:
+            self.logger.info("token retrieved from IMS")
+        date_limit = time.time() + expiry - 500
+        self.setToken(token, date_limit)
+        if self.tokenCache is not None:
+            token_provider.save_token_in_cache(
+                self.config, token, date_limit, path=self.tokenCache
+            )
+
+    def setToken(self, token: str, date_limit: float) -> None:
+        """
+        Set the token and its date limit on the credential.
+        The header is replaced, never modified, so snapshots taken by running requests stay consistent.
+        """
+        header = dict(self.header)
+        header["Authorization"] = f"Bearer {token}"
+        self.token = token
+        self.header = header
+        self.config["token"] = token
+        self.config["date_limit"] = date_limit
+
+    def checkingDate(self) -> None:
+        """
+        Checking if the token is still valid, retrieve a new one otherwise.
+        """
+        if time.time() > self.config["date_limit"]:
+            with self.__tokenLock:
+                ## another thread may have refreshed the token while waiting for the lock
+                if time.time() > self.config["date_limit"]:
+                    if self.loggingEnabled:
+                        self.logger.warning("token expired. Trying to retrieve a new token")
+                    self.retrieveToken()
+
+    def getHeaders(self, headers: dict = None) -> dict:
+        """
+        Returns a copy of the headers to use for a request.
+        Arguments:
+            headers : OPTIONAL : headers passed to the request, the credential header is used if None.
+        """
+        if headers is None:
+            return dict(self.header)
+        return dict(headers)
+
+    def setThrottled(self, restTime: float = 30) -> None:
+        """
+        Register a 429 response for that credential. It will not be used for restTime seconds.
+        Arguments:
+            restTime : OPTIONAL : number of seconds to wait before using that credential again.
+        """
+        now = time.time()
+        self.throttledUntil = max(self.throttledUntil, now + restTime)
+        self.throttles.append(now)
+
+    def throttleScore(self, now: float = None, window: int = 60) -> tuple:
+        """
+        Returns a tuple used to sort the credentials from the least to the most throttled.
+        (currently throttled, number of 429 in the window, requests in flight)
+        """
+        now = now or time.time()
+        while len(self.throttles) > 0 and self.throttles[0] < now - window:
+            self.throttles.popleft()
+        return (self.throttledUntil > now, len(self.throttles), self.inFlight)
+
+    def startBackgroundRefresh(self) -> None:
+        """
+        Start a daemon thread that renews the token refreshMargin seconds before its date limit.
+        """
+        if self.__refreshThread is not None and self.__refreshThread.is_alive():
+            return
+        self.__stopRefresh.clear()
+        self.__refreshThread = threading.Thread(
+            target=self.__backgroundRefresh, name="cjapy-token-refresh", daemon=True
+        )
+        self.__refreshThread.start()
+
+    def stopBackgroundRefresh(self) -> None:
+        """
+        Stop the background token refresh thread.
+        """
+        self.__stopRefresh.set()
+        if self.__refreshThread is not None:
+            self.__refreshThread.join(timeout=5)
+        self.__refreshThread = None
+
+    def __backgroundRefresh(self) -> None:
+        wait = self.config["date_limit"] - self.refreshMargin - time.time()
+        while self.__stopRefresh.wait(max(wait, 1)) == False:
+            try:
+                with self.__tokenLock:
+                    self.retrieveToken()
+                wait = self.config["date_limit"] - self.refreshMargin - time.time()
+            except Exception as e:
+                if self.loggingEnabled:
+                    self.logger.warning(f"background token refresh failed: {e}")
+                wait = 30
+
+
+class CredentialPool:
+    """
+    Hold several credentials and route each request to the least throttled one.
+    """
+
+    def __init__(self, credentials: list = None) -> None:
+        """
+        Arguments:
+            credentials : REQUIRED : list of Credential instances.
+        """
+        if credentials is None or len(credentials) == 0:
+            raise ValueError("Require at least one credential")
+        self.credentials = list(credentials)
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.credentials)
+
+    def acquire(self) -> Credential:
+        """
+        Returns the least throttled credential and count it as in flight.
+        The release method has to be called once the request is done.
+        """
+        with self.__lock:
+            now = time.time()
+            credential = min(self.credentials, key=lambda cred: cred.throttleScore(now))
+            credential.inFlight += 1
+        return credential
+
+    def release(self, credential: Credential) -> None:
+        """
+        Mark the request done on that credential.
+        """
+        with self.__lock:
+            credential.inFlight -= 1
+
+    def waitTime(self) -> float:
+        """
+        Returns the number of seconds before a credential can be used again (0 if one is available).
+        """
+        now = time.time()
+        return max(0, min(cred.throttledUntil for cred in self.credentials) - now)
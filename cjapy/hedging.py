@@ -0,0 +1,100 @@
+import threading
+from collections import deque
+
+
+class HedgingPolicy:
+    """
+    Define when a duplicate (hedge) of an idempotent GET request is sent.
+    If the request has not answered after the threshold, a duplicate is sent and the first response is used.
+    The threshold is either static or derived from the percentile of the latencies observed.
+    The budget limits the hedges to a share of the requests, so hedging does not amplify the load.
+    """
+
+    def __init__(
+        self,
+        threshold: float = None,
+        percentile: int = 95,
+        budget: float = 0.05,
+        minSamples: int = 20,
+        window: int = 1000,
+        minThreshold: float = 0.05,
+    ) -> None:
+        """
+        Arguments:
+            threshold : OPTIONAL : static number of seconds before sending the hedge.
+                If not set, the percentile of the latencies observed is used.
+            percentile : OPTIONAL : percentile of the latencies used as threshold (default 95)
+            budget : OPTIONAL : maximum share of the requests that can be hedged (default 0.05)
+            minSamples : OPTIONAL : number of latencies to observe before hedging with a derived threshold (default 20)
+            window : OPTIONAL : number of latest latencies kept to compute the percentile (default 1000)
+            minThreshold : OPTIONAL : lowest threshold in seconds (default 0.05)
+        """
+        if budget < 0 or budget > 1:
+            raise ValueError("budget has to be between 0 and 1")
+        self.threshold = threshold
+        self.percentile = percentile
+        self.budget = budget
+        self.minSamples = minSamples
+        self.minThreshold = minThreshold
+        self.requests = 0
+        self.hedges = 0
+        self.hedgeWins = 0
+        self.__latencies = deque(maxlen=window)
+        self.__samples = 0
+        self.__derived = None
+        self.__lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"HedgingPolicy(threshold={self.getThreshold()}, requests={self.requests}, hedges={self.hedges}, hedgeWins={self.hedgeWins})"
+
+    def record(self, latency: float) -> None:
+        """
+        Record the latency of a request, the time on the network only (without the time waited for the limiters).
+        Arguments:
+            latency : REQUIRED : latency in seconds.
+        """
+        with self.__lock:
+            self.__latencies.append(latency)
+            self.__samples += 1
+            ## the percentile is recomputed every few samples only, the length of a full window does not change
+            if self.__derived is None or self.__samples % 20 == 0:
+                self.__derived = self.__computePercentile()
+
+    def __computePercentile(self) -> float:
+        if len(self.__latencies) < self.minSamples:
+            return None
+        values = sorted(self.__latencies)
+        index = min(len(values) - 1, int(len(values) * self.percentile / 100))
+        return max(values[index], self.minThreshold)
+
+    def getThreshold(self) -> float:
+        """
+        Returns the number of seconds before sending a hedge, None if hedging is not possible yet.
+        """
+        if self.threshold is not None:
+            return self.threshold
+        return self.__derived
+
+    def start(self) -> None:
+        """
+        Count a new request.
+        """
+        with self.__lock:
+            self.requests += 1
+
+    def allowHedge(self) -> bool:
+        """
+        Returns True and count the hedge if the budget allows it.
+        """
+        with self.__lock:
+            if self.hedges + 1 > self.budget * self.requests:
+                return False
+            self.hedges += 1
+            return True
+
+    def recordWin(self) -> None:
+        """
+        Count a hedge that answered before the original request.
+        """
+        with self.__lock:
+            self.hedgeWins += 1
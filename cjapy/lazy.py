@@ -0,0 +1,40 @@
+import sys
+import importlib
+
+
+class LazyModule:
+    """
+    Stand-in of a module imported on the first access to one of its attributes.
+    Used for the heavy dependencies (pandas, numpy) so importing cjapy stays fast.
+    """
+
+    def __init__(self, name: str = None) -> None:
+        """
+        Arguments:
+            name : REQUIRED : name of the module to import.
+        """
+        if name is None:
+            raise ValueError("Require a module name")
+        self.__name = name
+        self.__module = None
+
+    def _load(self) -> object:
+        if self.__module is None:
+            ## the import system lock makes the concurrent first accesses safe
+            self.__module = importlib.import_module(self.__name)
+        return self.__module
+
+    def __getattr__(self, attribute: str) -> object:
+        return getattr(self._load(), attribute)
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.__module is not None else "not loaded"
+        return f"<lazy module '{self.__name}' ({state})>"
+
+
+def isDataFrame(element: object = None) -> bool:
+    """
+    Returns True if the element is a pandas DataFrame, without importing pandas when it has not been imported yet.
+    """
+    pandas = sys.modules.get("pandas")
+    return pandas is not None and isinstance(element, pandas.DataFrame)
@@ -0,0 +1,151 @@
+import threading
+from copy import deepcopy
+
+# Non standard libraries
+import requests
+from requests.adapters import HTTPAdapter
+
+from cjapy import config, configs
+from .cjapy import CJA
+from .ratelimit import RateLimiter
+
+
+class ConnectionManager:
+    """
+    Create and hold the CJA instances of several organizations from explicit configuration objects.
+    The module configuration (importConfigFile / configure) is not used nor modified.
+    All instances share the same HTTP connection pool and a global limit of requests in flight.
+    Each organization keeps its own tokens, rate limiter and cached elements.
+    """
+
+    def __init__(
+        self,
+        maxConcurrency: int = 20,
+        poolSize: int = None,
+        rateLimits: list = None,
+        loggingObject: dict = None,
+        **kwargs,
+    ) -> None:
+        """
+        Instantiate the manager.
+        Arguments:
+            maxConcurrency : OPTIONAL : maximum number of requests in flight for all organizations (default 20)
+            poolSize : OPTIONAL : number of connections kept open per host (default maxConcurrency)
+            rateLimits : OPTIONAL : limits applied to each organization, list of tuple (number of requests, period in seconds).
+                Default [(12, 6), (120, 60)]
+            loggingObject : OPTIONAL : logging object used for the CJA instances created.
+        Possible kwargs:
+            Any parameter of the CJA class (tokenCache, backgroundRefresh, etc...), used for every organization.
+        """
+        self.maxConcurrency = maxConcurrency
+        self.rateLimits = rateLimits
+        self.loggingObject = loggingObject
+        self.kwargs = kwargs
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10, pool_maxsize=poolSize or maxConcurrency
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.semaphore = threading.BoundedSemaphore(maxConcurrency)
+        self.__orgs = {}
+        self.__lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"ConnectionManager(orgs={self.orgs}, maxConcurrency={self.maxConcurrency})"
+
+    def __str__(self) -> str:
+        return self.__repr__()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __getitem__(self, name: str) -> CJA:
+        return self.getCJA(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.__orgs
+
+    def __len__(self) -> int:
+        return len(self.__orgs)
+
+    @property
+    def orgs(self) -> list:
+        """
+        List of the organization names registered.
+        """
+        return list(self.__orgs.keys())
+
+    def addOrg(
+        self,
+        name: str = None,
+        config_object: dict = None,
+        path: str = None,
+        **kwargs,
+    ) -> CJA:
+        """
+        Create the CJA instance of an organization and register it.
+        Arguments:
+            name : OPTIONAL : name used to retrieve the instance (default the org_id)
+            config_object : OPTIONAL : configuration object returned by generateConfigObject.
+            path : OPTIONAL : path to a configuration file, if no config_object is passed.
+        Possible kwargs:
+            credentialPool : used with the path, if all of the client secrets are used.
+            Any parameter of the CJA class, overriding the ones of the manager.
+        """
+        if config_object is None and path is None:
+            raise ValueError("Require a config_object or a path to a configuration file")
+        if config_object is None:
+            config_object = configs.generateConfigObjectFromFile(
+                path, credentialPool=kwargs.pop("credentialPool", False)
+            )
+        if name is None:
+            name = config_object["org_id"]
+        options = {**self.kwargs, **kwargs}
+        options.setdefault("loggingObject", self.loggingObject)
+        cja = CJA(
+            config_object=deepcopy(config_object),
+            header=deepcopy(config.header),
+            session=self.session,
+            semaphore=self.semaphore,
+            rateLimiter=RateLimiter(self.rateLimits),
+            **options,
+        )
+        with self.__lock:
+            previous = self.__orgs.get(name)
+            self.__orgs[name] = cja
+        if previous is not None:
+            previous.connector.stopBackgroundRefresh()
+        return cja
+
+    def getCJA(self, name: str = None) -> CJA:
+        """
+        Returns the CJA instance of an organization.
+        Arguments:
+            name : REQUIRED : name of the organization (or org_id) used in addOrg.
+        """
+        if name not in self.__orgs:
+            raise KeyError(f"No organization registered under the name `{name}`")
+        return self.__orgs[name]
+
+    def removeOrg(self, name: str = None) -> None:
+        """
+        Remove an organization and stop its background token refresh.
+        Arguments:
+            name : REQUIRED : name of the organization (or org_id) used in addOrg.
+        """
+        with self.__lock:
+            cja = self.__orgs.pop(name, None)
+        if cja is not None:
+            cja.connector.stopBackgroundRefresh()
+
+    def close(self) -> None:
+        """
+        Remove all of the organizations and close the HTTP connections.
+        """
+        for name in self.orgs:
+            self.removeOrg(name)
+        self.session.close()
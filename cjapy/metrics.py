@@ -0,0 +1,241 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+## upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, float("inf"))
+
+
+## segments followed by the ID of an element, unless the next segment is an action
+ID_COLLECTIONS = (
+    "dataviews",
+    "filters",
+    "calculatedmetrics",
+    "projects",
+    "annotations",
+    "dateranges",
+    "connections",
+    "shares",
+    "tags",
+    "assets",
+    "copy",
+)
+## segments followed by a component ID, that can contain "/" (ex: variables/page)
+COMPONENT_COLLECTIONS = ("dimensions", "metrics")
+ACTIONS = ("validate", "search", "functions", "topItems", "tagitems", "copy", "component", "counts", "transfer")
+## shapes of IDs found anywhere in the path: data views, filters and calculated metrics of an org, hex and numeric IDs
+ID_SHAPE = re.compile(r"(dv|dg)_\w+|(s|cm)\d+@AdobeOrg_\w+|.*@.*|[0-9a-fA-F]{16,}|\d+")
+
+
+def endpointTemplate(endpoint: str = None) -> str:
+    """
+    Returns the path of the URL with the IDs replaced by {id}, so the requests to the same endpoint are aggregated.
+    The IDs are found from their position (after a collection like dataviews or projects) or from their shape.
+    ex: "https://cja.adobe.io/data/dataviews/dv_123/dimensions/variables/page" -> "/data/dataviews/{id}/dimensions/{id}"
+    Arguments:
+        endpoint : REQUIRED : URL of the request.
+    """
+    path = urlparse(endpoint).path
+    segments = [segment for segment in path.strip("/").split("/") if segment != ""]
+    template = []
+    previous = None
+    for index, segment in enumerate(segments):
+        if previous in COMPONENT_COLLECTIONS:
+            ## the component ID is the rest of the path
+            template.append("{id}")
+            break
+        if ID_SHAPE.fullmatch(segment) or (previous in ID_COLLECTIONS and segment not in ACTIONS):
+            template.append("{id}")
+        else:
+            template.append(segment)
+        previous = segment if template[-1] != "{id}" else None
+    return "/" + "/".join(template)
+
+
+class Histogram:
+    """
+    Latency histogram with fixed buckets. The percentiles are estimated by interpolation in the buckets.
+    """
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, percent: float) -> float:
+        """
+        Returns the estimated value of the percentile (0-100), None if there is no observation.
+        """
+        if self.count == 0:
+            return None
+        rank = self.count * percent / 100
+        cumulative = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count > 0 and cumulative + count >= rank:
+                if bound == float("inf"):
+                    return lower
+                return lower + (bound - lower) * (rank - cumulative) / count
+            cumulative += count
+            if bound != float("inf"):
+                lower = bound
+        return lower
+
+
+class EndpointMetrics:
+    """
+    Metrics of a single method and endpoint template.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.throttled = 0
+        self.retries = 0
+        self.bytes = 0
+        self.backoffSeconds = 0.0
+        self.queueSeconds = 0.0
+        self.latency = Histogram()
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "backoffSeconds": round(self.backoffSeconds, 3),
+            "queueSeconds": round(self.queueSeconds, 3),
+            "latencySum": round(self.latency.sum, 3),
+            "p50": self.latency.percentile(50),
+            "p95": self.latency.percentile(95),
+            "p99": self.latency.percentile(99),
+        }
+
+
+class MetricsRegistry:
+    """
+    Record the requests of a connector per method and endpoint template:
+    count, latency histogram, response bytes, retries, 429 responses and time spent waiting.
+    """
+
+    def __init__(self) -> None:
+        self.__endpoints = {}
+        self.__lock = threading.Lock()
+
+    def __get(self, method: str, endpoint: str) -> EndpointMetrics:
+        key = (method, endpointTemplate(endpoint))
+        metrics = self.__endpoints.get(key)
+        if metrics is None:
+            metrics = self.__endpoints.setdefault(key, EndpointMetrics())
+        return metrics
+
+    def recordRequest(
+        self,
+        method: str,
+        endpoint: str,
+        statusCode: int = None,
+        latency: float = 0,
+        size: int = 0,
+    ) -> None:
+        """
+        Record a request sent.
+        Arguments:
+            method : REQUIRED : HTTP method
+            endpoint : REQUIRED : URL of the request
+            statusCode : OPTIONAL : status code of the response, None if there was no response.
+            latency : OPTIONAL : latency in seconds
+            size : OPTIONAL : size of the response in bytes
+        """
+        with self.__lock:
+            metrics = self.__get(method, endpoint)
+            metrics.count += 1
+            metrics.latency.observe(latency)
+            metrics.bytes += size
+            if statusCode is None or statusCode >= 400:
+                metrics.errors += 1
+            if statusCode == 429:
+                metrics.throttled += 1
+
+    def recordRetry(self, method: str, endpoint: str, backoff: float = 0) -> None:
+        """
+        Record a request sent again and the time spent sleeping before it.
+        """
+        with self.__lock:
+            metrics = self.__get(method, endpoint)
+            metrics.retries += 1
+            metrics.backoffSeconds += backoff
+
+    def recordQueue(self, method: str, endpoint: str, seconds: float = 0) -> None:
+        """
+        Record the time spent waiting for the rate limiter or the concurrency limiter.
+        """
+        if seconds <= 0:
+            return
+        with self.__lock:
+            self.__get(method, endpoint).queueSeconds += seconds
+
+    def reset(self) -> None:
+        """
+        Remove all of the metrics recorded.
+        """
+        with self.__lock:
+            self.__endpoints = {}
+
+    def to_dict(self) -> dict:
+        """
+        Returns the metrics as a dictionary {"METHOD /endpoint/template": metrics}
+        """
+        with self.__lock:
+            return {
+                f"{method} {template}": metrics.to_dict()
+                for (method, template), metrics in sorted(self.__endpoints.items())
+            }
+
+    def to_prometheus(self, prefix: str = "cjapy") -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        Arguments:
+            prefix : OPTIONAL : prefix of the metric names (default "cjapy")
+        """
+        counters = [
+            ("requests_total", "count", "Number of requests sent"),
+            ("errors_total", "errors", "Number of requests without response or with an error status"),
+            ("throttled_total", "throttled", "Number of 429 responses"),
+            ("retries_total", "retries", "Number of requests sent again"),
+            ("response_bytes_total", "bytes", "Bytes received"),
+            ("backoff_seconds_total", "backoffSeconds", "Seconds spent sleeping before a retry"),
+            ("queue_seconds_total", "queueSeconds", "Seconds spent waiting for the rate or concurrency limiter"),
+        ]
+        with self.__lock:
+            items = sorted(self.__endpoints.items())
+            lines = []
+            for name, attribute, description in counters:
+                lines.append(f"# HELP {prefix}_{name} {description}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                for (method, template), metrics in items:
+                    lines.append(
+                        f'{prefix}_{name}{{method="{method}",endpoint="{template}"}} {getattr(metrics, attribute)}'
+                    )
+            name = f"{prefix}_request_duration_seconds"
+            lines.append(f"# HELP {name} Latency of the requests")
+            lines.append(f"# TYPE {name} histogram")
+            for (method, template), metrics in items:
+                labels = f'method="{method}",endpoint="{template}"'
+                cumulative = 0
+                for bound, count in zip(metrics.latency.buckets, metrics.latency.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else bound
+                    lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f"{name}_sum{{{labels}}} {metrics.latency.sum}")
+                lines.append(f"{name}_count{{{labels}}} {metrics.latency.count}")
+        return "\n".join(lines) + "\n"
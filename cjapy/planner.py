@@ -0,0 +1,160 @@
+import math
+from typing import Union
+
+from .ratelimit import CJA_LIMITS
+
+
+def estimateDuration(
+    calls: int = 0, limits: list = None, latency: float = 1.0, concurrency: int = 1
+) -> float:
+    """
+    Returns the estimated number of seconds to send the calls, the longest of:
+    the time imposed by the rate limits (the buckets start full) and the time of the calls sent concurrency at a time.
+    Arguments:
+        calls : REQUIRED : number of requests
+        limits : OPTIONAL : list of tuple (number of requests, period in seconds). Default to the CJA API limits.
+        latency : OPTIONAL : average seconds per request (default 1)
+        concurrency : OPTIONAL : number of requests in flight (default 1)
+    """
+    if limits is None:
+        limits = CJA_LIMITS
+    rateBound = max(
+        (max(calls - capacity, 0) * period / capacity for capacity, period in limits),
+        default=0,
+    )
+    latencyBound = calls * (latency or 0) / max(concurrency, 1)
+    return max(rateBound, latencyBound)
+
+
+class RequestPlan:
+    """
+    Plan of the requests of a method run in dry-run mode: steps with their number of calls and pages per call,
+    the probes sent to build the plan and the estimated duration against the rate limits.
+    """
+
+    def __init__(
+        self,
+        method: str = None,
+        limits: list = None,
+        latency: float = None,
+        concurrency: int = 1,
+    ) -> None:
+        """
+        Arguments:
+            method : REQUIRED : name of the method planned
+            limits : OPTIONAL : rate limits used for the estimation, default to the CJA API limits.
+            latency : OPTIONAL : average seconds per request, measured by the probes when not set.
+            concurrency : OPTIONAL : number of requests in flight when the method runs (default 1)
+        """
+        self.method = method
+        self.limits = limits or CJA_LIMITS
+        self.latency = latency
+        self.concurrency = concurrency
+        self.steps = []
+        self.probes = 0
+        self.__latencies = []
+
+    def addStep(self, name: str = None, calls: int = 0, pagesPerCall: int = 1, **details) -> dict:
+        """
+        Add a step to the plan and returns it.
+        Arguments:
+            name : REQUIRED : name of the step (ex: the dimension of a breakdown level)
+            calls : REQUIRED : number of calls of the step
+            pagesPerCall : OPTIONAL : number of pages (requests) of each call (default 1)
+        Possible kwargs: details of the step kept in the plan (limit, cardinality...)
+        """
+        step = {"step": name, "calls": int(calls), "pagesPerCall": int(pagesPerCall)}
+        step.update(details)
+        step["requests"] = step["calls"] * step["pagesPerCall"]
+        self.steps.append(step)
+        return step
+
+    def addProbe(self, seconds: float = None) -> None:
+        """
+        Record a request sent to build the plan.
+        Arguments:
+            seconds : OPTIONAL : duration of the request, used to estimate the latency.
+        """
+        self.probes += 1
+        if seconds is not None:
+            self.__latencies.append(seconds)
+
+    @property
+    def requests(self) -> int:
+        """
+        Number of requests the method will send.
+        """
+        return sum(step["requests"] for step in self.steps)
+
+    @property
+    def averageLatency(self) -> float:
+        """
+        Latency used for the estimation: the one given, the average of the probes, or 1 second.
+        """
+        if self.latency is not None:
+            return self.latency
+        if len(self.__latencies) > 0:
+            return sum(self.__latencies) / len(self.__latencies)
+        return 1.0
+
+    def estimatedSeconds(self, limits: list = None, latency: float = None, concurrency: int = None) -> float:
+        """
+        Returns the estimated duration of the method in seconds.
+        Arguments:
+            limits : OPTIONAL : rate limits to use instead of the ones of the plan.
+            latency : OPTIONAL : average seconds per request to use instead of the ones of the plan.
+            concurrency : OPTIONAL : number of requests in flight to use instead of the one of the plan.
+        """
+        return estimateDuration(
+            self.requests,
+            limits=limits or self.limits,
+            latency=latency if latency is not None else self.averageLatency,
+            concurrency=concurrency or self.concurrency,
+        )
+
+    def to_dict(self) -> dict:
+        return {
+            "method": self.method,
+            "steps": self.steps,
+            "requests": self.requests,
+            "probes": self.probes,
+            "latency": round(self.averageLatency, 3),
+            "concurrency": self.concurrency,
+            "limits": [list(limit) for limit in self.limits],
+            "estimatedSeconds": round(self.estimatedSeconds(), 1),
+        }
+
+    def __str__(self) -> str:
+        lines = [f"{self.method} plan:"]
+        for step in self.steps:
+            details = ", ".join(
+                f"{key}: {value}"
+                for key, value in step.items()
+                if key not in ("step", "calls", "pagesPerCall", "requests")
+            )
+            lines.append(
+                f"  {step['step']}: {step['calls']} call(s) x {step['pagesPerCall']} page(s) = {step['requests']} request(s)"
+                + (f" ({details})" if details else "")
+            )
+        limits = ", ".join(f"{capacity}/{int(period)}s" for capacity, period in self.limits)
+        lines.append(
+            f"total: {self.requests} request(s), {self.probes} probe(s) sent, "
+            f"estimated duration: {round(self.estimatedSeconds() / 60, 1)} minutes "
+            f"(rate limits {limits}, {round(self.averageLatency, 2)}s per request)"
+        )
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return self.__str__()
+
+
+def pagesPerCall(rows: Union[int, float] = None, pageSize: int = 20000) -> int:
+    """
+    Returns the number of pages needed to retrieve the rows, at least 1.
+    Arguments:
+        rows : REQUIRED : number of rows expected, None or infinite when unknown (1 page is counted)
+        pageSize : OPTIONAL : number of rows per page (default 20000)
+    """
+    if rows is None or math.isinf(rows) or rows <= 0:
+        return 1
+    return max(math.ceil(rows / max(int(pageSize), 1)), 1)
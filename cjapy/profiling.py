@@ -0,0 +1,229 @@
+import io
+import time
+import pstats
+import cProfile
+import threading
+import functools
+import contextvars
+import tracemalloc
+from contextlib import ContextDecorator, contextmanager
+
+## phase of the time not spent in the other phases (parsing, pandas, user code)
+POST_PROCESSING = "post-processing"
+PHASES = ("auth", "network", "throttling", "decode", "name resolution", POST_PROCESSING)
+## profiler of the code running in this context, inherited by the threads through tracing.propagate
+_activeProfiler = contextvars.ContextVar("cjapy_active_profiler", default=None)
+
+
+def profiledPhase(name: str) -> callable:
+    """
+    Decorator of the CJA methods attributing their time to a phase when the instance is profiled.
+    Arguments:
+        name : REQUIRED : name of the phase.
+    """
+
+    def decorator(func: callable) -> callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            profiler = getattr(getattr(self, "connector", None), "profiler", None)
+            if profiler is None:
+                return func(self, *args, **kwargs)
+            with profiler.phase(name):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Profiler(ContextDecorator):
+    """
+    Attribute the wall time of the code executed inside to phases:
+    auth (token checks and retrieval), network (requests in flight and waiting for the limiters),
+    throttling (sleep before retrying a 429), decode (JSON parsing of the responses),
+    name resolution (getFilter / getCalculatedMetric calls made to name the columns) and post-processing (the rest).
+    The time of a phase excludes the time of the phases nested inside it, the inclusive time is reported as well
+    (ex: the name resolution including the requests it sends).
+    Only the code run by the thread entering the profiler, and by the threads it starts through tracing.propagate, is recorded:
+    the requests of other threads sharing the connector are ignored.
+    Can be used as a context manager or as a decorator.
+    """
+
+    def __init__(
+        self,
+        connector: object = None,
+        cprofile: bool = False,
+        memory: bool = False,
+        verbose: bool = True,
+        sortBy: str = "cumulative",
+        top: int = 25,
+    ) -> None:
+        """
+        Arguments:
+            connector : REQUIRED : AdobeRequest instance to profile.
+            cprofile : OPTIONAL : If set to True, the code is also profiled with cProfile (stats attribute).
+            memory : OPTIONAL : If set to True, the peak allocation of each phase is measured with tracemalloc.
+            verbose : OPTIONAL : If set to True (default), the breakdown is printed at the end.
+            sortBy : OPTIONAL : sort key of the cProfile statistics (default "cumulative")
+            top : OPTIONAL : number of functions displayed from the cProfile statistics (default 25)
+        """
+        if connector is None:
+            raise ValueError("Require a connector to profile")
+        self.connector = connector
+        self.cprofile = cprofile
+        self.memory = memory
+        self.verbose = verbose
+        self.sortBy = sortBy
+        self.top = top
+        self.wall = None
+        self.stats = None
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+        self.__reset()
+
+    def __reset(self) -> None:
+        self.seconds = {}
+        self.inclusive = {}
+        self.counts = {}
+        self.peaks = {}
+        self.__previous = None
+        self.__profile = None
+        self.__tracemalloc = False
+        self.__mark = 0
+        self.__start = None
+        self.__token = None
+
+    def __enter__(self) -> "Profiler":
+        self.__reset()
+        self.__previous = self.connector.profiler
+        self.connector.profiler = self
+        self.__token = _activeProfiler.set(self)
+        if self.memory:
+            self.__tracemalloc = tracemalloc.is_tracing() == False
+            if self.__tracemalloc:
+                tracemalloc.start()
+            self.__mark = tracemalloc.get_traced_memory()[0]
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+        if self.cprofile:
+            self.__profile = cProfile.Profile()
+            self.__profile.enable()
+        self.__local.stack = []
+        self.__start = time.perf_counter()
+        return self
+
+    def __exit__(self, *args) -> bool:
+        self.wall = time.perf_counter() - self.__start
+        self.__recordPeak()
+        if self.__profile is not None:
+            self.__profile.disable()
+            output = io.StringIO()
+            pstats.Stats(self.__profile, stream=output).sort_stats(self.sortBy).print_stats(self.top)
+            self.stats = output.getvalue()
+        if self.__tracemalloc:
+            tracemalloc.stop()
+        self.connector.profiler = self.__previous
+        _activeProfiler.reset(self.__token)
+        measured = sum(self.seconds.values())
+        self.seconds[POST_PROCESSING] = max(self.wall - measured, 0)
+        self.inclusive[POST_PROCESSING] = self.seconds[POST_PROCESSING]
+        self.counts.setdefault(POST_PROCESSING, 1)
+        if self.verbose:
+            print(self)
+        return False
+
+    def __stack(self) -> list:
+        stack = getattr(self.__local, "stack", None)
+        if stack is None:
+            stack = self.__local.stack = []
+        return stack
+
+    def __recordPeak(self) -> None:
+        """
+        Attribute the peak allocation since the last phase change to the phase running in this thread.
+        The peak is measured from the memory allocated at the phase change.
+        """
+        if self.memory == False or tracemalloc.is_tracing() == False:
+            return
+        stack = self.__stack()
+        active = stack[-1][0] if len(stack) > 0 else POST_PROCESSING
+        current, peak = tracemalloc.get_traced_memory()
+        with self.__lock:
+            self.peaks[active] = max(self.peaks.get(active, 0), peak - self.__mark)
+            self.__mark = current
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Context manager attributing the time spent inside to the phase.
+        Nothing is recorded when the profiler is not active in the current context (another thread using the connector).
+        Arguments:
+            name : REQUIRED : name of the phase.
+        """
+        if _activeProfiler.get() is not self:
+            yield
+            return
+        stack = self.__stack()
+        self.__recordPeak()
+        ## [name, start, time of the nested phases]
+        entry = [name, time.perf_counter(), 0.0]
+        stack.append(entry)
+        try:
+            yield
+        finally:
+            self.__recordPeak()
+            stack.pop()
+            duration = time.perf_counter() - entry[1]
+            ## a phase nested in itself is already in the inclusive time of the outer one
+            outermost = all(parent[0] != name for parent in stack)
+            with self.__lock:
+                self.seconds[name] = self.seconds.get(name, 0) + duration - entry[2]
+                if outermost:
+                    self.inclusive[name] = self.inclusive.get(name, 0) + duration
+                self.counts[name] = self.counts.get(name, 0) + 1
+            if len(stack) > 0:
+                stack[-1][2] += duration
+
+    def to_dict(self) -> dict:
+        """
+        Returns the breakdown: wall time, and for each phase the seconds (without the nested phases), share of the wall time,
+        inclusive seconds (with the nested phases), number of calls and peak allocation in bytes (when memory is used).
+        The phases of concurrent requests are added up, so their total can be greater than the wall time.
+        """
+        phases = {}
+        for name in list(PHASES) + sorted(set(self.seconds) - set(PHASES)):
+            if name not in self.seconds:
+                continue
+            phases[name] = {
+                "seconds": round(self.seconds[name], 4),
+                "share": round(self.seconds[name] / self.wall, 3) if self.wall else None,
+                "inclusiveSeconds": round(self.inclusive.get(name, self.seconds[name]), 4),
+                "count": self.counts.get(name, 0),
+            }
+            if self.memory:
+                phases[name]["peakBytes"] = self.peaks.get(name, 0)
+        result = {"wall": round(self.wall, 4) if self.wall is not None else None, "phases": phases}
+        if self.memory:
+            result["peakBytes"] = max(self.peaks.values()) if len(self.peaks) > 0 else 0
+        if self.stats is not None:
+            result["cprofile"] = self.stats
+        return result
+
+    def __str__(self) -> str:
+        if self.wall is None:
+            return "Profiler(not run)"
+        data = self.to_dict()
+        lines = [f"wall time: {data['wall']}s"]
+        for name, phase in data["phases"].items():
+            line = f"  {name:<16} {phase['seconds']:>9.4f}s {phase['share'] * 100 if phase['share'] is not None else 0:>6.1f}%  inclusive: {phase['inclusiveSeconds']:.4f}s  calls: {phase['count']}"
+            if self.memory:
+                line += f"  peak: {phase['peakBytes'] / 1024 / 1024:.2f} MB"
+            lines.append(line)
+        if self.stats is not None:
+            lines.append(self.stats)
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return self.__str__()
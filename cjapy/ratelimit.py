@@ -0,0 +1,178 @@
+import time
+import threading
+
+## limits of the CJA API: 12 requests every 6 seconds and 120 requests per minute
+CJA_LIMITS = [(12, 6), (120, 60)]
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter that can hold several windows at once.
+    By default, it follows the CJA API limits: 12 requests every 6 seconds and 120 requests per minute.
+    An instance can be shared between threads.
+    """
+
+    def __init__(self, limits: list = None) -> None:
+        """
+        Arguments:
+            limits : OPTIONAL : list of tuple (number of requests, period in seconds).
+                Default [(12, 6), (120, 60)]
+        """
+        if limits is None:
+            limits = CJA_LIMITS
+        if len(limits) == 0:
+            raise ValueError("Require at least one limit")
+        self.limits = [(int(capacity), float(period)) for capacity, period in limits]
+        now = time.monotonic()
+        self.__tokens = [float(capacity) for capacity, _ in self.limits]
+        self.__updated = [now for _ in self.limits]
+        self.__lock = threading.Lock()
+        self.waited = 0.0
+
+    def __refill(self, now: float) -> None:
+        for index, (capacity, period) in enumerate(self.limits):
+            elapsed = now - self.__updated[index]
+            self.__tokens[index] = min(
+                capacity, self.__tokens[index] + elapsed * capacity / period
+            )
+            self.__updated[index] = now
+
+    def tryAcquire(self) -> float:
+        """
+        Take a token in every bucket if possible.
+        Returns 0 when the tokens have been taken, otherwise the number of seconds to wait before retrying.
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__refill(now)
+            wait = 0.0
+            for index, (capacity, period) in enumerate(self.limits):
+                if self.__tokens[index] < 1:
+                    wait = max(
+                        wait, (1 - self.__tokens[index]) * period / capacity
+                    )
+            if wait == 0:
+                for index in range(len(self.limits)):
+                    self.__tokens[index] -= 1
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Block until a request can be sent. Returns the number of seconds waited.
+        """
+        waited = 0.0
+        wait = self.tryAcquire()
+        while wait > 0:
+            time.sleep(wait)
+            waited += wait
+            wait = self.tryAcquire()
+        if waited > 0:
+            with self.__lock:
+                self.waited += waited
+        return waited
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limit the number of requests in flight with an AIMD (additive increase, multiplicative decrease) controller.
+    The limit is raised while the responses are healthy and cut when a 429, a 5xx or a latency spike is observed.
+    A single instance can be shared between connectors and threads, so all parallel work uses the same budget.
+    """
+
+    def __init__(
+        self,
+        initialLimit: int = 4,
+        minLimit: int = 1,
+        maxLimit: int = 64,
+        increase: float = 1.0,
+        backoff: float = 0.5,
+        latencyThreshold: float = None,
+        spikeFactor: float = 3.0,
+        cooldown: float = None,
+    ) -> None:
+        """
+        Arguments:
+            initialLimit : OPTIONAL : number of requests in flight allowed at start (default 4)
+            minLimit : OPTIONAL : lowest limit (default 1)
+            maxLimit : OPTIONAL : highest limit (default 64)
+            increase : OPTIONAL : increase of the limit for a full window of healthy responses (default 1)
+            backoff : OPTIONAL : factor applied to the limit on failure (default 0.5)
+            latencyThreshold : OPTIONAL : latency in seconds above which a response is a failure.
+                If not set, a latency above spikeFactor times the average healthy latency is a failure.
+            spikeFactor : OPTIONAL : factor used to detect latency spikes (default 3)
+            cooldown : OPTIONAL : minimum number of seconds between two decreases,
+                so the responses of the same burst only cut the limit once (default the average latency)
+        """
+        if minLimit < 1 or maxLimit < minLimit:
+            raise ValueError("Require 1 <= minLimit <= maxLimit")
+        self.minLimit = minLimit
+        self.maxLimit = maxLimit
+        self.limit = float(min(max(initialLimit, minLimit), maxLimit))
+        self.increase = increase
+        self.backoff = backoff
+        self.latencyThreshold = latencyThreshold
+        self.spikeFactor = spikeFactor
+        self.cooldown = cooldown
+        self.inFlight = 0
+        self.decreases = 0
+        self.__averageLatency = None
+        self.__samples = 0
+        self.__lastDecrease = 0
+        self.__condition = threading.Condition()
+
+    def __repr__(self) -> str:
+        return f"AdaptiveConcurrencyLimiter(limit={round(self.limit, 2)}, inFlight={self.inFlight}, decreases={self.decreases})"
+
+    def acquire(self) -> float:
+        """
+        Block until a request can be sent. Returns the number of seconds waited.
+        """
+        start = time.monotonic()
+        with self.__condition:
+            while self.inFlight >= int(self.limit):
+                self.__condition.wait()
+            self.inFlight += 1
+        return time.monotonic() - start
+
+    def release(self, latency: float = None, statusCode: int = None) -> None:
+        """
+        Release the slot of a request and update the limit from its outcome.
+        Arguments:
+            latency : OPTIONAL : latency of the request in seconds.
+            statusCode : OPTIONAL : status code of the response, None if the request failed without response.
+        """
+        with self.__condition:
+            self.inFlight -= 1
+            if self.isFailure(latency, statusCode):
+                now = time.monotonic()
+                cooldown = self.cooldown
+                if cooldown is None:
+                    cooldown = self.__averageLatency or 0.1
+                if now - self.__lastDecrease >= cooldown:
+                    self.limit = max(self.minLimit, self.limit * self.backoff)
+                    self.__lastDecrease = now
+                    self.decreases += 1
+            else:
+                self.limit = min(self.maxLimit, self.limit + self.increase / self.limit)
+                if latency is not None:
+                    self.__samples += 1
+                    if self.__averageLatency is None:
+                        self.__averageLatency = latency
+                    else:
+                        self.__averageLatency += 0.1 * (latency - self.__averageLatency)
+            self.__condition.notify_all()
+
+    def isFailure(self, latency: float = None, statusCode: int = None) -> bool:
+        """
+        Returns True if the outcome of the request should reduce the limit.
+        """
+        if statusCode is None or statusCode == 429 or statusCode >= 500:
+            return True
+        if latency is None:
+            return False
+        if self.latencyThreshold is not None:
+            return latency > self.latencyThreshold
+        return (
+            self.__samples >= 10
+            and latency > self.spikeFactor * self.__averageLatency
+        )
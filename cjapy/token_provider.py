@@ -1,13 +1,23 @@
 import os
 import time
-from typing import Dict, Union
+import hashlib
+from contextlib import contextmanager
+from typing import Dict, Optional, Union
 
-import jwt
 import requests
 
 from cjapy import configs
 import json
 
+try:
+    import fcntl
+except ImportError:  ## Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
 
 def get_jwt_token_and_expiry_for_config(config: dict, verbose: bool = False, save: bool = False, *args, **kwargs) -> \
         Dict[str, str]:
@@ -59,6 +69,9 @@ def _get_jwt(payload: dict, private_key: str) -> str:
     """
     Ensure that jwt enconding return the same type (str) as versions < 2.0.0 returned bytes and >2.0.0 return strings. 
     """
+    ## imported here as only the JWT authentication requires it
+    import jwt
+
     token: Union[str, bytes] = jwt.encode(payload, private_key, algorithm='RS256')
     if isinstance(token, bytes):
         return token.decode('utf-8')
@@ -90,4 +103,90 @@ def get_oauth_token_and_expiry_for_config(config: dict,
         expiry = responseJson.get("expires_in")
         if token is None or expiry is None:
             raise Exception(f"OAuth response missing required fields. Response: {responseJson}")
-        return {'token': token, 'expiry': expiry}
\ No newline at end of file
+        return {'token': token, 'expiry': expiry}
+
+DEFAULT_TOKEN_CACHE = os.path.join(os.path.expanduser("~"), ".cjapy", "token_cache.json")
+
+
+def get_token_cache_key(config: dict) -> str:
+    """
+    Returns the key used to store the token of a configuration in the token cache.
+    The key is a hash of the org ID, client ID, technical account and scopes.
+    Arguments:
+        config : REQUIRED : Configuration object.
+    """
+    key = "|".join(
+        str(config.get(field) or "")
+        for field in ["org_id", "client_id", "tech_id", "scopes"]
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _locked_file(path: str):
+    """
+    Context manager holding an exclusive lock on a ".lock" file next to the path provided.
+    Uses fcntl on POSIX systems and msvcrt on Windows.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "a+") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _read_token_cache(path: str) -> dict:
+    """
+    Returns the content of the token cache file, empty if the file does not exist or is corrupted.
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def get_cached_token(config: dict, path: str = DEFAULT_TOKEN_CACHE, margin: int = 0) -> Optional[dict]:
+    """
+    Returns the token and its date limit from the token cache, if still valid.
+    Arguments:
+        config : REQUIRED : Configuration object.
+        path : OPTIONAL : path of the token cache file.
+        margin : OPTIONAL : number of seconds the token needs to be valid for.
+    """
+    with _locked_file(path):
+        entry = _read_token_cache(path).get(get_token_cache_key(config))
+    if entry is None or entry.get("date_limit", 0) < time.time() + margin:
+        return None
+    return entry
+
+
+def save_token_in_cache(config: dict, token: str, date_limit: float, path: str = DEFAULT_TOKEN_CACHE) -> None:
+    """
+    Save the token in the token cache, shared between processes.
+    Expired tokens of other configurations are removed at the same time.
+    Arguments:
+        config : REQUIRED : Configuration object.
+        token : REQUIRED : the access token.
+        date_limit : REQUIRED : timestamp after which the token should be renewed.
+        path : OPTIONAL : path of the token cache file.
+    """
+    with _locked_file(path):
+        cache = _read_token_cache(path)
+        now = time.time()
+        cache = {key: entry for key, entry in cache.items() if entry.get("date_limit", 0) > now}
+        cache[get_token_cache_key(config)] = {"token": token, "date_limit": date_limit}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "w") as f:
+            f.write(json.dumps(cache))
+        os.replace(tmp_path, path)
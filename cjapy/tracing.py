@@ -0,0 +1,286 @@
+import json
+import os
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+
+_currentSpan = contextvars.ContextVar("cjapy_current_span", default=None)
+
+
+def currentSpan() -> "Span":
+    """
+    Returns the span currently open in this thread or task, None if there is none.
+    """
+    return _currentSpan.get()
+
+
+def propagate(func: callable) -> callable:
+    """
+    Returns a function running func in a copy of the current context: the span currently open is the parent
+    of its spans, and the active profiler (cjapy.profiling) records its phases.
+    To be used on the functions submitted to a ThreadPoolExecutor, as the threads do not inherit the context.
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        ## a context can only be entered by one thread at a time, each call runs in its own copy
+        return context.copy().run(func, *args, **kwargs)
+
+    return wrapper
+
+
+def traced(name: str = None) -> callable:
+    """
+    Decorator of the CJA methods opening a span when the connector of the instance has a tracer.
+    Arguments:
+        name : OPTIONAL : name of the span (default "CJA.<method name>")
+    """
+
+    def decorator(func: callable) -> callable:
+        spanName = name or f"CJA.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            tracer = getattr(getattr(self, "connector", None), "tracer", None)
+            if tracer is None:
+                return func(self, *args, **kwargs)
+            with tracer.span(spanName):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class Span:
+    """
+    A timed operation, with its parent and attributes.
+    """
+
+    __slots__ = (
+        "name",
+        "traceId",
+        "spanId",
+        "parentId",
+        "start",
+        "end",
+        "threadId",
+        "threadName",
+        "attributes",
+        "error",
+        "_token",
+    )
+
+    def __init__(self, name: str, parent: "Span" = None, attributes: dict = None) -> None:
+        self.name = name
+        self.traceId = parent.traceId if parent is not None else os.urandom(16).hex()
+        self.spanId = os.urandom(8).hex()
+        self.parentId = parent.spanId if parent is not None else None
+        self.start = time.time_ns()
+        self.end = None
+        self.threadId = threading.get_ident()
+        self.threadName = threading.current_thread().name
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self._token = None
+
+    def __repr__(self) -> str:
+        return f"Span(name={self.name}, duration={self.duration})"
+
+    @property
+    def duration(self) -> float:
+        """
+        Duration of the span in seconds, None if it is not finished.
+        """
+        if self.end is None:
+            return None
+        return (self.end - self.start) / 1e9
+
+    def setAttribute(self, key: str, value: object) -> None:
+        self.attributes[key] = value
+
+
+class Tracer:
+    """
+    Record the spans of the requests and of the high-level methods.
+    The spans can be exported in the Chrome trace-event format (chrome://tracing, Perfetto) or in the OTLP JSON format.
+    """
+
+    def __init__(self, maxSpans: int = 100000) -> None:
+        """
+        Arguments:
+            maxSpans : OPTIONAL : maximum number of spans kept, the new spans are dropped above it (default 100000)
+        """
+        self.maxSpans = maxSpans
+        self.dropped = 0
+        self.__spans = []
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__spans)
+
+    def startSpan(self, name: str, **attributes) -> Span:
+        """
+        Open a span as child of the current span, it becomes the current span.
+        It has to be closed with endSpan, in the same thread.
+        Arguments:
+            name : REQUIRED : name of the span.
+        """
+        span = Span(name, _currentSpan.get(), attributes)
+        span._token = _currentSpan.set(span)
+        return span
+
+    def endSpan(self, span: Span, error: Exception = None) -> None:
+        """
+        Close the span and restore its parent as current span.
+        Arguments:
+            span : REQUIRED : span returned by startSpan.
+            error : OPTIONAL : exception raised during the span.
+        """
+        span.end = time.time_ns()
+        if error is not None:
+            span.error = repr(error)
+        if span._token is not None:
+            try:
+                _currentSpan.reset(span._token)
+            except ValueError:
+                ## closed from another context
+                pass
+            span._token = None
+        with self.__lock:
+            if len(self.__spans) < self.maxSpans:
+                self.__spans.append(span)
+            else:
+                self.dropped += 1
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Context manager opening a span as child of the current span.
+        Arguments:
+            name : REQUIRED : name of the span.
+        """
+        span = self.startSpan(name, **attributes)
+        try:
+            yield span
+        except BaseException as e:
+            self.endSpan(span, error=e)
+            raise
+        else:
+            self.endSpan(span)
+
+    def getSpans(self) -> list:
+        """
+        Returns the list of the spans finished.
+        """
+        with self.__lock:
+            return list(self.__spans)
+
+    def clear(self) -> None:
+        """
+        Remove the spans recorded.
+        """
+        with self.__lock:
+            self.__spans = []
+            self.dropped = 0
+
+    def to_chrome(self) -> dict:
+        """
+        Returns the spans in the Chrome trace-event format.
+        """
+        spans = self.getSpans()
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in spans:
+            threads[span.threadId] = span.threadName
+            args = {key: str(value) for key, value in span.attributes.items()}
+            args["spanId"] = span.spanId
+            if span.parentId is not None:
+                args["parentId"] = span.parentId
+            if span.error is not None:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.name.split(".")[0].split(" ")[0],
+                    "ph": "X",
+                    "ts": span.start / 1000,
+                    "dur": (span.end - span.start) / 1000,
+                    "pid": pid,
+                    "tid": span.threadId,
+                    "args": args,
+                }
+            )
+        for threadId, threadName in threads.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": threadId,
+                    "args": {"name": threadName},
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def to_otlp(self, serviceName: str = "cjapy") -> dict:
+        """
+        Returns the spans in the OTLP JSON format (ExportTraceServiceRequest).
+        Arguments:
+            serviceName : OPTIONAL : value of the service.name resource attribute (default "cjapy")
+        """
+
+        def attribute(key: str, value: object) -> dict:
+            if type(value) == bool:
+                return {"key": key, "value": {"boolValue": value}}
+            if type(value) == int:
+                return {"key": key, "value": {"intValue": str(value)}}
+            if type(value) == float:
+                return {"key": key, "value": {"doubleValue": value}}
+            return {"key": key, "value": {"stringValue": str(value)}}
+
+        otlpSpans = []
+        for span in self.getSpans():
+            otlpSpan = {
+                "traceId": span.traceId,
+                "spanId": span.spanId,
+                "name": span.name,
+                "kind": 3 if span.name == "attempt" or span.name.startswith("HTTP") else 1,
+                "startTimeUnixNano": str(span.start),
+                "endTimeUnixNano": str(span.end),
+                "attributes": [attribute(key, value) for key, value in span.attributes.items()]
+                + [attribute("thread.name", span.threadName)],
+                "status": {"code": 2, "message": span.error} if span.error is not None else {"code": 1},
+            }
+            if span.parentId is not None:
+                otlpSpan["parentSpanId"] = span.parentId
+            otlpSpans.append(otlpSpan)
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [attribute("service.name", serviceName)]},
+                    "scopeSpans": [{"scope": {"name": "cjapy"}, "spans": otlpSpans}],
+                }
+            ]
+        }
+
+    def export(self, filename: str = "cjapy_trace.json", format: str = "chrome") -> str:
+        """
+        Write the spans in a JSON file and returns the filename.
+        Arguments:
+            filename : OPTIONAL : name of the file (default "cjapy_trace.json")
+            format : OPTIONAL : "chrome" (default) for the trace-event format or "otlp"
+        """
+        if format == "chrome":
+            data = self.to_chrome()
+        elif format == "otlp":
+            data = self.to_otlp()
+        else:
+            raise ValueError("format has to be 'chrome' or 'otlp'")
+        with open(filename, "w") as f:
+            f.write(json.dumps(data))
+        return filename
@@ -0,0 +1,383 @@
+import io
+import re
+import gzip
+import json
+import time
+import base64
+import hashlib
+import threading
+from typing import Union
+from urllib.parse import urlsplit, urlunsplit, parse_qsl
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+## response headers kept in the cassette, the others (cookies, request IDs...) are dropped
+RECORDED_HEADERS = ("Content-Type",)
+REDACTED = "REDACTED"
+
+
+def requestKey(
+    method: str, url: str, params: dict = None, data: Union[str, bytes] = None, headers: dict = None
+) -> str:
+    """
+    Returns the key identifying a request in a cassette: method, URL, sorted parameters and normalized JSON body.
+    Arguments:
+        method : REQUIRED : HTTP method
+        url : REQUIRED : URL of the request
+        params : OPTIONAL : query parameters
+        data : OPTIONAL : body of the request
+        headers : OPTIONAL : headers of the request, used to decode a gzip body.
+    """
+    return hashlib.sha1(
+        json.dumps(_describeRequest(method, url, params, data, headers), sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _describeRequest(
+    method: str, url: str, params: dict = None, data: Union[str, bytes] = None, headers: dict = None
+) -> dict:
+    split = urlsplit(url)
+    query = parse_qsl(split.query, keep_blank_values=True)
+    query += [(str(key), str(value)) for key, value in (params or {}).items() if value is not None]
+    body = data
+    if type(body) == bytes:
+        if headers is not None and headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        body = body.decode("utf-8", errors="replace")
+    if body is not None:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+        except ValueError:
+            pass
+    return {
+        "method": method.upper(),
+        "url": urlunsplit((split.scheme, split.netloc, split.path, "", "")),
+        "params": sorted(query),
+        "body": body,
+    }
+
+
+class ReplayResponse:
+    """
+    Response built from a cassette, exposing the attributes of requests.Response used by cjapy.
+    """
+
+    class _Request:
+        def __init__(self, method: str, url: str) -> None:
+            self.method = method
+            self.url = url
+
+    def __init__(
+        self,
+        status_code: int = 200,
+        content: bytes = b"",
+        headers: dict = None,
+        url: str = None,
+        method: str = "GET",
+        elapsed: float = 0,
+    ) -> None:
+        self.status_code = status_code
+        self.content = content
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.headers["Content-Length"] = str(len(content))
+        self.url = url
+        self.request = self._Request(method, url)
+        self.elapsed = elapsed
+        self.encoding = "utf-8"
+        self.raw = io.BytesIO(content)
+        self.reason = ""
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors="replace")
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self, **kwargs) -> object:
+        return json.loads(self.content, **kwargs)
+
+    def iter_content(self, chunk_size: int = 1, decode_unicode: bool = False):
+        chunk_size = chunk_size or len(self.content) or 1
+        for index in range(0, len(self.content), chunk_size):
+            yield self.content[index : index + chunk_size]
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+    def close(self) -> None:
+        self.raw.close()
+
+
+class Cassette:
+    """
+    List of recorded request/response pairs, saved as JSON (gzip compressed when the filename ends with .gz).
+    """
+
+    version = 1
+
+    def __init__(self, path: str = None) -> None:
+        """
+        Arguments:
+            path : OPTIONAL : file of the cassette.
+        """
+        self.path = path
+        self.interactions = []
+
+    def __len__(self) -> int:
+        return len(self.interactions)
+
+    def append(self, interaction: dict) -> None:
+        self.interactions.append(interaction)
+
+    def load(self, path: str = None) -> "Cassette":
+        """
+        Load the interactions from the cassette file.
+        Arguments:
+            path : OPTIONAL : file to read, the path of the cassette by default.
+        """
+        path = path or self.path
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != self.version:
+            raise ValueError(f"Unsupported cassette version: {data.get('version')}")
+        self.interactions = data["interactions"]
+        return self
+
+    def save(self, path: str = None) -> str:
+        """
+        Write the interactions in the cassette file and returns the filename.
+        Arguments:
+            path : OPTIONAL : file to write, the path of the cassette by default.
+        """
+        path = path or self.path
+        if path is None:
+            raise ValueError("Require a path to save the cassette")
+        opener = gzip.open if str(path).endswith(".gz") else open
+        with opener(path, "wt", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.version, "interactions": self.interactions},
+                f,
+                separators=(",", ":"),
+            )
+        return path
+
+
+def _encodeContent(content: bytes) -> tuple:
+    try:
+        return content.decode("utf-8"), "text"
+    except UnicodeDecodeError:
+        return base64.b64encode(content).decode("ascii"), "base64"
+
+
+def _decodeContent(content: str, encoding: str) -> bytes:
+    if encoding == "base64":
+        return base64.b64decode(content)
+    return content.encode("utf-8")
+
+
+class RecordTransport:
+    """
+    Transport sending the requests with a requests.Session and recording them in a cassette.
+    The Authorization token is removed from the recorded requests and responses, and only the Content-Type header of the responses is kept.
+    The cassette is written by the save method, or when the transport is closed.
+    """
+
+    def __init__(self, path: str = None, session: requests.Session = None) -> None:
+        """
+        Arguments:
+            path : REQUIRED : file of the cassette, gzip compressed when it ends with .gz
+            session : OPTIONAL : session sending the requests, a new one is created by default.
+        """
+        if path is None:
+            raise ValueError("Require a path for the cassette")
+        self.cassette = Cassette(path)
+        self.session = session if session is not None else requests.Session()
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict = None,
+        params: dict = None,
+        data: Union[str, bytes] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        Send the request and record it with its response.
+        The body of a streamed response is downloaded to be recorded, a ReplayResponse is returned in that case.
+        """
+        start = time.perf_counter()
+        res = self.session.request(
+            method, url, headers=headers, params=params, data=data, **kwargs
+        )
+        latency = time.perf_counter() - start
+        secrets = self._secrets(headers)
+        request = _describeRequest(method, url, params, data, headers)
+        content, encoding = _encodeContent(res.content)
+        interaction = {
+            "key": requestKey(method, url, params, data, headers),
+            "request": self._scrub(request, secrets),
+            "response": {
+                "status": res.status_code,
+                "headers": {
+                    key: res.headers[key] for key in RECORDED_HEADERS if key in res.headers
+                },
+                "content": self._scrub(content, secrets) if encoding == "text" else content,
+                "encoding": encoding,
+            },
+            "latency": round(latency, 4),
+        }
+        with self.__lock:
+            self.cassette.append(interaction)
+        if stream:
+            return ReplayResponse(
+                status_code=res.status_code,
+                content=res.content,
+                headers=dict(res.headers),
+                url=url,
+                method=method,
+                elapsed=latency,
+            )
+        return res
+
+    @staticmethod
+    def _secrets(headers: dict = None) -> list:
+        authorization = (headers or {}).get("Authorization", "")
+        token = re.sub(r"^Bearer\s+", "", authorization)
+        return [token] if token else []
+
+    def _scrub(self, value: object, secrets: list) -> object:
+        """
+        Replace the secrets found in the value (string, list or dictionary) by REDACTED.
+        """
+        if type(value) == str:
+            for secret in secrets:
+                value = value.replace(secret, REDACTED)
+            return value
+        if type(value) == list:
+            return [self._scrub(element, secrets) for element in value]
+        if type(value) == tuple:
+            return tuple(self._scrub(element, secrets) for element in value)
+        if type(value) == dict:
+            return {key: self._scrub(element, secrets) for key, element in value.items()}
+        return value
+
+    def save(self, path: str = None) -> str:
+        """
+        Write the cassette file and returns the filename.
+        Arguments:
+            path : OPTIONAL : file to write, the path given at the creation by default.
+        """
+        with self.__lock:
+            return self.cassette.save(path)
+
+    def close(self) -> None:
+        """
+        Write the cassette file and close the session.
+        """
+        self.save()
+        self.session.close()
+
+    def mount(self, *args) -> None:
+        self.session.mount(*args)
+
+
+class ReplayTransport:
+    """
+    Transport answering the requests from a cassette, without network.
+    Identical requests recorded several times are answered in the recording order, the last response is then repeated.
+    """
+
+    def __init__(
+        self, path: str = None, latency: Union[float, str] = None, cassette: Cassette = None
+    ) -> None:
+        """
+        Arguments:
+            path : REQUIRED : file of the cassette (or cassette argument)
+            latency : OPTIONAL : latency simulated for each response.
+                None (default) for no latency, "recorded" for the latency measured while recording, or a number of seconds.
+            cassette : OPTIONAL : Cassette instance to use instead of a file.
+        """
+        if cassette is None:
+            if path is None:
+                raise ValueError("Require a path for the cassette")
+            cassette = Cassette(path).load()
+        self.cassette = cassette
+        self.latency = latency
+        self.hits = 0
+        self.misses = 0
+        self.__responses = {}
+        self.__positions = {}
+        for interaction in cassette.interactions:
+            self.__responses.setdefault(interaction["key"], []).append(interaction)
+        self.__lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: dict = None,
+        params: dict = None,
+        data: Union[str, bytes] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> ReplayResponse:
+        """
+        Returns the recorded response of that request.
+        Raise an Exception if the request is not in the cassette.
+        """
+        key = requestKey(method, url, params, data, headers)
+        with self.__lock:
+            interactions = self.__responses.get(key)
+            if interactions is None:
+                self.misses += 1
+                raise Exception(f"No recorded response for {method} {url} (params: {params})")
+            position = self.__positions.get(key, 0)
+            self.__positions[key] = position + 1
+            self.hits += 1
+        interaction = interactions[min(position, len(interactions) - 1)]
+        if self.latency == "recorded":
+            time.sleep(interaction.get("latency", 0))
+        elif self.latency:
+            time.sleep(self.latency)
+        response = interaction["response"]
+        return ReplayResponse(
+            status_code=response["status"],
+            content=_decodeContent(response["content"], response.get("encoding", "text")),
+            headers=response.get("headers"),
+            url=url,
+            method=method,
+            elapsed=interaction.get("latency", 0),
+        )
+
+    def rewind(self) -> None:
+        """
+        Answer the requests from the start of the cassette again.
+        """
+        with self.__lock:
+            self.__positions = {}
+
+    def close(self) -> None:
+        pass
+
+    def mount(self, *args) -> None:
+        pass
@@ -1,10 +1,13 @@
-import pandas as pd
 import json
 from typing import Union, IO
 import time
 from .requestCreator import RequestCreator
+from .lazy import LazyModule
 from copy import deepcopy
 
+## pandas is imported when the first DataFrame is built
+pd = LazyModule("pandas")
+
 
 class Workspace:
     """
@@ -25,7 +25,6 @@ CLASSIFIERS = [
     "Operating System :: OS Independent",
     "Programming Language :: Python",
     "Topic :: Scientific/Engineering :: Information Analysis",
-    "Programming Language :: Python :: 3.6",
     "Programming Language :: Python :: 3.7",
     "Programming Language :: Python :: 3.8",
     "Programming Language :: Python :: 3.9",
@@ -61,6 +60,10 @@ setup(
         "PyJWT",
         "pytest",
     ],
+    extras_require={
+        "fast": ["orjson"],
+        "stream": ["ijson"],
+    },
     classifiers=CLASSIFIERS,
-    python_requires=">=3.6",
+    python_requires=">=3.7",
 )